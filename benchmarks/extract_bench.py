@@ -0,0 +1,177 @@
+# extract_bench.py
+"""
+Micro-benchmark of `src.html_extract` against the ad hoc parsing it replaced.
+
+Pages come from the stand-in server (homepage, detail pages with a
+comment thread that brings them to the ~100KB of a real one, listing page) or, with --pages-dir, from captured
+pages saved from SteamGifts (*.html; "listing" in the file name marks a
+listing page). Each case times the old code path (str.split / one
+re.search per field / the backtracking entry_delete regex) and the
+single-pass extractor, and checks that both read the same values.
+
+    python -m benchmarks.extract_bench
+    python -m benchmarks.extract_bench --pages-dir ~/captures --save-baseline
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+
+from benchmarks.standin_server import StandinState, load_giveaways
+from src import html_extract
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(ROOT, "benchmarks", "baselines", "extract.json")
+
+# --- parsing antigo (antes de src/html_extract.py) ---
+LEGACY_POINTS_RE = r'<span class="nav__points">(\d+)</span>'
+LEGACY_ENTERED_RE = r'data-do="entry_delete"[^>]*class="(?!.*is-hidden).*"'
+LEGACY_ROW_SPLIT = "giveaway__row-outer-wrap"
+LEGACY_CODE_RE = re.compile(r'href="/giveaway/([A-Za-z0-9]{5})/')
+LEGACY_INNER_RE = re.compile(r'class="giveaway__row-inner-wrap( is-faded)?"')
+
+
+def legacy_page(html: str) -> dict:
+    """init_session + get_current_points + is_joinable, as they were."""
+    xsrf = html.split('name="xsrf_token" value="')[1].split('"')[0] if 'name="xsrf_token"' in html else None
+    points = re.search(LEGACY_POINTS_RE, html)
+    return {
+        "xsrf_token": xsrf,
+        "points": int(points.group(1)) if points else None,
+        "entered": bool(re.search(LEGACY_ENTERED_RE, html)),
+        "owned": "sidebar__error is-disabled" in html,
+    }
+
+
+def new_page(html: str) -> dict:
+    info = html_extract.parse_page(html)
+    return {"xsrf_token": info.xsrf_token, "points": info.points, "entered": bool(info.entered), "owned": info.error is not None}
+
+
+def legacy_listing(html: str) -> dict:
+    """listing_state.parse_listing, as it was (EntryState -> ListingRow)."""
+    states = {}
+    for row in html.split(LEGACY_ROW_SPLIT)[1:]:
+        code = LEGACY_CODE_RE.search(row)
+        inner = LEGACY_INNER_RE.search(row)
+        if code and inner:
+            states[code.group(1)] = html_extract.ListingRow(code.group(1), inner.group(1) is not None, "contributor-level--negative" not in row)
+    re.search(LEGACY_POINTS_RE, html)
+    return {code: (r.joined, r.level_ok) for code, r in states.items()}
+
+
+def new_listing(html: str) -> dict:
+    rows, _ = html_extract.parse_listing(html)
+    return {r.code: (r.joined, r.level_ok) for r in rows}
+
+
+def comments_html(count: int = 150) -> str:
+    """Comment thread markup like the one below a real detail page (~100KB for 150)."""
+    comment = (
+        '<div class="comment__parent">\n'
+        '  <div class="comment__summary" id="{n}">\n'
+        '    <a href="/user/user{n}" class="global__image-outer-wrap global__image-outer-wrap--avatar-small">'
+        '<div class="global__image-inner-wrap" style="background-image:url(https://avatars.steamstatic.com/{n:040d}_medium.jpg);"></div></a>\n'
+        '    <div class="comment__author"><a href="/user/user{n}">user{n}</a>'
+        '<span class="comment__role-name" title="Level 3">Level 3</span>'
+        '<span data-timestamp="1700000000">2 hours ago</span></div>\n'
+        '    <div class="comment__display-state"><div class="markdown markdown--resize-body">'
+        '<p>Thanks for the giveaway! Good luck everyone, hope someone who wants it wins.</p></div></div>\n'
+        '    <div class="comment__actions"><a href="/go/comment/{n}">Permalink</a>'
+        '<div class="comment__actions__button js__comment-reply">Reply</div></div>\n'
+        '  </div>\n'
+        '</div>\n'
+    )
+    return "".join(comment.format(n=n) for n in range(count))
+
+
+def standin_pages() -> dict[str, tuple[str, str]]:
+    giveaways = load_giveaways("http://standin", 2)
+    state = StandinState(giveaways, points=400, latency=0)
+    joined, fresh = (g["link"].split("/")[4] for g in giveaways[:2])
+    state.joined.add(joined)
+    comments = comments_html()
+    return {
+        "homepage": ("page", state.homepage()),
+        "detail_entered": ("page", state.detail_html(joined).replace("</body>", comments + "</body>")),
+        "detail_open": ("page", state.detail_html(fresh).replace("</body>", comments + "</body>")),
+        "listing": ("listing", state.listing_html(1)),
+    }
+
+
+def captured_pages(directory: str) -> dict[str, tuple[str, str]]:
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        with open(path, "r", encoding="utf-8") as f:
+            pages[name] = ("listing" if "listing" in name else "page", f.read())
+    return pages
+
+
+def _best_us(fn, html: str, number: int, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(html)
+        best = min(best, time.perf_counter() - start)
+    return round(best / number * 1e6, 1)
+
+
+def measure(pages: dict[str, tuple[str, str]], number: int) -> dict:
+    result = {}
+    for name, (kind, html) in pages.items():
+        legacy, new = (legacy_listing, new_listing) if kind == "listing" else (legacy_page, new_page)
+        if legacy(html) != new(html):
+            raise AssertionError(f"{name}: extractor disagrees with the old parsing: {legacy(html)} vs {new(html)}")
+        result[name] = {
+            "kib": round(len(html) / 1024, 1),
+            "legacy_us": _best_us(legacy, html, number),
+            "extract_us": _best_us(new, html, number),
+        }
+        if kind == "page":
+            # o que cada chamador pede de facto: só os pontos / só o estado de entrada
+            result[name]["points_only_us"] = _best_us(lambda h: html_extract.parse_page(h, fields=("points",)), html, number)
+            result[name]["entry_state_us"] = _best_us(lambda h: html_extract.parse_page(h, fields=("entry_state",)), html, number)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTML extractor micro-benchmark")
+    parser.add_argument("--pages-dir", help="Directory with captured *.html pages (default: stand-in pages)")
+    parser.add_argument("--number", type=int, default=200, help="Parses per timing")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    pages = captured_pages(args.pages_dir) if args.pages_dir else standin_pages()
+    result = measure(pages, args.number)
+    print(json.dumps(result, indent=4))
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(BASELINE_FILE), exist_ok=True)
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=4)
+        print(f"Baseline saved to {BASELINE_FILE}")
+        return 0
+
+    if not os.path.exists(BASELINE_FILE):
+        print("No baseline to compare (run with --save-baseline).")
+        return 0
+    with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = [
+        f"{name}: extract_us {r['extract_us']} vs baseline {baseline[name]['extract_us']}"
+        for name, r in result.items()
+        if name in baseline and r["extract_us"] > baseline[name]["extract_us"] * (1 + args.tolerance)
+    ]
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+# memory_bench.py
+"""
+Memory and serialization benchmark of the in-memory catalog.
+
+Builds a `Giveaways` catalog of N records (data/giveaways.capture.json
+replicated) and reports traced bytes per giveaway plus the time of
+`Giveaways.from_dict` and `Giveaways.to_dict`.
+
+    python -m benchmarks.memory_bench --records 20000
+    python -m benchmarks.memory_bench --save-baseline
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from src.models import Giveaways
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CAPTURE_FILE = os.path.join(ROOT, "data", "giveaways.capture.json")
+BASELINE_FILE = os.path.join(ROOT, "benchmarks", "baselines", "memory.json")
+
+
+def make_catalog_json(records: int) -> str:
+    """Replicates the captured catalog to `records` giveaways, as the JSON text of a snapshot."""
+    with open(CAPTURE_FILE, "r", encoding="utf-8") as f:
+        capture = json.load(f)
+    originals = list(capture["giveaways"].values())
+    giveaways = {}
+    for i in range(records):
+        g = dict(originals[i % len(originals)])
+        g["id"] = g["id"] + (i // len(originals)) * 10_000_000
+        giveaways[str(g["id"])] = g
+    return json.dumps({"time_fetched": capture["time_fetched"], "results_count": records, "giveaways": giveaways})
+
+
+def measure(records: int) -> dict:
+    text = make_catalog_json(records)
+    gc.collect()
+
+    # memória retida pelo catálogo depois de carregar o snapshot (o dict do JSON é descartado)
+    tracemalloc.start()
+    raw = json.loads(text)
+    start = time.perf_counter()
+    catalog = Giveaways.from_dict(raw)
+    from_dict_s = time.perf_counter() - start
+    del raw
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    catalog.to_dict()
+    to_dict_s = time.perf_counter() - start
+
+    return {
+        "records": records,
+        "bytes_per_giveaway": round(current / records, 1),
+        "catalog_mb": round(current / 1024 / 1024, 2),
+        "from_dict_ms": round(from_dict_s * 1000, 1),
+        "to_dict_ms": round(to_dict_s * 1000, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Catalog memory benchmark")
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args(argv)
+
+    result = measure(args.records)
+    print(json.dumps(result, indent=4))
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(BASELINE_FILE), exist_ok=True)
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=4)
+        print(f"Baseline saved to {BASELINE_FILE}")
+        return 0
+
+    if not os.path.exists(BASELINE_FILE):
+        print("No baseline yet (run with --save-baseline).")
+        return 0
+    with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if result["bytes_per_giveaway"] > baseline["bytes_per_giveaway"] * (1 + args.tolerance):
+        print(f"REGRESSION bytes_per_giveaway: {result['bytes_per_giveaway']} vs baseline {baseline['bytes_per_giveaway']}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
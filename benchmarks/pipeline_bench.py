@@ -0,0 +1,137 @@
+# pipeline_bench.py
+"""
+End-to-end offline benchmark of the fetch → sort → join pipeline.
+
+Starts the stand-in server (benchmarks/standin_server.py), points the bot at
+it through SG_BASE_URL / FLARESOLVERR_URL / SG_DATA_DIR and runs the real
+`init_session` + `main.run_cycle`. Reports pages/s, joins/s, requests per
+join, time to first join, wall time and peak Python memory, and compares
+with a saved baseline.
+
+    python -m benchmarks.pipeline_bench --pages 20 --latency 0.05
+    python -m benchmarks.pipeline_bench --save-baseline
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.standin_server import StandinServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(ROOT, "benchmarks", "baselines", "pipeline.json")
+# métricas onde maior é melhor; as restantes são "menor é melhor"
+HIGHER_IS_BETTER = {"pages_per_s", "joins_per_s"}
+COMPARED = ("wall_s", "pages_per_s", "joins_per_s", "first_join_s", "requests_per_join", "peak_mem_mb")
+
+
+def configure_env(base_url: str, data_dir: str, cache: bool):
+    """Must run before any `src`/`utils` module is imported."""
+    os.environ.update({
+        "SG_BASE_URL": base_url,
+        "FLARESOLVERR_URL": f"{base_url}/v1",
+        "SG_DATA_DIR": data_dir,
+        "COOKIES": json.dumps({"PHPSESSID": "standin"}),
+        "HTTP_CACHE": "1" if cache else "0",
+        "HTTP_RETRIES": "0",
+    })
+
+
+def run(pages: int, latency: float, cycle_args: list[str], cache: bool = False, rate_limit: float = 0.0) -> dict:
+    with StandinServer(pages=pages, latency=latency, rate_limit=rate_limit) as server, tempfile.TemporaryDirectory() as data_dir:
+        configure_env(server.base_url, data_dir, cache)
+
+        import main
+        from src.session_manager import init_session
+        from utils import metrics as run_metrics
+
+        args = main.parse_args(["--all", *cycle_args])
+        tracemalloc.start()
+        start = time.perf_counter()
+        init_session(local=False)
+        metrics = main.run_cycle(args)
+        wall = time.perf_counter() - start
+        limiter_wait = sum(h["sum"] for h in run_metrics.run_report()["ratelimit_wait"].values())
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        requests_total = sum(server.state.requests.values())
+        joins = metrics["joined"]
+        pages_fetched = server.state.requests["listing_json"]
+        return {
+            "pages": pages,
+            "latency_s": latency,
+            "args": cycle_args,
+            "wall_s": round(wall, 3),
+            "pages_fetched": pages_fetched,
+            "pages_per_s": round(pages_fetched / wall, 2),
+            "joins": joins,
+            "joins_per_s": round(joins / wall, 2),
+            "limiter_wait_s": round(limiter_wait, 3),
+            "first_join_s": round(server.state.first_join_at - start, 3) if server.state.first_join_at else None,
+            "requests": dict(server.state.requests),
+            "requests_per_join": round(requests_total / joins, 2) if joins else None,
+            "kib_served": round(server.state.bytes_sent / 1024, 1),
+            "peak_mem_mb": round(peak / 1024 / 1024, 2),
+        }
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for key in COMPARED:
+        new, old = result.get(key), baseline.get(key)
+        if new is None or not old:
+            continue
+        worse = new < old * (1 - tolerance) if key in HIGHER_IS_BETTER else new > old * (1 + tolerance)
+        if worse:
+            regressions.append(f"{key}: {new} vs baseline {old}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmark against the stand-in server")
+    parser.add_argument("--pages", type=int, default=10, help="JSON listing pages served by the stand-in")
+    parser.add_argument("--latency", type=float, default=0.02, help="Latency added to every stand-in request (s)")
+    parser.add_argument("--cache", action="store_true", help="Enable the on-disk HTTP cache")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Stand-in answers 429 above this many requests/s (0 = unlimited)")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.3)
+    parser.add_argument("cycle_args", nargs="*", help="Extra main.py flags, after --, e.g. -- --strategy knapsack")
+    args = parser.parse_args(argv)
+
+    from utils.logger import setup_logger
+    setup_logger("WARNING")
+
+    result = run(args.pages, args.latency, args.cycle_args, cache=args.cache, rate_limit=args.rate_limit)
+    print(json.dumps(result, indent=4))
+
+    key = f"pages={args.pages} latency={args.latency} args={' '.join(args.cycle_args)}".strip()
+    if args.rate_limit:
+        key += f" rate_limit={args.rate_limit}"
+    baselines = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+            baselines = json.load(f)
+
+    if args.save_baseline:
+        baselines[key] = result
+        os.makedirs(os.path.dirname(BASELINE_FILE), exist_ok=True)
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=4)
+        print(f"Baseline saved to {BASELINE_FILE} [{key}]")
+        return 0
+
+    if key not in baselines:
+        print(f"No baseline for [{key}] (run with --save-baseline).")
+        return 0
+    regressions = compare(result, baselines[key], args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+# ranking_bench.py
+"""
+Filter-and-rank benchmark of `src.ranking` on a synthetic catalog.
+
+Times the NumPy engine (table build + rank, and rank only on a reused table)
+against the pure-Python path and checks that both return the same order.
+Also times `src.scoring` (expected value per point) over the whole catalog.
+
+    python -m benchmarks.ranking_bench --records 20000
+    python -m benchmarks.ranking_bench --save-baseline
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from benchmarks.memory_bench import make_catalog_json
+from src import ranking, scoring
+from src.models import Giveaways
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(ROOT, "benchmarks", "baselines", "ranking.json")
+
+BY = ("points", "remaining_time")
+FILTERS = dict(min_points=0, max_points=300, timeframe=None, exclude_joined=True)
+
+
+def _best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1000, 2)
+
+
+def measure(records: int, repeat: int = 5) -> dict:
+    catalog = Giveaways.from_dict(json.loads(make_catalog_json(records)))
+    giveaways = list(catalog.giveaways.values())
+    # catálogo capturado já terminou: usar um `now` anterior para os giveaways contarem como ativos
+    now = min(g.end_timestamp for g in giveaways) - 3600
+
+    expected = ranking._rank_python(giveaways, BY, False, None, now, **FILTERS)
+    result = {"records": records, "matches": len(expected)}
+    result["python_ms"] = _best_ms(lambda: ranking._rank_python(giveaways, BY, False, None, now, **FILTERS), repeat)
+    result["score_python_ms"] = _best_ms(lambda: scoring._score_python(giveaways, now), repeat)
+
+    if ranking._load_numpy() is None:
+        result["numpy"] = None
+        return result
+
+    ranked = ranking.rank_giveaways(giveaways, by=BY, now=now, **FILTERS)
+    if [g.id for g in ranked] != [g.id for g in expected]:
+        raise AssertionError("NumPy and Python rankings differ")
+
+    table = ranking.RankingTable(giveaways, now=now)
+    table.rank(by=BY, **FILTERS)  # colunas em cache
+    result["numpy"] = ranking.np.__version__
+    result["numpy_ms"] = _best_ms(lambda: ranking.rank_giveaways(giveaways, by=BY, now=now, **FILTERS), repeat)
+    result["numpy_reused_table_ms"] = _best_ms(lambda: table.rank(by=BY, **FILTERS), repeat)
+    expected_scores = scoring._score_python(giveaways, now)
+    scores = scoring._score_numpy(giveaways, now)
+    if any(abs(a - b) > 1e-12 for a, b in zip(scores, expected_scores)):
+        raise AssertionError("NumPy and Python scores differ")
+    result["score_numpy_ms"] = _best_ms(lambda: scoring._score_numpy(giveaways, now), repeat)
+    result["numpy_weighted_ms"] = _best_ms(lambda: table.rank(weights={"entry_count": -1.0, "points": -0.5}, **FILTERS), repeat)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ranking engine benchmark")
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    result = measure(args.records, args.repeat)
+    print(json.dumps(result, indent=4))
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(BASELINE_FILE), exist_ok=True)
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=4)
+        print(f"Baseline saved to {BASELINE_FILE}")
+        return 0
+
+    if not os.path.exists(BASELINE_FILE) or not result.get("numpy"):
+        print("No baseline to compare (run with --save-baseline, NumPy required).")
+        return 0
+    with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if result["numpy_reused_table_ms"] > baseline["numpy_reused_table_ms"] * (1 + args.tolerance):
+        print(f"REGRESSION numpy_reused_table_ms: {result['numpy_reused_table_ms']} vs baseline {baseline['numpy_reused_table_ms']}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+# session_bench.py
+"""
+Session start-up of a cron-style run, with and without the saved session.
+
+Starts the stand-in with Cloudflare challenges on (GETs without the
+FlareSolverr `cf_clearance` are refused) and a FlareSolverr solve that takes
+`--solve-delay` seconds, then times `init_session()` in a fresh Python
+process, as a cron job would run it:
+
+- cold: no saved session, the homepage is solved through FlareSolverr;
+- warm: the session saved by the cold run is restored and validated by one
+  direct request;
+- expired: the saved cf_clearance is no longer accepted, so the validation
+  fails and FlareSolverr is used again.
+
+    python -m benchmarks.session_bench --solve-delay 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.standin_server import StandinServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INIT = "from src.session_manager import init_session; init_session()"
+
+
+def start_session(server: StandinServer, env: dict) -> dict:
+    before = dict(server.state.requests)
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", INIT], env=env, cwd=ROOT, check=True, capture_output=True)
+    elapsed = time.perf_counter() - start
+    requests = {k: v - before.get(k, 0) for k, v in server.state.requests.items() if v - before.get(k, 0)}
+    return {"seconds": round(elapsed, 3), "requests": requests}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Session start-up benchmark")
+    parser.add_argument("--solve-delay", type=float, default=2.0, help="Seconds each FlareSolverr solve takes")
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args(argv)
+
+    with StandinServer(pages=1, latency=args.latency, challenge=True, solve_delay=args.solve_delay) as server, \
+            tempfile.TemporaryDirectory() as data_dir:
+        env = {
+            **os.environ,
+            "SG_BASE_URL": server.base_url,
+            "FLARESOLVERR_URL": f"{server.base_url}/v1",
+            "SG_DATA_DIR": data_dir,
+            "COOKIES": json.dumps({"PHPSESSID": "standin"}),
+            "HTTP_CACHE": "0",
+            "HTTP_RETRIES": "0",
+        }
+        result = {"cold": start_session(server, env), "warm": start_session(server, env)}
+
+        cache_file = os.path.join(data_dir, "session.json")
+        with open(cache_file, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        for c in saved["cookies"]:
+            if c["name"] == "cf_clearance":
+                c["value"] = "expired"
+        with open(cache_file, "w", encoding="utf-8") as f:
+            json.dump(saved, f)
+        result["expired"] = start_session(server, env)
+
+    print(json.dumps(result, indent=4))
+    if "flaresolverr" in result["warm"]["requests"]:
+        print("REGRESSION warm start used FlareSolverr")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
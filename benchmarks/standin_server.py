@@ -0,0 +1,321 @@
+# standin_server.py
+"""
+Local stand-in for SteamGifts and FlareSolverr, generated from captured data.
+
+Serves, from `data/giveaways.capture.json` replicated to `pages` JSON pages:
+
+    GET  /?format=json&page=N     JSON listing (100 per page)
+    GET  /                        homepage (nav points + xsrf_token)
+    GET  /giveaways/search?page=N HTML listing (50 per page, entered rows is-faded)
+    GET  /giveaway/<code>/<slug>  detail page (entry_insert/entry_delete buttons)
+    POST /ajax.php                entry_insert
+    POST /v1                      FlareSolverr (sessions.create/destroy, request.get)
+
+Every request sleeps `latency` seconds and is counted per route. With
+`rate_limit` set, requests above that many per second (FlareSolverr excluded)
+get a 429 with `Retry-After: 1`, counted as "throttled". With `challenge`,
+GETs without the `cf_clearance` cookie FlareSolverr hands out get a
+Cloudflare-style 403 ("challenge"), and every FlareSolverr solve takes
+`solve_delay` seconds, like a real browser.
+"""
+import json
+import os
+import socket
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CAPTURE_FILE = os.path.join(ROOT, "data", "giveaways.capture.json")
+ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+JSON_PAGE_SIZE = 100
+HTML_PAGE_SIZE = 50
+XSRF_TOKEN = "standin0xsrf0token"
+CF_CLEARANCE = "standin"
+
+
+def make_code(n: int) -> str:
+    code = ""
+    for _ in range(5):
+        n, r = divmod(n, len(ALPHABET))
+        code = ALPHABET[r] + code
+    return code
+
+
+def load_giveaways(base_url: str, pages: int, capture_file: str = CAPTURE_FILE) -> list[dict]:
+    """Replicates the captured giveaways to `pages` pages, shifted to end in the future."""
+    with open(capture_file, "r", encoding="utf-8") as f:
+        capture = json.load(f)
+    originals = sorted(capture["giveaways"].values(), key=lambda g: g["end_timestamp"])
+    offset = int(time.time()) - capture["time_fetched"]
+
+    total = pages * JSON_PAGE_SIZE
+    giveaways = []
+    for i in range(total):
+        src = originals[i % len(originals)]
+        replica = i // len(originals)
+        code = make_code(i + 1)
+        slug = src["link"].rstrip("/").split("/")[-1]
+        g = {k: v for k, v in src.items() if k not in ("code", "joined", "owned", "score", "remaining_time", "remaining_time_str")}
+        g.update(
+            id=src["id"] + replica * 10_000_000,
+            link=f"{base_url}/giveaway/{code}/{slug}",
+            created_timestamp=src["created_timestamp"] + offset,
+            start_timestamp=src["start_timestamp"] + offset,
+            # réplicas terminam um pouco mais tarde para manter a ordem por fim
+            end_timestamp=src["end_timestamp"] + offset + replica * 3600,
+        )
+        giveaways.append(g)
+    giveaways.sort(key=lambda g: g["end_timestamp"])
+    return giveaways
+
+
+class StandinState:
+    def __init__(self, giveaways: list[dict], points: int, latency: float, rate_limit: float = 0.0, challenge: bool = False, solve_delay: float = 0.0):
+        self.giveaways = giveaways
+        self.rate_limit = rate_limit
+        self.challenge = challenge
+        self.solve_delay = solve_delay
+        self._window: list[float] = []  # instantes dos pedidos no último segundo
+        self.by_code = {g["link"].split("/")[4]: g for g in giveaways}
+        self.points = points
+        self.latency = latency
+        self.joined: set[str] = set()
+        self.requests = Counter()
+        self.bytes_sent = 0
+        self.first_join_at: float | None = None  # time.perf_counter() do primeiro entry_insert aceite
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Sliding one-second window limiter of the fake site."""
+        if not self.rate_limit:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self._window = [t for t in self._window if now - t < 1.0]
+            if len(self._window) >= self.rate_limit:
+                self.requests["throttled"] += 1
+                return False
+            self._window.append(now)
+            return True
+
+    def nav(self) -> str:
+        return (
+            f'<nav><a class="nav__avatar-outer-wrap" href="/user/standin"></a>'
+            f'<span class="nav__points">{self.points}</span>'
+            f'<span class="nav__level">Level 3</span></nav>'
+            f'<input type="hidden" name="xsrf_token" value="{XSRF_TOKEN}" />'
+        )
+
+    def homepage(self) -> str:
+        return f"<html><body>{self.nav()}<div class=\"page__inner-wrap\"></div></body></html>"
+
+    def listing_html(self, page: int) -> str:
+        rows = []
+        for g in self.giveaways[(page - 1) * HTML_PAGE_SIZE: page * HTML_PAGE_SIZE]:
+            code = g["link"].split("/")[4]
+            faded = " is-faded" if code in self.joined else ""
+            level = g.get("contributor_level", 0)
+            level_html = (
+                f'<div class="giveaway__column--contributor-level giveaway__column--contributor-level--positive">Level {level}+</div>'
+                if level else ""
+            )
+            rows.append(
+                f'<div class="giveaway__row-outer-wrap" data-game-id="{g.get("app_id") or 0}">'
+                f'<div class="giveaway__row-inner-wrap{faded}"><div class="giveaway__summary">'
+                f'<h2 class="giveaway__heading"><a class="giveaway__heading__name" href="/giveaway/{code}/x">{g["name"]}</a>'
+                f'<span class="giveaway__heading__thin">({g["points"]}P)</span></h2>'
+                f'<div class="giveaway__links"><a href="/giveaway/{code}/x/entries"><span>{g["entry_count"]:,} entries</span></a></div>'
+                f'{level_html}</div></div></div>'
+            )
+        return f"<html><body>{self.nav()}<div class=\"page__inner-wrap\">{''.join(rows)}</div></body></html>"
+
+    def detail_html(self, code: str) -> str | None:
+        g = self.by_code.get(code)
+        if g is None:
+            return None
+        joined = code in self.joined
+        insert_cls = "sidebar__entry-insert is-hidden" if joined else "sidebar__entry-insert"
+        delete_cls = "sidebar__entry-delete" if joined else "sidebar__entry-delete is-hidden"
+        filler = "<p>Lorem ipsum dolor sit amet.</p>" * 200  # páginas reais têm ~100KB
+        return (
+            f"<html><body>{self.nav()}<div class=\"featured__heading__medium\">{g['name']}</div>"
+            f'<div class="sidebar"><form><input type="hidden" name="code" value="{code}" />'
+            f'<div data-do="entry_insert" class="{insert_cls}">Enter Giveaway</div>'
+            f'<div data-do="entry_delete" class="{delete_cls}">Remove Entry</div></form></div>'
+            f"{filler}</body></html>"
+        )
+
+    def entry_insert(self, code: str) -> dict:
+        with self.lock:
+            g = self.by_code.get(code)
+            if g is None:
+                return {"type": "error", "msg": "Giveaway not found"}
+            if code in self.joined:
+                return {"type": "error", "msg": "Previously Won"}
+            if g["points"] > self.points:
+                return {"type": "error", "msg": "Not Enough Points"}
+            self.points -= g["points"]
+            self.joined.add(code)
+            if self.first_join_at is None:
+                self.first_join_at = time.perf_counter()
+            g["entry_count"] += 1
+            return {"type": "success", "entry_count": f"{g['entry_count']:,}", "points": str(self.points)}
+
+
+def make_handler(state: StandinState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            # sem isto o delayed ACK do cliente soma ~40ms por resposta (headers e body em writes separados)
+            self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body: str, content_type: str = "text/html; charset=utf-8"):
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            with state.lock:
+                state.bytes_sent += len(data)
+
+        def _count(self, route: str):
+            with state.lock:
+                state.requests[route] += 1
+            if state.latency:
+                time.sleep(state.latency)
+
+        def _throttle(self) -> bool:
+            if state.allow():
+                return False
+            data = b"Too Many Requests"
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return True
+
+        def _challenged(self) -> bool:
+            if not state.challenge or f"cf_clearance={CF_CLEARANCE}" in self.headers.get("Cookie", ""):
+                return False
+            self._count("challenge")
+            data = b"<html><head><title>Just a moment...</title></head></html>"
+            self.send_response(403)
+            self.send_header("cf-mitigated", "challenge")
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return True
+
+        def do_GET(self):
+            if self._throttle() or self._challenged():
+                return
+            url = urlsplit(self.path)
+            query = parse_qs(url.query)
+            parts = url.path.strip("/").split("/")
+
+            if url.path == "/" and query.get("format") == ["json"]:
+                self._count("listing_json")
+                page = int(query.get("page", ["1"])[0])
+                results = state.giveaways[(page - 1) * JSON_PAGE_SIZE: page * JSON_PAGE_SIZE]
+                self._send(200, json.dumps({"success": True, "page": page, "per_page": JSON_PAGE_SIZE, "results": results}), "application/json")
+            elif url.path == "/":
+                self._count("homepage")
+                self._send(200, state.homepage())
+            elif url.path == "/giveaways/search":
+                self._count("listing_html")
+                self._send(200, state.listing_html(int(query.get("page", ["1"])[0])))
+            elif parts[0] == "giveaway" and len(parts) >= 2:
+                self._count("detail")
+                html = state.detail_html(parts[1])
+                self._send(200 if html else 404, html or "Not found")
+            else:
+                self._count("other")
+                self._send(404, "Not found")
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length).decode("utf-8")
+            if self.path != "/v1" and self._throttle():
+                return
+            if self.path == "/ajax.php":
+                self._count("ajax")
+                form = {k: v[0] for k, v in parse_qs(body).items()}
+                if form.get("xsrf_token") != XSRF_TOKEN:
+                    self._send(200, json.dumps({"type": "error", "msg": "Invalid token"}), "application/json")
+                elif form.get("do") == "entry_insert":
+                    self._send(200, json.dumps(state.entry_insert(form.get("code", ""))), "application/json")
+                else:
+                    self._send(200, json.dumps({"type": "error", "msg": "Unknown action"}), "application/json")
+            elif self.path == "/v1":
+                self._count("flaresolverr")
+                payload = json.loads(body or "{}")
+                match payload.get("cmd"):
+                    case "sessions.create":
+                        out = {"status": "ok", "session": "standin-session"}
+                    case "sessions.destroy":
+                        out = {"status": "ok"}
+                    case _:
+                        time.sleep(state.solve_delay)
+                        out = {"status": "ok", "solution": {
+                            "url": payload.get("url"), "status": 200, "response": state.homepage(),
+                            "cookies": [{"name": "cf_clearance", "value": CF_CLEARANCE, "domain": "127.0.0.1", "path": "/"}],
+                            "userAgent": "Mozilla/5.0 (standin)",
+                        }}
+                self._send(200, json.dumps(out), "application/json")
+            else:
+                self._count("other")
+                self._send(404, "Not found")
+
+    return Handler
+
+
+class StandinServer:
+    """Runs the stand-in on a background thread. Use as a context manager."""
+
+    def __init__(self, pages: int = 5, latency: float = 0.0, points: int = 400, host: str = "127.0.0.1", port: int = 0, rate_limit: float = 0.0,
+                 challenge: bool = False, solve_delay: float = 0.0):
+        self.httpd = ThreadingHTTPServer((host, port), None)
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://{host}:{self.httpd.server_port}"
+        self.state = StandinState(load_giveaways(self.base_url, pages), points, latency, rate_limit, challenge, solve_delay)
+        self.httpd.RequestHandlerClass = make_handler(self.state)
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="standin", daemon=True)
+
+    def __enter__(self) -> "StandinServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the SteamGifts stand-in server")
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=8190)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Requests per second before answering 429 (0 = unlimited)")
+    parser.add_argument("--challenge", action="store_true", help="Answer GETs without the FlareSolverr cf_clearance cookie with a Cloudflare challenge")
+    parser.add_argument("--solve-delay", type=float, default=0.0, help="Seconds each FlareSolverr solve takes")
+    args = parser.parse_args()
+    with StandinServer(pages=args.pages, latency=args.latency, port=args.port, rate_limit=args.rate_limit,
+                       challenge=args.challenge, solve_delay=args.solve_delay) as server:
+        print(f"Stand-in listening on {server.base_url} (SG_BASE_URL={server.base_url} FLARESOLVERR_URL={server.base_url}/v1)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,99 @@
+# startup_bench.py
+"""
+Startup-time benchmark of the entry points.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter for
+each entry point, reports the cumulative import time and the slowest
+imports, and compares against a saved baseline.
+
+    python -m benchmarks.startup_bench                  # compare with baseline
+    python -m benchmarks.startup_bench --save-baseline  # record a new baseline
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(ROOT, "benchmarks", "baselines", "startup.json")
+ENTRY_POINTS = ["main", "src.get_giveaways", "src.join_giveaways", "utils.storage"]
+IMPORTTIME_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def import_times(module: str) -> list[tuple[str, int, int]]:
+    """Returns [(module, self_us, cumulative_us)] for one `import module`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            rows.append((match.group(4), int(match.group(1)), int(match.group(2))))
+    return rows
+
+
+def measure(module: str, repeat: int) -> dict:
+    totals = []
+    rows = []
+    for _ in range(repeat):
+        rows = import_times(module)
+        total = next((cum for name, _, cum in rows if name == module), 0)
+        totals.append(total)
+    slowest = sorted(rows, key=lambda r: r[1], reverse=True)[:10]
+    return {
+        "median_ms": statistics.median(totals) / 1000,
+        "min_ms": min(totals) / 1000,
+        "modules": len(rows),
+        "slowest_self_ms": {name: self_us / 1000 for name, self_us, _ in slowest},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import-time benchmark of the entry points")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    results = {module: measure(module, args.repeat) for module in ENTRY_POINTS}
+    for module, r in results.items():
+        print(f"{module:24} {r['median_ms']:8.1f} ms (min {r['min_ms']:.1f} ms, {r['modules']} modules)")
+        for name, ms in list(r["slowest_self_ms"].items())[:3]:
+            print(f"    {name:40} {ms:6.1f} ms")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(BASELINE_FILE), exist_ok=True)
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump({m: {"median_ms": r["median_ms"]} for m, r in results.items()}, f, indent=4)
+        print(f"Baseline saved to {BASELINE_FILE}")
+        return 0
+
+    if not os.path.exists(BASELINE_FILE):
+        print("No baseline yet (run with --save-baseline).")
+        return 0
+
+    with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = []
+    for module, r in results.items():
+        base = baseline.get(module, {}).get("median_ms")
+        if base and r["median_ms"] > base * (1 + args.tolerance):
+            regressions.append(f"{module}: {r['median_ms']:.1f} ms vs baseline {base:.1f} ms")
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
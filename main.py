@@ -1,38 +1,78 @@
-from ast import parse
-import os, src.session_manager as sm, argparse
+import os, argparse
+import asyncio
+import json
 import time
-import re
-from threading import local
-import requests
-from src import save_cookies, get_giveaways, join_giveaways
-from src.config import BASE_URL, COOKIES_PATH
+from src import planner
+from src.config import COOKIES_PATH, FETCH_CONCURRENCY, DAEMON_INTERVAL, CONTROL_PORT, METRICS_TEXTFILE, RUN_REPORT_FILE, JOIN_PLAN_FILE, POINTS_CAP, SCHEDULE_HORIZON
+from utils import metrics
 from utils.logger import setup_logger, log
-from utils.json_manager import jm
-from src.session_manager import session, init_session, fsr_request
+from utils.storage import jm
 
+# Módulos com rede/IO (requests, sessão, catálogo) só são importados quando um
+# comando precisa deles, para o arranque (e --help / --lookup) ser rápido.
 
-# Teste: fazer request para SteamGifts via FlareSolverr
-html = fsr_request("https://www.steamgifts.com")
-
-def main():
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(description="SteamGifts Autojoin Bot")
     parser.add_argument("--max-pages", type=int, default=5, help="Número máximo de páginas a buscar giveaways")
     parser.add_argument("--verbose", action="store_true", help="Ativar logs detalhados")
     parser.add_argument("--local", action="store_true", help="Usar cookies locais ao invés de Cloudflare")
     parser.add_argument("--all", action="store_true", help="Fetch all pages of giveaways (overrides --max-pages)")
-    args = parser.parse_args()
+    parser.add_argument("--concurrency", type=int, default=FETCH_CONCURRENCY, help="Number of pages fetched in parallel (1 = serial)")
+    parser.add_argument("--strategy", choices=planner.STRATEGIES, default="greedy", help="Giveaway selection: greedy (highest score first while points last) or knapsack (optimal use of points)")
+    parser.add_argument("--schedule", action="store_true", help="Plan joins over time with point regeneration: join just before giveaways end, spend early only points that would be lost at the 400p cap")
+    parser.add_argument("--objective", choices=list(planner.OBJECTIVES), default="probability", help="What the knapsack planner maximizes")
+    parser.add_argument("--bulk-state", action=argparse.BooleanOptionalAction, default=True, help="Detect joined giveaways from listing pages instead of one detail page per join")
+    parser.add_argument("--incremental", action="store_true", help="Merge the fetched listing into the catalog, writing only new or changed giveaways")
+    parser.add_argument("--stream", action="store_true", help="Start joining while pages are still being fetched (highest score first, greedy; ending soon joined at once)")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Log in on the asyncio core too and run everything in one event loop, like the Cloudflare Worker (cycles always run on the asyncio core)")
+    parser.add_argument("--accounts", action="store_true", help="Run every account in COOKIES (list) or cookies/accounts/*.json, sharing one catalog fetch")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the on-disk HTTP cache")
+    parser.add_argument("--daemon", action="store_true", help="Stay resident and run fetch/join cycles on a schedule")
+    parser.add_argument("--interval", type=int, default=DAEMON_INTERVAL, help="Seconds between cycles in --daemon mode")
+    parser.add_argument("--control-port", type=int, default=CONTROL_PORT, help="Port of the local control API in --daemon mode (0 disables it)")
+    parser.add_argument("--metrics-textfile", default=METRICS_TEXTFILE, help="Prometheus textfile written after each run ('' disables it)")
+    parser.add_argument("--report", default=RUN_REPORT_FILE, help="JSON run report written after each run ('' disables it)")
+    parser.add_argument("--import-owned", metavar="FILE", help="Import a Steam library export (GetOwnedGames JSON, list of app ids or one per line) into the owned games index and exit")
+    parser.add_argument("--lookup", metavar="ID", help="Print a giveaway from the local catalog and exit (no session, no network)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
 
     log_level = "DEBUG" if args.verbose else "INFO"
     if log_level == "DEBUG":
         setup_logger(log_level)
     else:
         setup_logger()
+
+    if args.lookup:
+        lookup(args.lookup)
+        return
+
+    if args.import_owned:
+        from src import owned_apps
+        owned_apps.import_library(args.import_owned)
+        return
+
+    import requests
+    from src import save_cookies, http_cache
+    from src.session_manager import init_session
+
+    http_cache.cache.enabled = http_cache.cache.enabled and not args.no_cache
         
     log.info("🚀 SteamGifts Autojoin iniciado")
     
     log.info(f"Max pages to fetch: {args.max_pages if not args.all else 'all'}")
     
     log.info("")
+
+    if args.accounts:
+        main_accounts(args)
+        return
+
+    if args.use_async:
+        asyncio.run(run_async(args))
+        return
     
     # Cookies e sessão
     log.info("🔍 Checking for cookies...")
@@ -41,10 +81,8 @@ def main():
         save_cookies.save_cookies_local()
 
     try:
-        if args.local:
-            init_session()
-        else:
-            init_session(local=False)
+        with metrics.span("session_init"):
+            init_session(local=args.local)
     except requests.exceptions.HTTPError as e:
         if e.response.status_code == 429:
             log.error("⚠️ Too many requests. Please wait a bit before running again.")
@@ -53,46 +91,380 @@ def main():
             raise
     
     log.info("")
-    
-    fsr_request("https://www.steamgifts.com")
-    
+
+    if args.daemon:
+        from src.daemon import Daemon
+        Daemon(
+            run_cycle=lambda: run_cycle(args),
+            interval=args.interval,
+            port=args.control_port,
+            on_error=lambda: init_session(local=args.local),
+        ).serve_forever()
+        return
+
+    run_cycle(args)
+
+async def main_async(argv=None, transport=None) -> dict:
+    """
+    Entry point of the asyncio core for callers that already run an event
+    loop (the Cloudflare Worker in worker.py).
+
+    Args:
+        argv (list[str], optional): CLI arguments (sys.argv by default).
+        transport (Transport, optional): HTTP transport (see src/async_core.py).
+
+    Returns:
+        dict: Metrics of the run.
+    """
+    args = parse_args(argv)
+    setup_logger("DEBUG" if args.verbose else "INFO")
+    return await run_async(args, transport)
+
+async def run_async(args, transport=None) -> dict:
+    """
+    Logs in and runs one cycle on the asyncio core (`--async`).
+
+    Args:
+        args: Parsed CLI arguments.
+        transport (Transport, optional): HTTP transport. Defaults to the default
+            account's requests session (HTTP cache and rate limiter included).
+
+    Returns:
+        dict: Metrics of the run ({} if the session could not be started).
+    """
+    import requests
+    import src.session_manager as sm
+    from src import async_core
+
+    for flag in ("daemon", "stream"):
+        if getattr(args, flag):
+            log.warning(f"--{flag} is ignored with --async")
+
+    state = sm.default_state
+    state.cookies = sm.get_cookies(local=args.local)
+    client = async_core.AsyncClient(transport or async_core.RequestsTransport(), state)
+    try:
+        with metrics.span("session_init"):
+            await async_core.init_session(client)
+    except requests.exceptions.HTTPError as e:
+        if e.response.status_code == 429:
+            log.error("⚠️ Too many requests. Please wait a bit before running again.")
+            return {}
+        raise
+    log.info("")
+    return await run_cycle_async(args, client)
+
+async def run_cycle_async(args, client) -> dict:
+    """
+    One fetch → select → join cycle on the event loop, with `client`'s account.
+
+    Returns:
+        dict: Metrics of the run.
+    """
     time_start = time.time()
-    
+    giveaways = await fetch_catalog_async(args, client)
+    result = await select_and_join_async(args, client)
+    return finish_cycle(args, time_start, giveaways, result)
+
+async def fetch_catalog_async(args, client):
+    """Fetches the catalog into the current store (`jm`) with `client`'s transport."""
+    from src import async_core
+
     max_pages = args.max_pages if not args.all else -1
-    # 2. Buscar giveaways
-    if max_pages:
-        giveaways = get_giveaways.fetch_giveaways(max_pages=max_pages)
+    with metrics.span("fetch"):
+        return await async_core.fetch_giveaways(client, max_pages=max_pages or 5, concurrency=args.concurrency, incremental=args.incremental)
+
+async def select_and_join_async(args, client) -> dict:
+    """
+    Selects and joins giveaways from the catalog in the current store (`jm`),
+    with `client`'s account.
+
+    Returns:
+        dict: {"selected", "joined", "points"} (+ "scheduled", "next_join_at" with --schedule).
+    """
+    from src import async_core, listing_state
+
+    confirmed = set()
+    if args.bulk_state:
+        # Estado joined/pontos a partir das páginas de listagem (evita um GET por giveaway)
+        with metrics.span("sort_filter"):
+            candidates = rank_candidates(args)
+        with metrics.span("listing_scan"):
+            scan = await async_core.scan_listing(client, (g.code for g in candidates))
+            points = await async_core.get_points(client)  # já atualizados pelas páginas da listagem
+            candidates, confirmed = listing_state.apply_listing_states(candidates, scan, store=jm, check_points=not args.schedule)
     else:
-        giveaways = get_giveaways.fetch_giveaways()
-    
-    best_giveaways = get_giveaways.sort_giveaways(giveaways_obj=giveaways, by=("points", "remaining_time"), max_points=current_points(), timeframe=None)
-    
-    # Remove expired giveaways
-    jm.cleanup_expired(time.time())
-    
+        points = await async_core.get_points(client)
+        with metrics.span("sort_filter"):
+            candidates = rank_candidates(args, points)
+    best_giveaways, result = prepare_joins(args, candidates, points)
+
     # 4. Entrar nos giveaways
-    join_giveaways.process_and_join_all(best_giveaways)
-    
+    with metrics.span("join"):
+        joined = await async_core.join_all(client, best_giveaways, points, confirmed)
+
+    return finish_joins(best_giveaways, joined, points, result)
+
+def local_client():
+    """Async client of the current account on its `requests` session (HTTP cache and rate limiter included)."""
+    import src.session_manager as sm
+    from src import async_core
+
+    return async_core.AsyncClient(async_core.RequestsTransport(), sm.current())
+
+def main_accounts(args):
+    """Logs in every account and runs multi-account cycles (once or as a daemon)."""
+    from src import accounts as acc
+
+    with metrics.span("session_init"):
+        accounts = acc.init_accounts(local=args.local)
+    if not accounts:
+        log.error("❌ No account could log in.")
+        return
+    if args.stream:
+        log.warning("--stream is ignored with --accounts (the catalog is fetched once, then every account joins)")
+    log.info("")
+
+    if args.daemon:
+        from src.daemon import Daemon
+        Daemon(
+            run_cycle=lambda: run_accounts_cycle(args, accounts),
+            interval=args.interval,
+            port=args.control_port,
+            on_error=lambda: acc.relogin(accounts),
+        ).serve_forever()
+        return
+
+    run_accounts_cycle(args, accounts)
+
+def fetch_catalog(args):
+    """Fetches the catalog into the current store (`jm`), see `fetch_catalog_async`."""
+    return asyncio.run(fetch_catalog_async(args, local_client()))
+
+def run_accounts_cycle(args, accounts) -> dict:
+    """
+    Runs one cycle for several accounts: the catalog is fetched once into the
+    shared store, then every account selects and joins in parallel with its
+    own session, points and joined flags.
+
+    Returns:
+        dict: Metrics of the run, with one entry per account in "accounts".
+    """
+    from src import accounts as acc, http_client, http_cache
+
+    time_start = time.time()
+
+    # O catálogo é público: uma só busca, pela sessão partilhada, para todas as contas
+    acc.share_clearance(accounts[0])
+    giveaways = fetch_catalog(args)
+    catalog = list(jm.get_giveaways().values())
+    with metrics.span("cleanup_expired"):
+        jm.cleanup_expired(time.time())
+
+    def _account_cycle(account) -> dict:
+        with metrics.span("account_sync"):
+            changed = acc.sync_catalog(account, catalog)
+        log.debug(f"Account '{account.name}': {changed} catalog records updated")
+        return select_and_join(args)
+
+    results = acc.run_accounts(accounts, _account_cycle)
+
+    log.info("")
+    time_elapsed = time.time() - time_start
+    for r in results:
+        if "error" in r:
+            log.info(f"👤 {r['account']}: failed ({r['error']}) in {r['duration']:.2f}s")
+        else:
+            log.info(f"👤 {r['account']}: joined {r['joined']}/{r['selected']} with {r['points']}p in {r['duration']:.2f}s")
+    log.info(f"Script running duration: {time_elapsed:.2f}s")
+    http_client.log_reuse_stats()
+    http_client.log_limiter_stats()
+    http_cache.log_summary()
+    log_phase_summary()
+
+    summary = {
+        "started_at": time_start,
+        "duration": time_elapsed,
+        "fetched": giveaways.results_count,
+        "selected": sum(r.get("selected", 0) for r in results),
+        "joined": sum(r.get("joined", 0) for r in results),
+        "accounts": results,
+    }
+    export_metrics(args, summary)
+    return summary
+
+def run_cycle(args) -> dict:
+    """
+    Runs one fetch → select → join cycle with the already initialized session.
+
+    Returns:
+        dict: Metrics of the run.
+    """
+    if args.stream:
+        max_pages = args.max_pages if not args.all else -1
+        return run_stream_cycle(args, max_pages, time.time())
+
+    # fetch → select → join no core asyncio, sobre a sessão requests da conta
+    return asyncio.run(run_cycle_async(args, local_client()))
+
+def finish_cycle(args, time_start: float, giveaways, result: dict) -> dict:
+    """Logs the end of a cycle and exports its metrics."""
+    from src import http_client, http_cache
+
     log.info("")
 
-    time_end = time.time()
-    time_elapsed = time_end - time_start
+    time_elapsed = time.time() - time_start
     log.info(f"Script running duration: {time_elapsed:.2f}s")
-    log.info(f"Time per giveaway: {time_elapsed/len(best_giveaways)}")
+    http_client.log_reuse_stats()
+    http_client.log_limiter_stats()
+    http_cache.log_summary()
+    if result["joined"]:
+        log.info(f"Time per joined giveaway: {time_elapsed / result['joined']:.2f}s")
+    log_phase_summary()
+
+    summary = {
+        "started_at": time_start,
+        "duration": time_elapsed,
+        "fetched": giveaways.results_count,
+        **result,
+    }
+    export_metrics(args, summary)
+    return summary
+
+def select_and_join(args) -> dict:
+    """Selects and joins with the current account (see `select_and_join_async`)."""
+    return asyncio.run(select_and_join_async(args, local_client()))
+
+# Passos de select_and_join_async sem pedidos HTTP
+
+def points_limit(args, points: int) -> int:
+    """Most a single giveaway may cost: with --schedule points regenerate up to the cap."""
+    return POINTS_CAP if args.schedule else points
+
+def rank_candidates(args, points: int | None = None) -> list:
+    """
+    Candidates of the current store ranked by score. With `points`, the ones
+    costing more than `points_limit` are dropped in the store (SQL on sqlite).
+    """
+    from src import get_giveaways
+
+    max_points = points_limit(args, points) if points is not None else None
+    return get_giveaways.sort_giveaways(giveaways_obj=None, by=("score",), reverse=True, max_points=max_points, timeframe=None)
+
+def prepare_joins(args, candidates: list, points: int) -> tuple[list, dict]:
+    """Plans the joins (see `plan_selection`) and drops expired giveaways from the store."""
+    candidates = [g for g in candidates if g.points <= points_limit(args, points)]
+    with metrics.span("plan"):
+        best_giveaways, result = plan_selection(args, candidates, points)
+    
+    # Remove expired giveaways
+    with metrics.span("cleanup_expired"):
+        jm.cleanup_expired(time.time())
+    return best_giveaways, result
+
+def finish_joins(best_giveaways: list, joined: int, points: int, result: dict) -> dict:
+    """Folds the journal into the snapshot and builds the selection result."""
+    # Consolidar o journal no snapshot
+    with metrics.span("compact"):
+        jm.compact()
+
+    return {"selected": len(best_giveaways), "joined": joined, "points": points, **result}
+
+
+def plan_selection(args, candidates: list, points: int) -> tuple[list, dict]:
+    """
+    Picks the giveaways to join now from the ranked candidates (--strategy / --schedule).
+
+    Returns:
+        tuple: (giveaways to join, extra result fields: "scheduled", "next_join_at" with --schedule)
+    """
+    from src import accounts as acc
+
+    if not args.schedule:
+        return planner.select_giveaways(candidates, budget=points, objective=args.objective, strategy=args.strategy), {}
+    plan = planner.schedule_joins(candidates, points, horizon=max(SCHEDULE_HORIZON, args.interval), objective=args.objective)
+    if JOIN_PLAN_FILE:
+        plan.save(acc.data_path(JOIN_PLAN_FILE))
+    # o que não pode esperar pela próxima execução (daemon/cron a cada --interval)
+    next_run = time.time() + args.interval
+    # o plano conta com pontos que só regeneram durante o intervalo: agora só o que o saldo paga
+    due = plan.due(next_run, budget=points)
+    taken = {id(j) for j in due}
+    # os que não couberam passam para a próxima execução
+    later = [max(j.at, next_run) for j in plan.joins if id(j) not in taken]
+    return [j.giveaway for j in due], {"scheduled": len(plan.joins), "next_join_at": min(later, default=None)}
+
+
+def run_stream_cycle(args, max_pages: int, time_start: float) -> dict:
+    """
+    Runs one cycle with the streaming pipeline: joins start while pages are
+    still being fetched (see src/streaming.py).
+
+    Returns:
+        dict: Metrics of the run.
+    """
+    from src import streaming, http_client, http_cache
+
+    if args.strategy != "greedy":
+        log.warning(f"--strategy {args.strategy} is ignored with --stream (giveaways are joined highest score first)")
+
+    with metrics.span("stream"):
+        result = streaming.stream_and_join(max_pages=max_pages, concurrency=args.concurrency)
+
+    with metrics.span("cleanup_expired"):
+        jm.cleanup_expired(time.time())
+    with metrics.span("compact"):
+        jm.compact()
+
+    log.info("")
+    time_elapsed = time.time() - time_start
+    log.info(f"Script running duration: {time_elapsed:.2f}s")
+    http_client.log_reuse_stats()
+    http_client.log_limiter_stats()
+    http_cache.log_summary()
+    if result.joined:
+        log.info(f"Time per joined giveaway: {time_elapsed / result.joined:.2f}s")
+    log_phase_summary()
+
+    summary = {
+        "started_at": time_start,
+        "duration": time_elapsed,
+        "fetched": result.catalog.results_count,
+        "selected": result.candidates,
+        "joined": result.joined,
+        "points": result.points,
+        "first_join_s": result.first_join_s,
+    }
+    export_metrics(args, summary)
+    return summary
+
+def log_phase_summary():
+    report = metrics.run_report()
+    for name, span in report["spans"].items():
+        log.info(f"⏱️ {name}: {span['sum']:.2f}s ({span['count']}x)")
+    for endpoint, stats in report["http"].items():
+        log.info(f"🌐 {endpoint}: {stats['count']} requests, avg {stats['avg'] * 1000:.0f}ms, {stats['bytes'] / 1024:.0f} KiB, status {stats['status']}")
+    for endpoint, wait in report["ratelimit_wait"].items():
+        if wait["sum"] >= 0.01:
+            log.info(f"🚦 {endpoint}: waited {wait['sum']:.2f}s for the rate limiter (max {wait['max']:.2f}s)")
+
+def export_metrics(args, summary: dict):
+    """Writes the Prometheus textfile and the JSON run report."""
+    try:
+        if args.metrics_textfile:
+            metrics.write_textfile(args.metrics_textfile)
+        if args.report:
+            metrics.write_report(args.report, extra={"summary": summary})
+    except OSError as e:
+        log.warning(f"Could not write metrics: {e}")
     
-def current_points() -> int:
-    resp = session.get(url)
-    if resp.status_code != 200:
-        log.error(f"Failed to fetch current points: {resp.status_code} - {resp.text}")
-        return 0
-    log.debug(f"Response from {BASE_URL}: {resp.status_code} - {resp.text[:100]}...")
-    log.debug("Fetching current points...")
-    match = re.search(r'<span class="nav__points">(\d+)</span>', resp.text)
-    if match:
-        pontos = int(match.group(1))
-        return pontos
-    log.warning("Could not find points in the response.")
-    return 0
+def lookup(giveaway_id: str):
+    """Prints a giveaway from the local catalog."""
+    giveaway = jm.get_giveaway(giveaway_id)
+    if giveaway is None:
+        log.warning(f"❗ Giveaway with ID {giveaway_id} not found.")
+        return
+    print(json.dumps(giveaway.to_dict(), indent=4, ensure_ascii=False))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,205 @@
+# accounts.py
+"""
+Several SteamGifts accounts in one process (--accounts).
+
+Each account has its own `SessionState` (cookies, HTTP session, XSRF token,
+FlareSolverr browser sessions), a concurrency cap of ACCOUNT_CONCURRENCY
+requests per endpoint class on top of the process-wide rate limiter, and
+its own catalog store under
+data/accounts/<name>/ with its joined/owned flags. The public catalog is
+fetched once per cycle into the shared store and copied into every
+account's store, so catalog traffic does not grow with the number of
+accounts; only planning and joining run per account.
+"""
+import atexit
+import contextvars
+import dataclasses
+import glob
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import src.session_manager as sm
+from src import http_client
+from src.config import (
+    ACCOUNT_CONCURRENCY,
+    ACCOUNTS_DATA_DIR,
+    ACCOUNTS_DIR,
+    ACCOUNTS_PARALLEL,
+    COOKIES_PATH,
+    SESSION_CACHE_FILE,
+)
+from src import rate_limiter
+from utils.backend import StorageBackend
+from utils.logger import log
+from utils.storage import open_storage, use_store
+
+
+@dataclass
+class Account:
+    name: str
+    state: sm.SessionState
+    store: StorageBackend
+    limiter: rate_limiter.AccountLimiter
+
+
+def load_cookie_sets(local: bool = False) -> dict[str, dict]:
+    """
+    Reads the cookies of every account.
+
+    `COOKIES` may hold a single cookie dict, a list of cookie dicts or a list
+    of {"name": ..., "cookies": {...}}. With `local` (or without `COOKIES`)
+    every *.json file in ACCOUNTS_DIR is one account named after the file,
+    falling back to the single cookies file.
+
+    Returns:
+        dict: {account name: cookies}.
+    """
+    cookies_env = os.environ.get("COOKIES")
+    if cookies_env and not local:
+        data = json.loads(cookies_env)
+        if isinstance(data, dict):
+            return {"account1": data}
+        sets = {}
+        for i, item in enumerate(data, 1):
+            if "cookies" in item:
+                sets[item.get("name") or f"account{i}"] = item["cookies"]
+            else:
+                sets[f"account{i}"] = item
+        return sets
+
+    files = sorted(glob.glob(os.path.join(ACCOUNTS_DIR, "*.json")))
+    if not files and os.path.exists(COOKIES_PATH):
+        files = [COOKIES_PATH]
+    sets = {}
+    for path in files:
+        with open(path, "r", encoding="utf-8") as f:
+            sets[os.path.splitext(os.path.basename(path))[0]] = json.load(f)
+    if not sets:
+        raise RuntimeError(f"No accounts found. Set COOKIES to a list or add cookie files to {ACCOUNTS_DIR}.")
+    return sets
+
+
+def account_dir(name: str) -> str:
+    """Data directory of an account (its store, join plan...)."""
+    # o nome vem de ficheiros/env: usar só caracteres seguros no caminho
+    return os.path.join(ACCOUNTS_DATA_DIR, re.sub(r"[^\w.-]", "_", name))
+
+
+def data_path(default: str) -> str:
+    """
+    Per-account version of a data file: `default` itself for the single
+    account mode, the same file name under the account's directory otherwise.
+    """
+    state = sm.current()
+    if state is sm.default_state:
+        return default
+    return os.path.join(account_dir(state.name), os.path.basename(default))
+
+
+def make_account(name: str, cookies: dict) -> Account:
+    """Builds an account with its own session, concurrency cap and store (not logged in yet)."""
+    # taxas e backoff continuam partilhados pelo processo (mesmo IP); por conta só a concorrência
+    limiter = rate_limiter.AccountLimiter(rate_limiter.limiter, ACCOUNT_CONCURRENCY)
+    state = sm.SessionState(
+        name,
+        cookies=cookies,
+        session=http_client.new_session(limiter=limiter),
+        fsr=sm.FlareSolverrClient(),
+        cache_path=os.path.join(account_dir(name), os.path.basename(SESSION_CACHE_FILE)) if SESSION_CACHE_FILE else None,
+    )
+    atexit.register(state.fsr.destroy)
+    return Account(name, state, open_storage(directory=account_dir(name)), limiter)
+
+
+def init_accounts(local: bool = False) -> list[Account]:
+    """
+    Loads and logs in every account. Accounts whose login fails are skipped.
+
+    Returns:
+        list[Account]: Logged in accounts.
+    """
+    accounts = []
+    for name, cookies in load_cookie_sets(local).items():
+        account = make_account(name, cookies)
+        try:
+            sm.init_state(account.state)
+        except Exception as e:
+            log.error(f"❌ Account '{name}': login failed ({e}). Skipping.")
+            continue
+        accounts.append(account)
+    log.info(f"👥 {len(accounts)} account(s) ready")
+    return accounts
+
+
+def relogin(accounts: list[Account]):
+    """Logs the accounts in again (daemon recovery after a failed cycle)."""
+    for account in accounts:
+        try:
+            sm.init_state(account.state)
+        except Exception as e:
+            log.error(f"❌ Account '{account.name}': login failed ({e}).")
+
+
+@contextmanager
+def use(account: Account):
+    """Runs the block as `account`: HTTP session, cookies, XSRF token and `jm` follow it."""
+    with sm.use(account.state), use_store(account.store):
+        yield account
+
+
+def share_clearance(account: Account):
+    """
+    Copies an account's Cloudflare clearance (the `cf_clearance` cookie and
+    the user agent it was issued for) into the shared session, which fetches
+    the public catalog for every account. The login cookies (PHPSESSID...)
+    stay with the account.
+    """
+    shared = sm.default_state.session
+    for cookie in account.state.session.cookies:
+        if cookie.name == "cf_clearance":
+            shared.cookies.set_cookie(cookie)
+    if "User-Agent" in account.state.session.headers:
+        shared.headers["User-Agent"] = account.state.session.headers["User-Agent"]
+
+
+def sync_catalog(account: Account, catalog) -> int:
+    """
+    Copies the shared catalog into the account's store, keeping the account's
+    joined/owned flags (the merge never clears them).
+
+    Returns:
+        int: Number of records added or changed.
+    """
+    # cópias: os objetos do catálogo partilhado não podem herdar flags da conta
+    fresh = [dataclasses.replace(g, joined=False, owned=False) for g in catalog]
+    return account.store.merge_giveaways(fresh)
+
+
+def run_accounts(accounts: list[Account], fn, parallel: int = ACCOUNTS_PARALLEL) -> list[dict]:
+    """
+    Calls `fn(account)` once per account, in parallel, each inside `use(account)`.
+
+    An error in one account is logged and reported without stopping the others.
+
+    Returns:
+        list[dict]: Per account, {"account", "duration"} plus `fn`'s dict or "error".
+    """
+    def _run(account: Account) -> dict:
+        start = time.time()
+        with use(account):
+            try:
+                result = {"account": account.name, **fn(account)}
+            except Exception as e:
+                log.error(f"❌ Account '{account.name}' failed: {e}")
+                result = {"account": account.name, "error": str(e)}
+        result["duration"] = time.time() - start
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, parallel), thread_name_prefix="account") as pool:
+        # cada conta corre numa cópia do contexto de quem chamou
+        return list(pool.map(lambda a: contextvars.copy_context().run(_run, a), accounts))
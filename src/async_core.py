@@ -0,0 +1,341 @@
+# async_core.py
+"""
+Asyncio core: session init, listing fetch, listing scan, detail check, join
+and FlareSolverr calls as coroutines over a pluggable transport.
+
+This is the engine of every fetch → select → join cycle: the CLI runs it
+with `asyncio.run` on the account's `requests` session, the Cloudflare
+Worker (`worker.py`) on the runtime's `fetch()`. Only `--stream` keeps its
+threaded pipeline (src/streaming.py).
+
+A transport only moves bytes (`request()` → `TransportResponse`); the
+account's cookies and user agent live in its `SessionState.session`
+whatever the transport. Parsing, decisions (login and session cache,
+points, listing scan, detail check, join budget) and bookkeeping are
+shared helpers of the other modules, so this module only holds the awaits.
+
+- `FetchTransport`: the Workers runtime `fetch()` (Pyodide). Fully
+  non-blocking, rate limiter included (`RateLimiter.acquire_async`).
+- `RequestsTransport`: the account's pooled `requests` session run in the
+  loop's executor, so the HTTP cache, the rate limiter and the request
+  metrics apply. The blocking call runs in a worker thread; `concurrency`
+  page tasks means as many executor threads.
+
+Page fetches run as `concurrency` tasks on one event loop; joins stay
+sequential because every entry spends from the same points budget.
+"""
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Protocol
+from urllib.parse import urlencode, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import src.session_manager as sm
+from src import get_giveaways, http_client, join_giveaways, listing_state, rate_limiter
+from src.config import BASE_URL, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, LISTING_MAX_PAGES, RATE_LIMIT_RETRIES
+from src.models import Giveaway, Giveaways
+from utils import metrics
+from utils.logger import log
+
+SG_HOST = urlsplit(BASE_URL).hostname
+
+
+@dataclass
+class TransportResponse:
+    status_code: int
+    text: str
+    url: str
+    headers: CaseInsensitiveDict = field(default_factory=CaseInsensitiveDict)
+    elapsed: float = 0.0  # segundos
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+
+class Transport(Protocol):
+    # True se as respostas já passaram pelos hooks da sessão requests (estado e métricas)
+    session_hooks: bool
+
+    async def request(self, session: requests.Session, method: str, url: str, *, params: dict | None = None,
+                      data: dict | None = None, json_body: dict | None = None, timeout: float | None = None) -> TransportResponse:
+        """Sends a request with the account's cookies and headers (kept in `session` by every transport)."""
+        ...
+
+
+class RequestsTransport:
+    """
+    Local transport: the account's `requests` session (pool, HTTP cache, rate
+    limiter, response hooks) called from the event loop's executor.
+    """
+    session_hooks = True
+
+    async def request(self, session, method, url, *, params=None, data=None, json_body=None, timeout=None) -> TransportResponse:
+        timeout = timeout or (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+        # to_thread copia o contexto: a thread vê a conta (sm.use) de quem chamou
+        resp = await asyncio.to_thread(session.request, method, url, params=params, data=data, json=json_body, timeout=timeout)
+        return TransportResponse(resp.status_code, resp.text, resp.url, resp.headers, resp.elapsed.total_seconds())
+
+
+class FetchTransport:
+    """
+    Transport on the Cloudflare Workers `fetch()` (Python Workers / Pyodide).
+
+    The runtime has no cookie jar: the account's session only serves as one
+    (and for its User-Agent). Its cookies go out in a `Cookie` header, to the
+    SteamGifts host only, and every `Set-Cookie` from it is stored back.
+
+    Requests wait for the rate limiter like the `requests` adapter does
+    (`acquire_async`, without blocking the loop), and a 429 is retried once
+    the endpoint class is let through again.
+
+    Args:
+        limiter (RateLimiter, optional): Rate limiter. None disables rate limiting.
+    """
+    session_hooks = False
+
+    def __init__(self, limiter: rate_limiter.RateLimiter | None = rate_limiter.limiter):
+        self.limiter = limiter
+
+    async def request(self, session, method, url, *, params=None, data=None, json_body=None, timeout=None) -> TransportResponse:
+        if params:
+            url = f"{url}{'&' if '?' in url else '?'}{urlencode(params)}"
+        headers = {k: v for k, v in session.headers.items() if k == "User-Agent"}
+        sg_host = urlsplit(url).hostname == SG_HOST
+        if sg_host and session.cookies:  # os cookies da conta só vão para o SteamGifts
+            headers["Cookie"] = "; ".join(f"{c.name}={c.value}" for c in session.cookies)
+        body = None
+        if data is not None:
+            body = urlencode(data)
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        elif json_body is not None:
+            body = json.dumps(json_body)
+            headers["Content-Type"] = "application/json"
+
+        start = time.perf_counter()
+        status, text, final_url, resp_headers, set_cookies = await self._limited_fetch(method, url, headers, body, timeout or HTTP_READ_TIMEOUT)
+        if sg_host:
+            for cookie in set_cookies:
+                name, _, value = cookie.split(";", 1)[0].partition("=")
+                session.cookies.set(name.strip(), value.strip(), domain=SG_HOST)
+        return TransportResponse(status, text, final_url or url, CaseInsensitiveDict(resp_headers), time.perf_counter() - start)
+
+    async def _limited_fetch(self, method: str, url: str, headers: dict, body: str | None, timeout: float) -> tuple:
+        if self.limiter is None:
+            return await self.fetch(method, url, headers, body, timeout)
+
+        name = http_client.endpoint_class(url)
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            slot = await self.limiter.acquire_async(name)
+            status, retry_after, throttled = None, None, False
+            try:
+                reply = await self.fetch(method, url, headers, body, timeout)
+                status, resp_headers = reply[0], CaseInsensitiveDict(reply[3])
+                retry_after = rate_limiter.parse_retry_after(resp_headers.get("Retry-After"))
+                throttled = http_client.is_throttled(status, resp_headers)
+            finally:
+                if slot is not None:
+                    slot.release(status, retry_after, throttled=throttled)
+            if status != 429 or slot is None or attempt == RATE_LIMIT_RETRIES:
+                return reply
+            log.debug(f"Retrying {method} {url} after 429 (attempt {attempt + 1}/{RATE_LIMIT_RETRIES})")
+        return reply
+
+    async def fetch(self, method: str, url: str, headers: dict, body: str | None, timeout: float) -> tuple:
+        """
+        The runtime call itself.
+
+        Returns:
+            tuple: (status, text, final url, headers dict, list of Set-Cookie values)
+        """
+        from js import Object, fetch  # só existe no runtime dos Workers
+        from pyodide.ffi import to_js
+
+        init = {"method": method, "headers": headers, "redirect": "follow"}
+        if body is not None:
+            init["body"] = body
+        resp = await asyncio.wait_for(fetch(url, to_js(init, dict_converter=Object.fromEntries)), timeout)
+        text = await resp.text()
+        get_set_cookie = getattr(resp.headers, "getSetCookie", None)
+        set_cookies = list(get_set_cookie()) if get_set_cookie else []
+        return resp.status, text, resp.url, {key: value for key, value in resp.headers.entries()}, set_cookies
+
+
+@dataclass
+class AsyncClient:
+    """One account on the async core: its transport and its session state (cookies, XSRF, points)."""
+    transport: Transport
+    state: sm.SessionState = field(default_factory=lambda: sm.default_state)
+    fsr_urls: list[str] = field(default_factory=lambda: list(sm.FLARESOLVERR_URLS))
+
+
+async def request(client: AsyncClient, method: str, url: str, **kwargs) -> TransportResponse:
+    """Sends a request through the client's transport and updates its session state."""
+    with sm.use(client.state):
+        resp = await client.transport.request(client.state.session, method, url, **kwargs)
+    if not client.transport.session_hooks:
+        metrics.observe_request(http_client.endpoint_class(resp.url), resp.status_code, resp.elapsed, len(resp.text))
+        client.state.observe_response(resp)
+        if resp.status_code == 429:
+            log.warning(f"⚠️ 429 Too Many Requests from {resp.url}")
+    return resp
+
+
+async def fsr_request(client: AsyncClient, url: str) -> str:
+    """
+    Async `session_manager.fsr_request`: solves `url` through FlareSolverr
+    (first endpoint that answers) and keeps the clearance in the session.
+
+    Returns:
+        str: HTML of the solved page.
+    """
+    state = client.state
+    last_error = None
+    for endpoint in client.fsr_urls:
+        try:
+            with metrics.span("flaresolverr_solve"):
+                resp = await request(client, "POST", endpoint, json_body=sm.fsr_payload(url, state.cookies),
+                                     timeout=sm.FSR_MAX_TIMEOUT / 1000 + 10)
+            solution = sm.fsr_reply(resp)["solution"]
+        except (requests.RequestException, asyncio.TimeoutError, KeyError, ValueError) as e:
+            last_error = e
+            log.warning(f"FlareSolverr {endpoint} failed: {e}")
+            continue
+        sm.harvest_clearance(solution, state.session)
+        return solution["response"]
+    raise sm.FlareSolverrUnavailable(f"No FlareSolverr endpoint available (last error: {last_error})")
+
+
+async def init_session(client: AsyncClient):
+    """Async `session_manager.init_state`: saved session or direct login, FlareSolverr only if challenged."""
+    state = client.state
+    cached = sm.load_session_cache(state)
+    sm.set_session_cookies(state.session, *sm.login_cookies(state, cached))
+    page = sm.check_login(state, await request(client, "GET", BASE_URL), cached)
+    if page is None:
+        if cached:
+            # a sessão guardada já não vale: recomeçar dos cookies de origem
+            state.session.cookies.clear()
+            sm.set_session_cookies(state.session, *sm.login_cookies(state))
+        page = sm.fsr_login(state, await fsr_request(client, BASE_URL))
+    sm.finish_login(state, page)
+
+
+async def get_points(client: AsyncClient) -> int:
+    """Async `SessionState.get_points`: cached points, homepage only when stale."""
+    cached = client.state.cached_points()
+    if cached is not None:
+        return cached
+    return client.state.points_from_homepage(await request(client, "GET", BASE_URL))
+
+
+async def fetch_page(client: AsyncClient, page: int, max_pages: int) -> list[dict]:
+    """Async `get_giveaways.fetch_giveaway_page`."""
+    log.info(f"🔍 Fetching giveaways from page {page}/{max_pages}...")
+    resp = await request(client, "GET", BASE_URL, params={**get_giveaways.PARAMS, "page": page})
+    return get_giveaways.read_giveaway_page(resp, page)
+
+
+async def fetch_giveaways(client: AsyncClient, max_pages: int = 5, concurrency: int = 4, incremental: bool = False) -> Giveaways:
+    """
+    Fetches listing pages with `concurrency` tasks on the event loop and writes the catalog.
+
+    Args:
+        client (AsyncClient): Account whose transport is used.
+        max_pages (int): Number of pages to fetch, -1 for all pages.
+        concurrency (int): Pages in flight at the same time.
+        incremental (bool): Merge into the store instead of replacing it
+            (see `get_giveaways.sync_giveaways`).
+
+    Returns:
+        Giveaways: The written catalog (the fetched giveaways if `incremental`).
+    """
+    results: dict[int, list[dict]] = {}
+    last_page = max_pages if max_pages != -1 else None
+    next_page = 1
+
+    async def worker():
+        nonlocal next_page, last_page
+        # um só event loop: ler e avançar next_page entre awaits não precisa de lock
+        while last_page is None or next_page <= last_page:
+            page, next_page = next_page, next_page + 1
+            raw = await fetch_page(client, page, max_pages)
+            results[page] = raw
+            # página curta = última página (só relevante para --all)
+            if max_pages == -1 and len(raw) < get_giveaways.PAGE_SIZE and (last_page is None or page < last_page):
+                last_page = page
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    pages = [results[p] for p in sorted(results) if last_page is None or p <= last_page]
+    if incremental:
+        return get_giveaways.merge_giveaways(pages)
+    return get_giveaways.store_giveaways(pages)
+
+
+async def scan_listing(client: AsyncClient, codes: Iterable[str], max_pages: int = LISTING_MAX_PAGES) -> listing_state.ListingScan:
+    """Fetches listing pages until every wanted code was seen or max_pages is reached (see `listing_state.ListingScan`)."""
+    scan = listing_state.ListingScan(wanted=set(codes))
+    for page in range(1, max_pages + 1):
+        if not scan.wanted:
+            break
+        resp = await request(client, "GET", listing_state.LISTING_URL, params={"page": page})
+        if not scan.add_page(page, resp):
+            break
+    scan.log_summary()
+    return scan
+
+
+async def is_joinable(client: AsyncClient, giveaway: Giveaway, confirmed: bool = False) -> bool:
+    """Async `join_giveaways.is_joinable`."""
+    known = join_giveaways.known_joinable(giveaway, confirmed)
+    if known is not None:
+        return known
+    with metrics.span("join_detail_check"):
+        resp = await request(client, "GET", giveaway.link)
+    with sm.use(client.state):
+        return join_giveaways.apply_detail_page(giveaway, resp.text)
+
+
+async def join_giveaway(client: AsyncClient, giveaway: Giveaway, confirmed: bool = False) -> bool:
+    """Async `join_giveaways.join_giveaway`."""
+    if not await is_joinable(client, giveaway, confirmed=confirmed):
+        log.warning(f"Giveaway {giveaway.short()} already joined or owned. Skipping.")
+        return False
+    with sm.use(client.state):
+        payload = join_giveaways.join_payload(giveaway)
+    with metrics.span("join_post"):
+        resp = await request(client, "POST", f"{BASE_URL}/ajax.php", data=payload)
+    with sm.use(client.state):
+        return join_giveaways.read_join_reply(giveaway, resp)
+
+
+async def join_all(client: AsyncClient, giveaways: list[Giveaway], points: int, confirmed: set[str] | None = None) -> int:
+    """
+    Async `join_giveaways.process_and_join_all`: joins in order within the points budget.
+
+    Returns:
+        int: Number of giveaways joined.
+    """
+    confirmed = confirmed or set()
+    budget = join_giveaways.JoinBudget(client.state, points)
+    budget.start(giveaways)
+    for g in giveaways:
+        allowed = budget.allows(g)
+        if allowed is None:
+            break
+        if not allowed:
+            continue
+        if budget.record(g, await join_giveaway(client, g, confirmed=g.code in confirmed)):
+            budget.points = await get_points(client)  # join recusado por falta de pontos
+    return budget.finish(giveaways)
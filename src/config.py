@@ -7,9 +7,84 @@ COOKIES_DIR = os.path.join(BASE_DIR, "cookies")
 COOKIES_FILE = "steamgifts.json"
 COOKIES_PATH = os.path.join(COOKIES_DIR, COOKIES_FILE)
 GECKODRIVER_PATH = os.path.join(BIN_DIR, "geckodriver.exe")
-BASE_URL = "https://www.steamgifts.com"
+BASE_URL = os.environ.get("SG_BASE_URL", "https://www.steamgifts.com")  # override usado pelos benchmarks offline
 FIREFOX_PATH = r"C:\Program Files\Mozilla Firefox\firefox.exe"  # <-- ajustar se necessário
-GIVEAWAYS_FILE = os.path.join(BASE_DIR, "data", "giveaways.json")
 TESTE = "asdas"
-DATA_DIR = os.path.join(BASE_DIR, "data")
+DATA_DIR = os.environ.get("SG_DATA_DIR", os.path.join(BASE_DIR, "data"))
 DATA_FILE = os.path.join(DATA_DIR, "giveaways.json")
+GIVEAWAYS_FILE = DATA_FILE
+
+FETCH_CONCURRENCY = int(os.environ.get("FETCH_CONCURRENCY", "4"))  # páginas em paralelo no fetch
+
+# HTTP client (pool partilhado por todos os módulos)
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", "30"))
+HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", "3"))
+HTTP_BACKOFF = float(os.environ.get("HTTP_BACKOFF", "0.5"))
+HTTP_POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS", "4"))  # nº de hosts em cache
+HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", "16"))  # conexões keep-alive por host
+
+# Rate limiter partilhado (src/rate_limiter.py): pedidos/s e concorrência por classe de endpoint.
+# Override: RATE_LIMITS="ajax=2/1,detail=4" (classe=rate[/concorrência]); RATE_LIMIT=0 desliga.
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT", "1") not in ("0", "false", "no")
+RATE_LIMIT_RETRIES = int(os.environ.get("RATE_LIMIT_RETRIES", "3"))  # repetições de um pedido com 429
+RATE_LIMITS = {
+    "default": (5.0, 4),
+    "listing_json": (5.0, 4),
+    "listing_html": (5.0, 4),
+    "detail": (5.0, 4),
+    "ajax": (4.0, 2),
+    "homepage": (2.0, 2),
+    "flaresolverr": (0.0, 2),  # sem limite de rate, o browser é o gargalo
+}
+for _item in filter(None, (i.strip() for i in os.environ.get("RATE_LIMITS", "").split(","))):
+    _name, _, _value = _item.partition("=")
+    _rate, _, _concurrency = _value.partition("/")
+    RATE_LIMITS[_name.strip()] = (float(_rate), int(_concurrency) if _concurrency else RATE_LIMITS.get(_name.strip(), RATE_LIMITS["default"])[1])
+
+JOURNAL_COMPACT_EVERY = int(os.environ.get("JOURNAL_COMPACT_EVERY", "200"))  # registos no journal até compactar
+
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "json")  # "json", "sqlite" ou "memory"
+SQLITE_FILE = os.path.join(DATA_DIR, "giveaways.db")
+
+STREAM_BUFFER = int(os.environ.get("STREAM_BUFFER", "200"))  # candidatos entre o fetch e o join em --stream
+STREAM_URGENT = int(os.environ.get("STREAM_URGENT", "900"))  # segundos: candidatos a acabar são juntados logo
+
+# Agendamento das entradas (--schedule, planner.schedule_joins)
+POINTS_CAP = 400  # máximo de pontos no SteamGifts; o que regenera acima disto perde-se
+POINTS_PER_HOUR = float(os.environ.get("POINTS_PER_HOUR", "24"))  # regeneração aproximada
+JOIN_MARGIN = int(os.environ.get("JOIN_MARGIN", "600"))  # segundos antes do fim em que se entra
+SCHEDULE_HORIZON = int(os.environ.get("SCHEDULE_HORIZON", "86400"))  # segundos simulados à frente
+JOIN_PLAN_FILE = os.environ.get("JOIN_PLAN_FILE", os.path.join(DATA_DIR, "join_plan.json"))
+
+# Cache dos pontos na sessão (session_manager.SessionState): páginas e respostas ajax
+# atualizam-nos; a homepage só é pedida quando são mais velhos do que isto
+POINTS_MAX_AGE = int(os.environ.get("POINTS_MAX_AGE", "300"))  # segundos
+
+# Sessão guardada entre execuções (cookies com cf_clearance/PHPSESSID, user agent, XSRF):
+# a próxima execução valida-a com um pedido e só usa o FlareSolverr se falhar ("" desliga)
+SESSION_CACHE_FILE = os.environ.get("SESSION_CACHE_FILE", os.path.join(DATA_DIR, "session.json"))
+
+OWNED_APPS_FILE = os.environ.get("OWNED_APPS_FILE", os.path.join(DATA_DIR, "owned_apps.json"))  # jogos que já temos
+
+# Multi-conta (--accounts, src/accounts.py)
+ACCOUNTS_DIR = os.environ.get("ACCOUNTS_DIR", os.path.join(COOKIES_DIR, "accounts"))  # um ficheiro de cookies por conta
+ACCOUNTS_DATA_DIR = os.path.join(DATA_DIR, "accounts")  # estado joined/owned de cada conta
+ACCOUNTS_PARALLEL = int(os.environ.get("ACCOUNTS_PARALLEL", "4"))  # contas a planear/juntar ao mesmo tempo
+ACCOUNT_CONCURRENCY = int(os.environ.get("ACCOUNT_CONCURRENCY", "2"))  # pedidos em voo por conta e endpoint
+
+LISTING_MAX_PAGES = int(os.environ.get("LISTING_MAX_PAGES", "10"))  # páginas HTML lidas para o estado em bulk
+
+# Cache HTTP em disco (src/http_cache.py)
+HTTP_CACHE_ENABLED = os.environ.get("HTTP_CACHE", "1") not in ("0", "false", "no")
+HTTP_CACHE_DIR = os.environ.get("HTTP_CACHE_DIR", os.path.join(DATA_DIR, "http_cache"))
+HTTP_CACHE_MAX_BYTES = int(os.environ.get("HTTP_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Modo daemon (--daemon)
+DAEMON_INTERVAL = int(os.environ.get("DAEMON_INTERVAL", "7200"))  # segundos entre ciclos
+CONTROL_HOST = os.environ.get("CONTROL_HOST", "127.0.0.1")
+CONTROL_PORT = int(os.environ.get("CONTROL_PORT", "8765"))
+
+# Métricas (utils/metrics.py)
+METRICS_TEXTFILE = os.environ.get("METRICS_TEXTFILE", os.path.join(DATA_DIR, "metrics.prom"))
+RUN_REPORT_FILE = os.environ.get("RUN_REPORT_FILE", os.path.join(DATA_DIR, "run_report.json"))
@@ -0,0 +1,179 @@
+# daemon.py
+"""
+Long-running mode (`main.py --daemon`).
+
+Keeps the process resident so the session (cookies, XSRF token), the
+catalog store and the HTTP connection pool stay warm between cycles. Cycles
+run every `interval` seconds and can be triggered early through a small
+local control API:
+
+    GET  /health   liveness
+    GET  /status   daemon state and last run
+    GET  /metrics  Prometheus metrics of the process
+    GET  /report   JSON report of the last run
+    POST /run      trigger a cycle now
+"""
+import json
+import threading
+import time
+import traceback
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+from src.config import CONTROL_HOST, CONTROL_PORT, DAEMON_INTERVAL
+from utils import metrics
+from utils.logger import log
+
+
+@dataclass
+class DaemonState:
+    started_at: float = field(default_factory=time.time)
+    runs: int = 0
+    failures: int = 0
+    running: bool = False
+    next_run_at: float | None = None
+    last_run: dict | None = None
+    last_error: str | None = None
+
+
+class Daemon:
+    def __init__(
+        self,
+        run_cycle: Callable[[], dict],
+        interval: int = DAEMON_INTERVAL,
+        host: str = CONTROL_HOST,
+        port: int = CONTROL_PORT,
+        on_error: Callable[[], None] | None = None,
+    ):
+        """
+        Args:
+            run_cycle (Callable): Runs one cycle and returns its metrics.
+            interval (int): Seconds between cycles.
+            host (str): Address the control API binds to.
+            port (int): Port of the control API. 0 disables it.
+            on_error (Callable, optional): Called before the next cycle after a failed one
+                (e.g. to re-initialize the session).
+        """
+        self.run_cycle = run_cycle
+        self.interval = interval
+        self.host = host
+        self.port = port
+        self.on_error = on_error
+        self.state = DaemonState()
+        self._lock = threading.Lock()
+        self._trigger = threading.Event()
+        self._stop = threading.Event()
+        self._needs_recovery = False
+        self.server: ThreadingHTTPServer | None = None
+
+    def trigger(self) -> bool:
+        """Requests a cycle now. Returns False if one is already running."""
+        if self.state.running:
+            return False
+        self._trigger.set()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        self._trigger.set()
+        if self.server:
+            self.server.shutdown()
+
+    def status(self) -> dict:
+        with self._lock:
+            data = asdict(self.state)
+        data["uptime"] = time.time() - self.state.started_at
+        data["interval"] = self.interval
+        return data
+
+    def _run_once(self):
+        metrics.new_run()
+        if self._needs_recovery and self.on_error:
+            log.info("♻️ Re-initializing session after failed cycle...")
+            try:
+                self.on_error()
+                self._needs_recovery = False
+            except Exception as e:
+                log.error(f"❌ Session re-initialization failed: {e}")
+
+        with self._lock:
+            self.state.running = True
+        try:
+            summary = self.run_cycle()
+            with self._lock:
+                self.state.last_run = summary
+                self.state.last_error = None
+                self.state.runs += 1
+        except Exception as e:
+            log.error(f"❌ Cycle failed: {e}")
+            log.debug(traceback.format_exc())
+            self._needs_recovery = True
+            with self._lock:
+                self.state.last_error = f"{type(e).__name__}: {e}"
+                self.state.failures += 1
+        finally:
+            with self._lock:
+                self.state.running = False
+
+    def _start_control_api(self):
+        if not self.port:
+            return
+        self.server = ThreadingHTTPServer((self.host, self.port), _make_handler(self))
+        threading.Thread(target=self.server.serve_forever, name="sg-control", daemon=True).start()
+        log.info(f"🛰️ Control API listening on http://{self.host}:{self.port}")
+
+    def serve_forever(self):
+        """Runs cycles until interrupted (Ctrl+C / SIGTERM)."""
+        self._start_control_api()
+        log.info(f"🔁 Daemon mode: one cycle every {self.interval}s")
+        try:
+            while not self._stop.is_set():
+                self._trigger.clear()
+                self._run_once()
+                self.state.next_run_at = time.time() + self.interval
+                self._trigger.wait(self.interval)
+        except KeyboardInterrupt:
+            log.info("👋 Daemon stopped.")
+        finally:
+            self.stop()
+
+
+def _make_handler(daemon: Daemon):
+    class ControlHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status: int, payload: dict):
+            self._send(status, json.dumps(payload, default=str), "application/json")
+
+        def _send(self, status: int, text: str, content_type: str):
+            body = text.encode()
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            match self.path:
+                case "/health":
+                    self._send_json(200, {"status": "ok"})
+                case "/status":
+                    self._send_json(200, daemon.status())
+                case "/metrics":
+                    self._send(200, metrics.to_prometheus(), "text/plain; version=0.0.4")
+                case "/report":
+                    self._send_json(200, {"summary": daemon.state.last_run, **metrics.run_report()})
+                case _:
+                    self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/run":
+                self._send_json(404, {"error": "not found"})
+            elif daemon.trigger():
+                self._send_json(202, {"status": "triggered"})
+            else:
+                self._send_json(409, {"status": "already running"})
+
+        def log_message(self, format, *args):
+            log.debug(f"Control API: {format % args}")
+
+    return ControlHandler
@@ -1,16 +1,16 @@
-from datetime import timedelta
-from time import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import contextvars
 import os
-from unittest import result
-from bs4 import BeautifulSoup
-import json, requests, time, src.session_manager as sm
+import json, time
+from src import http_client, owned_apps, ranking, scoring
 from utils.logger import log
-from src.config import BASE_URL, GIVEAWAYS_FILE
+from src.config import BASE_URL, GIVEAWAYS_FILE, FETCH_CONCURRENCY
 from src.models import Giveaway, Giveaways
-from utils.json_manager import jm
+from utils.storage import jm
 
 
 PARAMS = {"format": "json"}
+PAGE_SIZE = 100  # resultados por página do endpoint JSON
 
 def get_link_from_id(giveaway_id: str):
     """
@@ -58,12 +58,29 @@ def fetch_giveaway_page(page=1, max_pages=5):
     params = PARAMS.copy()
     params["page"] = page
     log.info(f"🔍 Fetching giveaways from page {page}/{max_pages}...")    
-    resp = requests.get(BASE_URL, params=params, cookies=sm.cookies)
-    if resp.raise_for_status():
-        log.error(f"❌ Failed to fetch giveaways from page {page}: {resp.status_code} - {resp.text}")
-        return []
+    resp = http_client.get(BASE_URL, params=params)
+    return read_giveaway_page(resp, page)
+
+def read_giveaway_page(resp, page: int) -> list[dict]:
+    """Raw giveaways of a listing page response (also used by `async_core`); raises on an error status."""
+    if not resp.ok:
+        # não devolver [] aqui: com --all uma página vazia seria tomada pela última
+        log.error(f"❌ Failed to fetch giveaways from page {page}: {resp.status_code} - {resp.text[:200]}")
+        resp.raise_for_status()
+
+    return parse_giveaway_page(resp.json(), page)
+
+def parse_giveaway_page(data: dict, page: int) -> list[dict]:
+    """
+    Prepares the raw giveaways of a JSON listing page (code, remaining_time).
+
+    Args:
+        data (dict): Decoded JSON listing page.
+        page (int): Page number (for the logs).
 
-    data = resp.json()
+    Returns:
+        list[dict]: Raw giveaways of the page.
+    """
     giveaways = data.get("results")
     
     log.info("🔗 Extracting giveaway codes from links...")
@@ -107,36 +124,212 @@ def fetch_giveaway(giveaway_id: str):
     log.warning(f"❗ Giveaway with ID {giveaway_id} not found.")
     return None  # se não encontrar
 
-def fetch_giveaways(max_pages=5) -> Giveaways:
+def _fetch_pages_serial(max_pages: int) -> list[list[dict]]:
+    """
+    Fetches listing pages one after another until max_pages or a short page.
+
+    Args:
+        max_pages (int): Number of pages to fetch, -1 for all pages.
+
+    Returns:
+        list[list[dict]]: Raw giveaways of each page, in page order.
+    """
+    pages = []
+    page = 1
+
+    while True:
+        giveaways = fetch_giveaway_page(page, max_pages)
+        pages.append(giveaways)
+        page += 1
+
+        if max_pages != -1 and page > max_pages:
+            break
+        if max_pages == -1 and len(giveaways) < PAGE_SIZE:
+            break
+
+    return pages
+
+def iter_giveaway_pages(max_pages: int, concurrency: int):
+    """
+    Yields listing pages as soon as each one arrives, with up to
+    `concurrency` requests in flight.
+
+    Pages are requested in a sliding window, so with `max_pages=-1` at most
+    `concurrency - 1` requests are fired past the last page. Pages past the
+    detected last page are dropped (an empty page that arrives before the
+    real last page may still be yielded). Pages come in completion order,
+    not page order.
+
+    Args:
+        max_pages (int): Number of pages to fetch, -1 for all pages.
+        concurrency (int): Maximum number of simultaneous page requests.
+
+    Yields:
+        tuple[int, list[dict]]: Page number and its raw giveaways.
+    """
+    last_page = max_pages if max_pages != -1 else None
+    next_page = 1
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="sg-fetch") as pool:
+        in_flight = {}
+        while True:
+            while len(in_flight) < concurrency and (last_page is None or next_page <= last_page):
+                # copy_context: os workers usam a sessão (conta) de quem chamou
+                in_flight[pool.submit(contextvars.copy_context().run, fetch_giveaway_page, next_page, max_pages)] = next_page
+                next_page += 1
+
+            if not in_flight:
+                break
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                page = in_flight.pop(future)
+                giveaways = future.result()
+
+                # página curta = última página (só relevante para --all)
+                if max_pages == -1 and len(giveaways) < PAGE_SIZE and (last_page is None or page < last_page):
+                    last_page = page
+                    log.debug(f"Last page detected: {page}")
+                    for pending, pending_page in list(in_flight.items()):
+                        if pending_page > last_page and pending.cancel():
+                            in_flight.pop(pending)
+
+                if last_page is None or page <= last_page:
+                    yield page, giveaways
+
+def _fetch_pages_concurrent(max_pages: int, concurrency: int) -> list[list[dict]]:
+    """
+    Fetches listing pages with up to `concurrency` requests in flight.
+
+    Args:
+        max_pages (int): Number of pages to fetch, -1 for all pages.
+        concurrency (int): Maximum number of simultaneous page requests.
+
+    Returns:
+        list[list[dict]]: Raw giveaways of each page, in page order.
+    """
+    results = dict(iter_giveaway_pages(max_pages, concurrency))
+    return [results[page] for page in sorted(results)]
+
+def _dedupe_giveaways(pages: list[list[dict]]) -> list[dict]:
+    """
+    Flattens pages keeping the first occurrence of each giveaway id.
+
+    Pagination can shift while pages are being fetched (new giveaways push
+    entries to the next page), so the same giveaway may appear twice.
+    """
+    seen = set()
+    total = []
+    for giveaways in pages:
+        for g in giveaways:
+            gid = g.get("id")
+            if gid in seen:
+                log.debug(f"Duplicate giveaway {gid} skipped (pagination shifted).")
+                continue
+            seen.add(gid)
+            total.append(g)
+    return total
+
+def carry_flags(giveaways: list[Giveaway]):
+    """
+    Keeps the joined/owned flags already recorded in the store.
+
+    Only the flags of the given ids are looked up (`StorageBackend.get_flags`),
+    the stored catalog is never loaded as a whole.
+    """
+    flags = jm.get_flags(g.id for g in giveaways)
+    for g in giveaways:
+        joined, owned = flags.get(str(g.id), (False, False))
+        g.joined = g.joined or joined
+        g.owned = g.owned or owned
+
+def sync_giveaways(max_pages=-1, concurrency=FETCH_CONCURRENCY) -> Giveaways:
+    """
+    Incremental sync: merges the listing into the store instead of replacing it.
+
+    The JSON listing is ordered by end time, not creation, so a new
+    giveaway that runs for weeks sits on a late page behind ones we already
+    know: there is no page after which everything is old, and the whole
+    listing (or `max_pages`) is fetched. What the sync saves is writes: only
+    new or changed records are persisted, and the stored joined/owned flags
+    are kept by the merge itself.
+
+    Args:
+        max_pages (int): Maximum number of pages, -1 for no limit.
+        concurrency (int): Maximum number of pages fetched at the same time.
+
+    Returns:
+        Giveaways: Giveaways fetched in this sync.
+    """
+    log.info("🔄 Incremental sync")
+
+    if concurrency > 1:
+        pages = _fetch_pages_concurrent(max_pages, concurrency)
+    else:
+        pages = _fetch_pages_serial(max_pages)
+
+    return merge_giveaways(pages)
+
+def merge_giveaways(pages: list[list[dict]]) -> Giveaways:
+    """
+    Merges fetched listing pages into the store (see `sync_giveaways`).
+
+    Args:
+        pages (list[list[dict]]): Raw giveaways of each page, in page order.
+
+    Returns:
+        Giveaways: Giveaways of the pages.
+    """
+    giveaways = [Giveaway.from_dict(data) for data in _dedupe_giveaways(pages)]
+    changed = jm.merge_giveaways(giveaways)
+    log.info(f"✅ Synced {len(giveaways)} giveaways from {len(pages)} page(s), {changed} new or changed")
+
+    return Giveaways(
+        time_fetched=int(time.time()),
+        results_count=len(giveaways),
+        giveaways={str(g.id): g for g in giveaways},
+    )
+
+def fetch_giveaways(max_pages=5, concurrency=FETCH_CONCURRENCY, incremental=False) -> Giveaways:
     """
     Fetches giveaways from multiple pages and stores them in JSON.
 
     Args:
         max_pages (int, optional): Number of pages to fetch. Defaults to 5. For all pages fetch, -1 should be used.
+        concurrency (int, optional): Maximum number of pages fetched at the same time. 1 fetches serially.
+        incremental (bool, optional): Merge into the store instead of replacing it, writing
+            only new or changed records (see `sync_giveaways`).
 
     Returns:
         list[Giveaway]: List of Giveaway objects.
     """
-    
+    if incremental:
+        return sync_giveaways(max_pages, concurrency=concurrency)
+
     if max_pages == -1:
         log.info("Fetching all pages")
     
     os.makedirs(os.path.dirname(GIVEAWAYS_FILE), exist_ok=True)
     
-    page = 1
-    total = []
-    results_len = 100
-    
-    while True:
-        giveaways = fetch_giveaway_page(page, max_pages)
-        total.extend(giveaways)
-        results_len = len(giveaways)
-        page += 1
-        
-        if max_pages != -1 and page > max_pages:
-            break
-        if max_pages == -1 and results_len < 100:
-            break
+    if concurrency > 1:
+        log.info(f"Fetching pages concurrently (concurrency={concurrency})")
+        pages = _fetch_pages_concurrent(max_pages, concurrency)
+    else:
+        pages = _fetch_pages_serial(max_pages)
+
+    return store_giveaways(pages)
+
+def store_giveaways(pages: list[list[dict]]) -> Giveaways:
+    """
+    Turns fetched listing pages into the catalog and writes it to the store.
+
+    Args:
+        pages (list[list[dict]]): Raw giveaways of each page, in page order.
+
+    Returns:
+        Giveaways: The written catalog.
+    """
+    total = _dedupe_giveaways(pages)
 
     log.info(f"✅ Total giveaways fetched: {len(total)}")
 
@@ -150,29 +343,36 @@ def fetch_giveaways(max_pages=5) -> Giveaways:
         giveaways={str(g.id): g for g in giveaway_objects}
     )
 
-    # guardar usando JsonManager
-    jm.write(giveaways_obj.to_dict())
-    log.info(f"💾 Saved giveaways to {GIVEAWAYS_FILE} via JsonManager")
+    # guardar no storage configurado, sem perder o joined/owned já conhecido
+    carry_flags(giveaway_objects)
+    scoring.score_giveaways(giveaway_objects)
+    jm.write(giveaways_obj)
+    log.info(f"💾 Saved giveaways via {type(jm.get()).__name__}")
     return giveaways_obj
 
 def sort_giveaways(
-    giveaways_obj: Giveaways,
+    giveaways_obj: Giveaways | None = None,
     by=("remaining_time", "points"),
     reverse=False,
     min_points=0,
     max_points=None,
-    timeframe=3600
+    timeframe=3600,
+    weights=None,
 ) -> list[Giveaway]:
     """
     Sorts giveaways from a Giveaways object based on specified criteria.
 
     Args:
-        giveaways_obj (Giveaways): Giveaways object containing giveaways dict.
+        giveaways_obj (Giveaways|None): Giveaways object containing giveaways dict.
+            If None, candidates are queried from the storage backend, which
+            applies the points/timeframe/joined filters itself (indexed SQL for SQLite).
         by (tuple): Criteria to sort by (attributes of Giveaway).
         reverse (bool): If True, sort descending.
         min_points (int): Minimum points filter.
         max_points (int|None): Maximum points filter.
         timeframe (int|None): Filter giveaways ending within this timeframe in seconds.
+        weights (dict|None): Rank by a weighted score of these columns instead of `by`
+            (see `ranking.rank_giveaways`).
 
     Returns:
         list[Giveaway]: Sorted list of Giveaway objects.
@@ -180,41 +380,36 @@ def sort_giveaways(
     log.info(f"Sorting giveaways by {by}, reverse={reverse}, min_points={min_points}, max_points={max_points}, timeframe={timeframe}")
 
     now_ts = time.time()
-    giveaways_list = list(giveaways_obj.giveaways.values())
-
-    # aplicar filtros
-    filtered = []
-    for g in giveaways_list:
-        if g.points < min_points:
-            continue
-        if max_points is not None and g.points > max_points:
-            continue
-        if timeframe is not None and (g.end_timestamp - now_ts) > timeframe:
-            continue
-        if g.joined or g.owned:
-            log.debug(f"get_giveaways.sort_giveaways(): Giveaway {g.short()} already joined or owned. Skipping.")
-            continue
-        filtered.append(g)
-
-    if not filtered:
-        log.warning("No giveaways matched the filter criteria.")
-        return []
 
     if isinstance(by, str):
         by = [crit.strip() for crit in by.split(",")]
 
     # validar atributos
-    for crit in by:
-        if not hasattr(filtered[0], crit):
+    for crit in list(by) + list(weights or ()):
+        if not hasattr(Giveaway, crit):
             log.error(f"❌ Invalid sort criteria: {crit}")
             raise AttributeError(f"Giveaway has no attribute '{crit}'")
 
-    # ordenar
-    sorted_giveaways = sorted(
-        filtered,
-        key=lambda g: tuple(getattr(g, crit) for crit in by),
-        reverse=reverse
-    )
+    # filtros + ordenação em colunas NumPy (ranking.py), com o tempo lido uma vez
+    filters = dict(min_points=min_points, max_points=max_points, timeframe=timeframe, now=now_ts)
+    if giveaways_obj is None:
+        source = jm.query_giveaways(**filters)
+    else:
+        source = giveaways_obj.giveaways.values()
+    # score (valor esperado por ponto) recalculado numa passagem, com o mesmo `now`
+    source = scoring.score_giveaways(source, now=now_ts)
+    sorted_giveaways = ranking.rank_giveaways(source, by=by, reverse=reverse, weights=weights, **filters)
+
+    # jogos que já temos: fora de uma vez, sem abrir a página de cada giveaway
+    owned = owned_apps.current()
+    if owned:
+        before = len(sorted_giveaways)
+        sorted_giveaways = owned.filter(sorted_giveaways)
+        log.info(f"📚 Skipped {before - len(sorted_giveaways)} giveaways of {len(owned)} owned games")
+
+    if not sorted_giveaways:
+        log.warning("No giveaways matched the filter criteria.")
+        return []
 
     return sorted_giveaways
 
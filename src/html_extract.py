@@ -0,0 +1,145 @@
+# html_extract.py
+"""
+Single-pass extraction of the SteamGifts page fields the bot needs.
+
+Every marker (nav points, level, XSRF token, avatar link, entry
+insert/delete buttons, sidebar error, entry count) is an alternative of one
+precompiled regex, so a page is walked once with `finditer` instead of
+one `re.search`/`str.split` per field. None of the patterns can backtrack
+past a tag (`[^>]`, `[^"]`, `[^<]` only), and the scan stops as soon as
+the fields the caller asked for are known: nav fields sit at the top of
+the page and the sidebar comes before the comments, which make up most of
+a detail page.
+
+Listing pages (`parse_listing`) are cut into rows with `str.split` and
+each row is read with anchored patterns starting where the previous one
+matched.
+"""
+import re
+from dataclasses import dataclass
+
+# Todas as alternativas começam por `="` (fim de um nome de atributo): com um
+# prefixo literal comum o `re` salta direto entre atributos em vez de tentar
+# cada alternativa em cada posição da página.
+PAGE_RE = re.compile(
+    r'="(?:'
+    r'nav__points">(?P<points>\d+)<'
+    r'|nav__level"[^>]*>Level (?P<level>\d+)'
+    r'|xsrf_token" value="(?P<xsrf_token>[^"]*)"'
+    r'|nav__avatar[^"]*" href="/user/(?P<username>[^"/]+)"'
+    r'|entry_(?P<button>insert|delete)"[^>]*?class="(?P<button_class>[^"]*)"'
+    r'|sidebar__error[^"]*"[^>]*>(?:\s*<i[^>]*></i>)?\s*(?P<error>[^<]*)'
+    r'|live__entry-count"[^>]*>(?P<entry_count>[\d,]+)<'
+    r')'
+)
+
+# Listagem: cortar nas linhas (str.split, em C) e ler cada linha com padrões
+# ancorados sai mais barato do que um finditer por atributo da página inteira.
+ROW_SPLIT = 'class="giveaway__row-outer-wrap"'
+INNER_RE = re.compile(r'class="giveaway__row-inner-wrap( is-faded)?"')
+CODE_RE = re.compile(r'href="/giveaway/([A-Za-z0-9]{5})/')
+ENTRIES_END = " entries</span>"
+NAV_POINTS_RE = re.compile(r'<span class="nav__points">(\d+)<')
+
+OWNED_ERROR = "Exists in Account"
+
+# campos que `parse_page` sabe extrair; `fields` escolhe quando pode parar
+FIELDS = ("points", "level", "xsrf_token", "username", "entry_state", "entry_count")
+NAV_FIELDS = ("points", "level", "xsrf_token", "username")
+
+
+@dataclass
+class PageInfo:
+    points: int | None = None
+    level: int | None = None
+    xsrf_token: str | None = None
+    username: str | None = None
+    can_enter: bool | None = None  # botão "Enter Giveaway" visível
+    entered: bool | None = None    # botão "Remove Entry" visível
+    error: str | None = None       # texto do sidebar__error (ended, not enough points, ...)
+    entry_count: int | None = None
+
+    @property
+    def logged_in(self) -> bool:
+        return self.username is not None or self.xsrf_token is not None
+
+    @property
+    def owned(self) -> bool:
+        return self.error is not None and OWNED_ERROR in self.error
+
+    def _known(self, field: str) -> bool:
+        if field == "entry_state":
+            # sem erro, a página tem os dois botões (um deles escondido)
+            return self.error is not None or (self.can_enter is not None and self.entered is not None)
+        return getattr(self, field) is not None
+
+
+def parse_page(html: str, fields=FIELDS) -> PageInfo:
+    """
+    Extracts nav and detail-page fields in one pass.
+
+    Args:
+        html (str): Page HTML.
+        fields (Iterable[str]): Fields (see FIELDS) the caller needs; the scan
+            stops once all of them are known. Others found before that are filled too.
+
+    Returns:
+        PageInfo: Fields found (None when absent).
+    """
+    info = PageInfo()
+    wanted = tuple(fields)
+    for m in PAGE_RE.finditer(html):
+        kind = m.lastgroup
+        match kind:
+            case "points" | "level":
+                setattr(info, kind, int(m.group(kind)))
+            case "xsrf_token" | "username":
+                setattr(info, kind, m.group(kind))
+            case "button_class":
+                visible = "is-hidden" not in m.group("button_class").split()
+                if m.group("button") == "insert":
+                    info.can_enter = visible
+                else:
+                    info.entered = visible
+            case "error":
+                info.error = m.group("error").strip()
+            case "entry_count":
+                info.entry_count = int(m.group("entry_count").replace(",", ""))
+        if all(info._known(f) for f in wanted):
+            break
+    return info
+
+
+@dataclass(slots=True)
+class ListingRow:
+    code: str
+    joined: bool
+    level_ok: bool = True
+    entry_count: int | None = None
+
+
+def parse_listing(html: str) -> tuple[list[ListingRow], int | None]:
+    """
+    Extracts every giveaway row of a listing page.
+
+    Args:
+        html (str): Listing page HTML.
+
+    Returns:
+        tuple: (rows in page order, current points or None)
+    """
+    head, *chunks = html.split(ROW_SPLIT)
+    rows = []
+    for row in chunks:
+        inner = INNER_RE.search(row)
+        code = inner and CODE_RE.search(row, inner.end())
+        if not code:
+            continue
+        entry_count = None
+        end = row.find(ENTRIES_END, code.end())
+        if end != -1:
+            count = row[row.rfind(">", 0, end) + 1:end].replace(",", "")
+            entry_count = int(count) if count.isdigit() else None
+        rows.append(ListingRow(code.group(1), inner.group(1) is not None, "contributor-level--negative" not in row, entry_count))
+    points = NAV_POINTS_RE.search(head)
+    return rows, int(points.group(1)) if points else None
@@ -0,0 +1,240 @@
+# http_cache.py
+"""
+On-disk HTTP response cache for the shared client.
+
+Bodies are stored under `HTTP_CACHE_DIR`, keyed by method, URL (query
+params included) and a hash of the Cookie header. Stale entries with an
+ETag/Last-Modified are revalidated with a conditional request, so an
+unchanged page costs a 304 instead of a full download. `Cache-Control`
+(no-store, no-cache, max-age) is respected unless an endpoint has a TTL
+override in `TTL_OVERRIDES`. Entries are evicted LRU under a byte budget;
+hits only update the in-memory index, which is written at most every
+`INDEX_FLUSH_INTERVAL` seconds (and at exit).
+"""
+import atexit
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from src.config import HTTP_CACHE_DIR, HTTP_CACHE_ENABLED, HTTP_CACHE_MAX_BYTES
+from utils.atomic import atomic_open
+from utils.logger import log
+
+# (regex do URL, TTL em segundos). O primeiro que bater ganha.
+TTL_OVERRIDES: list[tuple[re.Pattern, int]] = [
+    # detalhe: tem estado do utilizador (entered, pontos, owned) que is_joinable lê; só revalidação
+    (re.compile(r"/giveaway/[A-Za-z0-9]{5}/"), 0),
+    (re.compile(r"[?&]format=json"), 0),               # listagem JSON: só revalidação
+    (re.compile(r"/ajax\.php"), 0),
+]
+
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Cache-Control")
+MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+INDEX_FLUSH_INTERVAL = 5.0  # segundos entre escritas do índice só por causa de hits
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    revalidated: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    bytes_saved: int = 0
+
+    def summary(self) -> str:
+        total = self.hits + self.revalidated + self.misses
+        ratio = (self.hits + self.revalidated) / total * 100 if total else 0
+        return (
+            f"HTTP cache: {self.hits} hits, {self.revalidated} revalidated (304), {self.misses} misses "
+            f"({ratio:.0f}% served from cache, {self.bytes_saved / 1024:.0f} KiB not downloaded), "
+            f"{self.stores} stored, {self.evictions} evicted"
+        )
+
+
+@dataclass
+class HttpCache:
+    directory: str = HTTP_CACHE_DIR
+    max_bytes: int = HTTP_CACHE_MAX_BYTES
+    enabled: bool = HTTP_CACHE_ENABLED
+    stats: CacheStats = field(default_factory=CacheStats)
+
+    def __post_init__(self):
+        self._lock = threading.Lock()
+        self._index: dict[str, dict] | None = None
+        self._dirty = False  # last_used/expires_at alterados em memória, por escrever
+        self._flushed_at = 0.0
+
+    @property
+    def index_file(self) -> str:
+        return os.path.join(self.directory, "index.json")
+
+    def _load_index(self) -> dict[str, dict]:
+        if self._index is None:
+            try:
+                with open(self.index_file, "r", encoding="utf-8") as f:
+                    self._index = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self._index = {}
+        return self._index
+
+    def _save_index(self) -> None:
+        with atomic_open(self.index_file) as f:
+            json.dump(self._index, f)
+        self._dirty = False
+        self._flushed_at = time.monotonic()
+
+    def flush(self) -> None:
+        """Writes the index if hits changed it since the last write."""
+        with self._lock:
+            if self._dirty and self._index is not None:
+                self._save_index()
+
+    def _body_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.bin")
+
+    @staticmethod
+    def key(request: requests.PreparedRequest) -> str:
+        cookie = request.headers.get("Cookie", "")
+        raw = f"{request.method} {request.url} {hashlib.sha256(cookie.encode()).hexdigest()}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    @staticmethod
+    def ttl_for(url: str, headers) -> int | None:
+        """TTL of a response: endpoint override, else Cache-Control max-age, else None."""
+        for pattern, ttl in TTL_OVERRIDES:
+            if pattern.search(url):
+                return ttl
+        match = MAX_AGE_RE.search(headers.get("Cache-Control", ""))
+        return int(match.group(1)) if match else None
+
+    def lookup(self, request: requests.PreparedRequest) -> tuple[str, dict | None]:
+        """Returns (key, entry) for a GET request. entry is None on miss."""
+        key = self.key(request)
+        with self._lock:
+            entry = self._load_index().get(key)
+        if entry and not os.path.exists(self._body_path(key)):
+            entry = None
+        return key, entry
+
+    def record(self, kind: str, nbytes: int = 0) -> None:
+        with self._lock:
+            setattr(self.stats, kind, getattr(self.stats, kind) + 1)
+            self.stats.bytes_saved += nbytes
+
+    def is_fresh(self, entry: dict) -> bool:
+        return time.time() < entry["expires_at"]
+
+    def read_body(self, key: str) -> bytes | None:
+        """Body of an entry, or None (and the entry is dropped) if it is gone or unreadable."""
+        try:
+            with open(self._body_path(key), "rb") as f:
+                return f.read()
+        except OSError:
+            with self._lock:
+                if self._load_index().pop(key, None) is not None:
+                    self._dirty = True
+            return None
+
+    def touch(self, key: str, entry: dict, headers=None) -> None:
+        """Marks the entry as used; after a 304 also refreshes its expiry."""
+        with self._lock:
+            now = time.time()
+            entry["last_used"] = now
+            if headers is not None:
+                ttl = self.ttl_for(entry["url"], headers) or 0
+                entry["expires_at"] = now + ttl
+            self._dirty = True
+            if time.monotonic() - self._flushed_at >= INDEX_FLUSH_INTERVAL:
+                self._save_index()
+
+    def store(self, key: str, response: requests.Response) -> None:
+        cache_control = response.headers.get("Cache-Control", "")
+        if "no-store" in cache_control:
+            return
+
+        ttl = self.ttl_for(response.url, response.headers)
+        if "no-cache" in cache_control and ttl is None:
+            ttl = 0
+        has_validators = "ETag" in response.headers or "Last-Modified" in response.headers
+        if not ttl and not has_validators:
+            return  # nada a reaproveitar na próxima vez
+
+        body = response.content
+        now = time.time()
+        entry = {
+            "url": response.url,
+            "headers": {h: response.headers[h] for h in KEPT_HEADERS if h in response.headers},
+            "stored_at": now,
+            "last_used": now,
+            "expires_at": now + (ttl or 0),
+            "size": len(body),
+        }
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._body_path(key), "wb") as f:
+                f.write(body)
+            self._load_index()[key] = entry
+            self.stats.stores += 1
+            self._evict()
+            self._save_index()
+
+    def _evict(self) -> None:
+        """Removes least recently used entries until the cache fits max_bytes."""
+        index = self._index
+        total = sum(e["size"] for e in index.values())
+        if total <= self.max_bytes:
+            return
+        for key, entry in sorted(index.items(), key=lambda kv: kv[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            total -= entry["size"]
+            del index[key]
+            try:
+                os.remove(self._body_path(key))
+            except FileNotFoundError:
+                pass
+            self.stats.evictions += 1
+
+    def build_response(self, request: requests.PreparedRequest, entry: dict, body: bytes, status: str) -> requests.Response:
+        resp = requests.Response()
+        resp.status_code = 200
+        resp.reason = "OK"
+        resp.url = request.url
+        resp.request = request
+        resp.headers = CaseInsensitiveDict(entry["headers"])
+        resp.headers["X-Cache"] = status
+        resp._content = body
+        resp.encoding = get_encoding_from_headers(resp.headers)
+        return resp
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._load_index()):
+                try:
+                    os.remove(self._body_path(key))
+                except FileNotFoundError:
+                    pass
+            self._index = {}
+            self._save_index()
+
+
+cache = HttpCache()
+atexit.register(cache.flush)
+
+
+def summary() -> str:
+    return cache.stats.summary()
+
+
+def log_summary():
+    if cache.enabled:
+        log.info(f"🗄️ {summary()}")
@@ -0,0 +1,270 @@
+# http_client.py
+"""
+Shared HTTP client used by every module.
+
+A single `requests.Session` with a tuned connection pool, keep-alive,
+default timeouts and retries with exponential backoff. All outbound
+traffic (SteamGifts pages, ajax calls, FlareSolverr) should go through
+`get`/`post` here so TCP+TLS connections are reused between requests,
+and so every request goes through the shared rate limiter (`rate_limiter`).
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src import http_cache, rate_limiter
+from src.config import (
+    HTTP_BACKOFF,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_POOL_CONNECTIONS,
+    HTTP_POOL_MAXSIZE,
+    HTTP_READ_TIMEOUT,
+    HTTP_RETRIES,
+    RATE_LIMIT_RETRIES,
+)
+from utils import metrics
+from utils.logger import log
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout when the caller gives none."""
+
+    def __init__(self, *args, timeout=None, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+class RateLimitedHTTPAdapter(TimeoutHTTPAdapter):
+    """
+    Adapter that waits for the shared rate limiter before each request.
+
+    A 429 is retried (up to RATE_LIMIT_RETRIES times) once the limiter lets the
+    endpoint class through again, i.e. after `Retry-After`. The server did
+    not process the request, so this is safe for POST too.
+    """
+
+    def __init__(self, *args, limiter: rate_limiter.RateLimiter | None = None, **kwargs):
+        self.limiter = limiter
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if self.limiter is None:
+            return super().send(request, **kwargs)
+
+        name = endpoint_class(request.url)
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            slot = self.limiter.acquire(name)
+            status, retry_after, throttled = None, None, False
+            try:
+                resp = super().send(request, **kwargs)
+                status = resp.status_code
+                retry_after = rate_limiter.parse_retry_after(resp.headers.get("Retry-After"))
+                throttled = is_throttled(status, resp.headers)
+            finally:
+                if slot is not None:
+                    slot.release(status, retry_after, throttled=throttled)
+            if status != 429 or slot is None or attempt == RATE_LIMIT_RETRIES:
+                return resp
+            log.debug(f"Retrying {request.method} {request.url} after 429 (attempt {attempt + 1}/{RATE_LIMIT_RETRIES})")
+            resp.content  # ler o body para a conexão voltar ao pool
+            resp.close()
+        return resp
+
+
+def is_throttled(status: int, headers) -> bool:
+    """Whether a response is the server rate limiting us."""
+    # um 503 de desafio do Cloudflare não é rate limiting
+    return status == 429 or (status == 503 and "cf-mitigated" not in headers)
+
+
+class CachingHTTPAdapter(RateLimitedHTTPAdapter):
+    """Adapter that serves GET requests from `http_cache` and revalidates stale entries."""
+
+    def __init__(self, *args, cache: http_cache.HttpCache | None = None, **kwargs):
+        self.cache = cache
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        cache = self.cache
+        if cache is None or not cache.enabled or request.method != "GET" or kwargs.get("stream"):
+            return super().send(request, **kwargs)
+
+        key, entry = cache.lookup(request)
+        if entry and cache.is_fresh(entry):
+            body = cache.read_body(key)
+            if body is not None:
+                cache.record("hits", len(body))
+                cache.touch(key, entry)
+                return cache.build_response(request, entry, body, "HIT")
+            entry = None  # corpo removido entretanto (evicção noutra thread): miss
+
+        if entry:
+            if "ETag" in entry["headers"]:
+                request.headers["If-None-Match"] = entry["headers"]["ETag"]
+            if "Last-Modified" in entry["headers"]:
+                request.headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+
+        resp = super().send(request, **kwargs)
+
+        if entry and resp.status_code == 304:
+            body = cache.read_body(key)
+            if body is not None:
+                cache.record("revalidated", len(body))
+                cache.touch(key, entry, resp.headers)
+                resp.close()
+                return cache.build_response(request, entry, body, "REVALIDATED")
+            # o 304 não traz corpo e o nosso desapareceu: pedir a página inteira
+            resp.close()
+            request.headers.pop("If-None-Match", None)
+            request.headers.pop("If-Modified-Since", None)
+            resp = super().send(request, **kwargs)
+
+        cache.record("misses")
+        if resp.status_code == 200:
+            cache.store(key, resp)
+        return resp
+
+
+class _Retry(Retry):
+    # 429 não: é repetido por RateLimitedHTTPAdapter, que partilha o Retry-After com os outros pedidos
+    RETRY_AFTER_STATUS_CODES = frozenset({413, 503})
+
+
+def endpoint_class(url: str) -> str:
+    """Groups URLs by endpoint for metrics (listing_json, detail, ajax, ...)."""
+    parts = urlsplit(url)
+    if parts.path.endswith("/v1"):
+        return "flaresolverr"
+    if parts.path.endswith("/ajax.php"):
+        return "ajax"
+    if parts.path.startswith("/giveaway/"):
+        return "detail"
+    if parts.path.startswith("/giveaways/search"):
+        return "listing_html"
+    if "format=json" in parts.query:
+        return "listing_json"
+    if parts.path in ("", "/"):
+        return "homepage"
+    return "other"
+
+
+def _record_response(resp: requests.Response, *args, **kwargs):
+    nbytes = 0 if kwargs.get("stream") else len(resp.content)
+    metrics.observe_request(endpoint_class(resp.url or resp.request.url), resp.status_code, resp.elapsed.total_seconds(), nbytes)
+    if resp.status_code == 429:
+        log.warning(f"⚠️ 429 Too Many Requests from {resp.url}")
+
+
+def new_session(
+    cache: http_cache.HttpCache | None = http_cache.cache,
+    limiter: rate_limiter.RateLimiter | None = rate_limiter.limiter,
+) -> requests.Session:
+    """
+    Creates a pooled session with retries, default timeouts, the on-disk cache
+    and the shared rate limiter.
+
+    Args:
+        cache (HttpCache, optional): Response cache. None disables caching for this session.
+        limiter (RateLimiter, optional): Rate limiter. None disables rate limiting for this session.
+
+    Returns:
+        requests.Session: Session with the tuned adapter mounted for http and https.
+    """
+    retry = _Retry(
+        total=HTTP_RETRIES,
+        backoff_factor=HTTP_BACKOFF,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),  # POST (entry_insert) não é idempotente
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = CachingHTTPAdapter(
+        cache=cache,
+        limiter=limiter,
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=retry,
+        timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+    )
+
+    s = requests.Session()
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    s.headers.update({"Connection": "keep-alive"})
+    s.hooks["response"].append(_record_response)
+    return s
+
+
+session = new_session()
+# sessão de outra conta (multi-conta), ativa só no contexto atual
+_session_var: ContextVar[requests.Session | None] = ContextVar("sg_http_session", default=None)
+
+
+def current_session() -> requests.Session:
+    """Session of the account in the current context, or the shared one."""
+    return _session_var.get() or session
+
+
+@contextmanager
+def use_session(s: requests.Session):
+    """Makes `get`/`post` use `s` inside the block (per thread/context)."""
+    token = _session_var.set(s)
+    try:
+        yield s
+    finally:
+        _session_var.reset(token)
+
+
+def get(url, **kwargs) -> requests.Response:
+    return current_session().get(url, **kwargs)
+
+
+def post(url, **kwargs) -> requests.Response:
+    return current_session().post(url, **kwargs)
+
+
+def reuse_stats(s: requests.Session | None = None) -> dict[str, dict[str, int]]:
+    """
+    Per-host connection reuse statistics of the session's pools.
+
+    Args:
+        s (requests.Session, optional): Session to inspect. Defaults to the shared session.
+
+    Returns:
+        dict: {"scheme://host:port": {"requests": n, "connections": c, "reused": n - c}}
+    """
+    s = s or session
+    stats = {}
+    adapters = {id(a): a for a in s.adapters.values()}.values()
+    for adapter in adapters:
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = f"{key.key_scheme}://{key.key_host}:{key.key_port}"
+            entry = stats.setdefault(host, {"requests": 0, "connections": 0, "reused": 0})
+            entry["requests"] += pool.num_requests
+            entry["connections"] += pool.num_connections
+            entry["reused"] = max(0, entry["requests"] - entry["connections"])
+    return stats
+
+
+def log_limiter_stats():
+    for endpoint, st in rate_limiter.limiter.stats().items():
+        if st["throttled"] or st["concurrency"] < st["max_concurrency"]:
+            log.info(f"🚦 {endpoint}: throttled {st['throttled']}x, now {st['rate']}/s with concurrency {st['concurrency']}")
+
+
+def log_reuse_stats(s: requests.Session | None = None):
+    for host, st in reuse_stats(s).items():
+        log.info(f"🔌 {host}: {st['requests']} requests over {st['connections']} connections ({st['reused']} reused)")
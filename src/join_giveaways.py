@@ -1,104 +1,243 @@
-import requests, time, re
+import time
+from dataclasses import dataclass, field
+
 import src.session_manager as sm
 
+from src import html_extract, http_client, owned_apps
 from src.config import BASE_URL
 from src.models import Giveaway
+from utils import metrics
 from utils.logger import log
-from utils.json_manager import jm
+from utils.storage import jm
+
+NOT_ENOUGH_POINTS = "Not Enough Points"
 
-def get_current_points():
+
+def get_current_points(max_age: float | None = None):
     """
     Get the current points of logged user.
 
+    Served from the session state (kept up to date by every page and ajax
+    response); the homepage is only fetched when the cached value is stale.
+
+    Args:
+        max_age (float, optional): Seconds a cached value stays valid (POINTS_MAX_AGE by default).
+
     Returns:
         int: Current points of the user.
         If unable to fetch points, returns 0.
     """
-    
-    resp = requests.get(BASE_URL, cookies=sm.cookies)
-    if resp.status_code != 200:
-        log.error(f"Failed to fetch current points: {resp.status_code} - {resp.text}")
-        return 0
-    log.debug(f"Response from {BASE_URL}: {resp.status_code} - {resp.text[:100]}...")
-    log.debug("Fetching current points...")
-    match = re.search(r'<span class="nav__points">(\d+)</span>', resp.text)
-    if match:
-        pontos = int(match.group(1))
-        return pontos
-    log.warning("Could not find points in the response.")
-    return 0
-
-def is_joinable(giveaway: Giveaway, cookies) -> bool:
+    state = sm.current()
+    return state.get_points() if max_age is None else state.get_points(max_age=max_age)
+
+def is_joinable(giveaway: Giveaway, cookies, confirmed: bool = False) -> bool:
+    """
+    Checks whether the giveaway can still be entered.
+
+    Args:
+        giveaway (Giveaway): Giveaway to check.
+        cookies: Session cookies.
+        confirmed (bool): State already confirmed by the listing scan; skips the detail page fetch.
+    """
+    known = known_joinable(giveaway, confirmed)
+    if known is not None:
+        return known
+
     log.debug(f"Checking if already entered giveaway {giveaway.short()}...")
     
-    resp = requests.get(giveaway.link, cookies=cookies)
-    html = resp.text
+    with metrics.span("join_detail_check"):
+        resp = http_client.get(giveaway.link, cookies=cookies)
+    return apply_detail_page(giveaway, resp.text)
 
+def known_joinable(giveaway: Giveaway, confirmed: bool = False) -> bool | None:
+    """
+    Whether the giveaway can be entered without looking at its detail page.
+
+    Returns:
+        bool | None: False if already joined/owned, True if confirmed by the
+        listing scan, None if the detail page must be checked.
+    """
     if giveaway.joined or giveaway.owned:
         return False
+    if confirmed:
+        return True
+    return None
+
+def apply_detail_page(giveaway: Giveaway, html: str) -> bool:
+    """Parses a detail page and records its entry state (see `apply_entry_state`)."""
+    return apply_entry_state(giveaway, html_extract.parse_page(html, fields=("entry_state",)))
 
-    if re.search(r'data-do="entry_delete"[^>]*class="(?!.*is-hidden).*"', html):
+def apply_entry_state(giveaway: Giveaway, page: html_extract.PageInfo) -> bool:
+    """
+    Records what a detail page says about the giveaway (joined, owned).
+
+    Returns:
+        bool: True if it can be entered.
+    """
+    if page.entered:
         giveaway.update_joined_status(True)
         jm.update_giveaway(giveaway)
         return False
 
-    if 'sidebar__error is-disabled' in html:
+    if page.owned:
         giveaway.updated_owned_status(True)
         jm.update_giveaway(giveaway)
+        owned_apps.mark_owned(giveaway)  # os próximos giveaways do mesmo jogo nem chegam aqui
+        return False
+
+    if page.error:
+        # ended, not enough points, level... não é estado a guardar
+        log.debug(f"Giveaway {giveaway.short()} not enterable: {page.error}")
         return False
 
     return True
 
-def join_giveaway(giveaway: Giveaway, cookies) -> bool:
+def join_giveaway(giveaway: Giveaway, cookies, confirmed: bool = False) -> bool:
     if not giveaway:
         log.warning("Giveaway not found. Skipping.")
         return False
 
-    if not is_joinable(giveaway, cookies):
+    if not is_joinable(giveaway, cookies, confirmed=confirmed):
         log.warning(f"Giveaway {giveaway.short()} already joined or owned. Skipping.")
         return False  # já estava inscrito
 
-    payload = {        
-        "xsrf_token": sm.xsrf_token,
+    payload = join_payload(giveaway)
+    with metrics.span("join_post"):
+        resp = http_client.post(f"{BASE_URL}/ajax.php", data=payload)
+    log.debug(f"Payload sent: {payload}")
+    return read_join_reply(giveaway, resp)
+
+def join_payload(giveaway: Giveaway) -> dict:
+    """`entry_insert` form of the current account."""
+    return {
+        "xsrf_token": sm.current().xsrf_token,
         "do": "entry_insert",
         "code": giveaway.code
     }
 
-    resp = requests.post(f"{BASE_URL}/ajax.php", data=payload, cookies=sm.cookies)
-    log.debug(f"Payload sent: {payload}")
+def read_join_reply(giveaway: Giveaway, resp) -> bool:
+    """
+    Handles the ajax.php response of a join (also used by `async_core`).
+
+    Returns:
+        bool: True if the server accepted the entry.
+    """
+    if resp.status_code == 429:
+        # o rate limiter já esperou e repetiu; desistir deste sem parar o resto
+        log.warning(f"⚠️ Still rate limited joining {giveaway.short()}. Skipping.")
+        return False
     resp.raise_for_status()
     log.debug(f"Response received: {resp.text}")
+    try:
+        data = resp.json()
+    except ValueError:
+        log.warning(f"⚠️ Unexpected reply joining {giveaway.short()}: {resp.text[:200]}")
+        return False
+    return apply_join_reply(giveaway, data)
+
+def apply_join_reply(giveaway: Giveaway, data: dict) -> bool:
+    """
+    Records the result of an `entry_insert` reply.
+
+    Args:
+        giveaway (Giveaway): Giveaway that was entered.
+        data (dict): Decoded ajax.php reply.
+
+    Returns:
+        bool: True if the server accepted the entry.
+    """
+    if data.get("type") != "success":
+        msg = data.get("msg", "unknown error")
+        if msg == NOT_ENOUGH_POINTS:
+            # o orçamento local não bate com o servidor: pedir os pontos de novo
+            log.warning(f"⚠️ Server refused {giveaway.short()}: {msg}. Local points out of sync, refreshing.")
+            sm.current().invalidate_points()
+        else:
+            log.warning(f"⚠️ Could not join {giveaway.short()}: {msg}")
+        return False
 
-    # atualizar estado
+    # atualizar estado (os pontos da resposta já foram para a sessão pelo hook)
+    count = str(data.get("entry_count", "")).replace(",", "")
+    if count.isdigit():
+        giveaway.entry_count = int(count)
     giveaway.update_joined_status(True)
     jm.update_giveaway(giveaway)
     log.info(f"✅ Joined giveaway {giveaway.short()}")
     return True
 
 
-def process_and_join_all(giveaways: list[Giveaway]):
+def process_and_join_all(giveaways: list[Giveaway], current_points: int | None = None, confirmed: set[str] | None = None):
     """
     Enter all the giveaways in the list.
 
     Args:
         giveaways (Giveaways): List of giveaways retrieved from the API.
+        current_points (int, optional): Points available. Fetched from SteamGifts if None.
+        confirmed (set[str], optional): Codes whose state was confirmed by the listing scan
+            (no detail page check needed).
+
+    Returns:
+        int: Number of giveaways joined.
     """
-    
-    total_joined = 0
-    current_points = get_current_points()
-    log.info(f"Processing {len(giveaways)} giveaways to join with {current_points}p...")
-    
+    confirmed = confirmed or set()
+    state = sm.current()
+    if current_points is None:
+        current_points = get_current_points()
+    budget = JoinBudget(state, current_points)
+    budget.start(giveaways)
+
     for g in giveaways:
-        match current_points:
-            case 0:
-                log.warning("⚠️ No points available. Cannot join any giveaways.")
-                break
-            case _ if current_points < g.points:
-                log.warning(f"⚠️ Not enough points to join giveaway {g.short()}. Required: {g.points}, Available: {current_points}.")
-                continue
-            case _:
-                if join_giveaway(g, cookies=sm.cookies):
-                    current_points -= g.points
-                    total_joined += 1
-        
-    log.info(f"🎯 Total giveaways joined: {total_joined}/{len(giveaways)}")
+        allowed = budget.allows(g)
+        if allowed is None:
+            break
+        if not allowed:
+            continue
+        if budget.record(g, join_giveaway(g, cookies=state.cookies, confirmed=g.code in confirmed)):
+            budget.points = state.get_points()  # join recusado por falta de pontos
+
+    return budget.finish(giveaways)
+
+
+@dataclass
+class JoinBudget:
+    """
+    Points bookkeeping of a join run, shared by `process_and_join_all` and
+    `async_core.join_all` (only the join itself and the points refresh differ).
+    """
+    state: sm.SessionState
+    points: int
+    joined: int = 0
+    started: float = field(default_factory=time.time)
+
+    def start(self, giveaways: list[Giveaway]):
+        log.info(f"Processing {len(giveaways)} giveaways to join with {self.points}p...")
+
+    def allows(self, giveaway: Giveaway) -> bool | None:
+        """True to join `giveaway`, False to skip it, None to stop (no points left)."""
+        if self.points <= 0:
+            log.warning("⚠️ No points available. Cannot join any giveaways.")
+            return None
+        if self.points < giveaway.points:
+            log.warning(f"⚠️ Not enough points to join giveaway {giveaway.short()}. Required: {giveaway.points}, Available: {self.points}.")
+            return False
+        return True
+
+    def record(self, giveaway: Giveaway, joined: bool) -> bool:
+        """
+        Charges a join attempt.
+
+        Returns:
+            bool: True if the points must be fetched again (a join was refused for lack of points).
+        """
+        if joined:
+            self.points -= giveaway.points
+            self.joined += 1
+        if self.state.points is None:
+            return True
+        if self.state.points_at >= self.started:
+            self.points = self.state.points  # pontos exatos da resposta do servidor
+        return False
+
+    def finish(self, giveaways: list[Giveaway]) -> int:
+        log.info(f"🎯 Total giveaways joined: {self.joined}/{len(giveaways)}")
+        return self.joined
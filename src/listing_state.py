@@ -0,0 +1,117 @@
+# listing_state.py
+"""
+Bulk joined/eligibility detection from the HTML listing pages.
+
+The HTML listing (`/giveaways/search?page=N`) marks giveaways we already
+entered with `is-faded` and shows our points in the nav bar, so one listing
+page resolves the state of up to 50 giveaways. Giveaways not found in the
+scanned pages stay ambiguous and fall back to the detail-page check in
+`join_giveaways.is_joinable`.
+"""
+from dataclasses import dataclass, field
+
+from src import html_extract
+from src.config import BASE_URL
+from src.models import Giveaway
+from utils.logger import log
+
+LISTING_URL = f"{BASE_URL}/giveaways/search"
+LISTING_PAGE_SIZE = 50  # giveaways por página na listagem HTML
+
+
+@dataclass
+class EntryState:
+    code: str
+    joined: bool
+    level_ok: bool = True
+    entry_count: int | None = None
+
+
+@dataclass
+class ListingScan:
+    states: dict[str, EntryState] = field(default_factory=dict)
+    points: int | None = None
+    pages: int = 0
+    wanted: set[str] = field(default_factory=set)  # códigos ainda por encontrar
+
+    def add_page(self, page: int, resp) -> bool:
+        """
+        Records one listing page response (also used by `async_core`).
+
+        Returns:
+            bool: True if the next page is worth fetching.
+        """
+        if resp.status_code != 200:
+            log.warning(f"❗ Failed to fetch listing page {page}: {resp.status_code}")
+            return False
+
+        states, points = parse_listing(resp.text)
+        self.pages += 1
+        self.states.update(states)
+        if points is not None:
+            self.points = points
+        self.wanted -= states.keys()
+
+        return len(states) >= LISTING_PAGE_SIZE
+
+    def log_summary(self):
+        log.info(f"📋 Listing scan: {len(self.states)} giveaway states from {self.pages} pages, {len(self.wanted)} unresolved")
+
+
+def parse_listing(html: str) -> tuple[dict[str, EntryState], int | None]:
+    """
+    Extracts the entry state of every giveaway row in a listing page.
+
+    Args:
+        html (str): Listing page HTML.
+
+    Returns:
+        tuple: ({code: EntryState}, current points or None)
+    """
+    rows, points = html_extract.parse_listing(html)
+    states = {r.code: EntryState(r.code, r.joined, r.level_ok, r.entry_count) for r in rows}
+    return states, points
+
+
+def apply_listing_states(giveaways: list[Giveaway], scan: ListingScan, store=None, check_points: bool = True) -> tuple[list[Giveaway], set[str]]:
+    """
+    Copies listing states into the giveaways and drops the ones not joinable.
+
+    Args:
+        giveaways (list[Giveaway]): Candidates.
+        scan (ListingScan): Result of `async_core.scan_listing`.
+        store (StorageBackend, optional): Store where newly detected joins are persisted.
+        check_points (bool): Drop giveaways costing more than the points shown in the
+            listing. False with --schedule, where they are planned for when points regenerate.
+
+    Returns:
+        tuple: (joinable candidates, codes whose state was confirmed by the listing)
+    """
+    joinable = []
+    confirmed = set()
+    for g in giveaways:
+        state = scan.states.get(g.code)
+        if state is None:
+            joinable.append(g)
+            continue
+        if state.entry_count is not None:
+            g.entry_count = state.entry_count  # contagem mais recente que a do catálogo
+
+        if state.joined:
+            if not g.joined:
+                g.joined = True
+                if store is not None:
+                    store.update_giveaway(g)
+            log.debug(f"Giveaway {g.short()} already joined (listing). Skipping.")
+            continue
+        if not state.level_ok:
+            log.debug(f"Giveaway {g.short()} requires a higher contributor level. Skipping.")
+            continue
+        if check_points and scan.points is not None and g.points > scan.points:
+            log.debug(f"Giveaway {g.short()} costs more than the {scan.points}p available. Skipping.")
+            continue
+
+        confirmed.add(g.code)
+        joinable.append(g)
+
+    return joinable, confirmed
@@ -1,14 +1,23 @@
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from datetime import timedelta
+import sys
 import time
+import weakref
 from typing import Any, Optional, Dict
 from utils.logger import log
 from src.config import BASE_URL
-@dataclass
+# Creators partilhados entre giveaways (o mesmo utilizador cria muitos giveaways); referências
+# fracas: um creator sai do cache quando já nenhum giveaway o usa (o daemon não acumula)
+_CREATORS: "weakref.WeakValueDictionary[tuple, Creator]" = weakref.WeakValueDictionary()
+
+@dataclass(slots=True, frozen=True, weakref_slot=True)
 class Creator:
     """
     Class representing a creator of a giveaway.
 
+    Instances are immutable and shared: use `Creator.get` to reuse the
+    object of a creator already seen.
+
     Attributes:
         id (int): The ID of the creator.
         steam_id (str): The Steam ID of the creator.
@@ -21,10 +30,19 @@ class Creator:
     steam_id: str
     username: str
 
+    @staticmethod
+    def get(id: int, steam_id: str, username: str) -> "Creator":
+        key = (id, steam_id, username)
+        creator = _CREATORS.get(key)
+        if creator is None:
+            creator = Creator(id, sys.intern(steam_id or ""), sys.intern(username or ""))
+            _CREATORS[key] = creator
+        return creator
+
     def to_dict(self) -> Dict[str, any]:
-        return asdict(self)
+        return {"id": self.id, "steam_id": self.steam_id, "username": self.username}
 
-@dataclass
+@dataclass(slots=True)
 class Giveaway:
     id: int
     name: str
@@ -48,18 +66,42 @@ class Giveaway:
     contributor_level: int = 0
     joined: bool = False
     owned: bool = False
-    score: float = 0.0   
+    score: float = field(default=0.0, compare=False)  # derivado (scoring.py), muda com o tempo
 
     def to_dict(self) -> Dict[str, any]:
-        return asdict(self)
+        # equivalente a asdict(self), sem a cópia recursiva genérica
+        return {
+            "id": self.id,
+            "name": self.name,
+            "points": self.points,
+            "copies": self.copies,
+            "app_id": self.app_id,
+            "package_id": self.package_id,
+            "link": self.link,
+            "created_timestamp": self.created_timestamp,
+            "start_timestamp": self.start_timestamp,
+            "end_timestamp": self.end_timestamp,
+            "comment_count": self.comment_count,
+            "entry_count": self.entry_count,
+            "creator": self.creator.to_dict() if self.creator else None,
+            "code": self.code,
+            "region_restricted": self.region_restricted,
+            "invite_only": self.invite_only,
+            "whitelist": self.whitelist,
+            "group": self.group,
+            "contributor_level": self.contributor_level,
+            "joined": self.joined,
+            "owned": self.owned,
+            "score": self.score,
+        }
     
     @staticmethod
     def from_dict(data: Dict[str, Any]) -> "Giveaway":
         creator_data = data.get("creator")
-        creator = Creator(**creator_data) if creator_data else None
+        creator = Creator.get(**creator_data) if creator_data else None
         return Giveaway(
             id=data["id"],
-            name=data["name"],
+            name=sys.intern(data["name"]),
             points=data.get("points", 0),
             copies=data.get("copies", 1),
             app_id=data.get("app_id"),
@@ -78,6 +120,7 @@ class Giveaway:
             creator=creator,
             code=data.get("code", ""),
             joined=data.get("joined", False),   
+            owned=data.get("owned", False),
             score=data.get("score", 0)  
         )
 
@@ -113,17 +156,16 @@ class Giveaway:
         seconds = remaining_seconds % 60
         return f"{days}d {hours:02}h:{minutes:02}m:{seconds:02}s"
     
-    def get_probabilierty(self):
-        if self.joined:
-            return 1/(self.entry_count/self.copies)
-        else:
-            return 1/(self.entry_count+1/self.copies)
+    def win_probability(self) -> float:
+        """Chance of winning a copy with the projected final entries (see src/scoring.py)."""
+        from src import scoring
+        return scoring.win_probability(self)
         
     def __str__(self):
         return (
             f"🎁 {self.name} (ID: {self.id})\n"
             f"   🔗 Link: {self.link}\n"
-            f"   🏷️ Points: {self.points} | Copies: {self.copies} | Entries: {self.entry_count} | Probability: {self.get_probability():.2f}\n"
+            f"   🏷️ Points: {self.points} | Copies: {self.copies} | Entries: {self.entry_count} | Probability: {self.win_probability():.2%}\n"
             f"   👤 Creator: {self.creator.username if self.creator else 'Unknown'}\n"
             f"   🕒 Ends in: {self.remaining_time_str}"
         )
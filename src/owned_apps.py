@@ -0,0 +1,149 @@
+# owned_apps.py
+"""
+Index of the Steam apps and packages the account already owns.
+
+Filled from detail pages that say "Exists in Account" (see
+`join_giveaways.is_joinable`) and from an imported Steam library export
+(`--import-owned`). Selection drops every giveaway whose `app_id` or
+`package_id` is in the index, so a game found owned once is never fetched
+again for any other giveaway of it.
+
+The index is two integer sets (O(1) membership) saved as sorted id lists
+in data/owned_apps.json (one file per account with --accounts).
+"""
+import json
+import os
+import threading
+from typing import Iterable
+
+from src import accounts
+from src.config import OWNED_APPS_FILE
+from src.models import Giveaway
+from utils.atomic import atomic_open
+from utils.logger import log
+
+
+class OwnedApps:
+    """
+    Owned app/package ids.
+
+    Args:
+        path (str): File the index is loaded from and saved to.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.apps: set[int] = set()
+        self.packages: set[int] = set()
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.apps = set(data.get("apps", ()))
+            self.packages = set(data.get("packages", ()))
+
+    def __len__(self) -> int:
+        return len(self.apps) + len(self.packages)
+
+    def __contains__(self, g: Giveaway) -> bool:
+        return g.app_id in self.apps or g.package_id in self.packages
+
+    def add(self, g: Giveaway) -> bool:
+        """Records the giveaway's game as owned. Returns True if it was new."""
+        if g.app_id is not None:
+            target, key = self.apps, g.app_id
+        elif g.package_id is not None:
+            target, key = self.packages, g.package_id
+        else:
+            return False
+        with self._lock:
+            if key in target:
+                return False
+            target.add(key)
+        return True
+
+    def update(self, apps: Iterable[int] = (), packages: Iterable[int] = ()) -> int:
+        """Adds app/package ids. Returns how many were new."""
+        with self._lock:
+            before = len(self)
+            self.apps.update(apps)
+            self.packages.update(packages)
+            return len(self) - before
+
+    def filter(self, giveaways: Iterable[Giveaway]) -> list[Giveaway]:
+        """Drops the giveaways of owned games."""
+        apps, packages = self.apps, self.packages
+        if not apps and not packages:
+            return list(giveaways)
+        return [g for g in giveaways if g.app_id not in apps and g.package_id not in packages]
+
+    def save(self):
+        """Atomically writes the index (sorted id lists)."""
+        with self._lock:
+            data = {"apps": sorted(self.apps), "packages": sorted(self.packages)}
+        with atomic_open(self.path, prefix=".owned-") as f:
+            json.dump(data, f, separators=(",", ":"))
+
+
+_indexes: dict[str, OwnedApps] = {}
+_indexes_lock = threading.Lock()
+
+
+def current() -> OwnedApps:
+    """Index of the account in the current context (loaded once per file)."""
+    path = accounts.data_path(OWNED_APPS_FILE)
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            index = _indexes[path] = OwnedApps(path)
+        return index
+
+
+def mark_owned(g: Giveaway):
+    """Adds a giveaway found to be owned to the current index and saves it."""
+    index = current()
+    if index.add(g):
+        index.save()
+        log.info(f"📚 {g.name} added to the owned games index ({len(index)} total)")
+
+
+def parse_library(text: str) -> set[int]:
+    """
+    Reads Steam app ids from a library export.
+
+    Accepts the Steam Web API `GetOwnedGames` response
+    ({"response": {"games": [{"appid": ...}]}}), a JSON list of ids or of
+    objects with "appid", or plain text with one id per line (CSV: first column).
+
+    Returns:
+        set[int]: App ids.
+    """
+    try:
+        data = json.loads(text)
+    except ValueError:
+        ids = set()
+        for line in text.splitlines():
+            first = line.split(",")[0].strip()
+            if first.isdigit():
+                ids.add(int(first))
+        return ids
+
+    if isinstance(data, dict):
+        data = data.get("response", data).get("games", [])
+    return {int(item["appid"]) if isinstance(item, dict) else int(item) for item in data}
+
+
+def import_library(path: str) -> int:
+    """
+    Imports a Steam library export into the current index.
+
+    Returns:
+        int: Number of app ids that were not in the index yet.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        apps = parse_library(f.read())
+    index = current()
+    added = index.update(apps=apps)
+    index.save()
+    log.info(f"📚 Imported {len(apps)} apps from {path}: {added} new, {len(index)} owned in total")
+    return added
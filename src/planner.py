@@ -0,0 +1,279 @@
+# planner.py
+"""
+Budget-optimal giveaway selection.
+
+Picks the subset of candidate giveaways that maximizes an objective while
+the summed `points` stays within the available budget (0/1 knapsack).
+Points are small integers (budget is capped at 400 by SteamGifts), so an
+exact dynamic programming solution over the budget runs in O(n * budget)
+and handles hundreds of candidates in milliseconds.
+
+`schedule_joins` plans over time instead: points regenerate (capped at
+POINTS_CAP), so each join is placed just before its giveaway ends, and
+points that would otherwise regenerate past the cap are spent early on the
+best remaining candidates.
+"""
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from src.config import JOIN_MARGIN, POINTS_CAP, POINTS_PER_HOUR, SCHEDULE_HORIZON
+from src.models import Giveaway
+from src.scoring import win_probability
+from utils.atomic import atomic_open
+from utils.logger import log
+
+
+OBJECTIVES: dict[str, Callable[[Giveaway], float]] = {
+    "probability": win_probability,   # soma das probabilidades de ganhar (entradas projetadas até ao fim)
+    "entries": lambda g: 1.0,         # máximo de giveaways
+    "score": lambda g: g.score,       # valor esperado por ponto (scoring.score_giveaways)
+}
+
+STRATEGIES = ("greedy", "knapsack")
+
+
+def knapsack(items: list[Giveaway], budget: int, value: Callable[[Giveaway], float]) -> list[Giveaway]:
+    """
+    Exact 0/1 knapsack over integer point costs.
+
+    Args:
+        items (list[Giveaway]): Candidates.
+        budget (int): Points available.
+        value (Callable): Value of each candidate.
+
+    Returns:
+        list[Giveaway]: Chosen giveaways (in input order).
+    """
+    budget = max(0, int(budget))
+    free = [g for g in items if g.points <= 0 and value(g) > 0]
+    paid = [g for g in items if 0 < g.points <= budget]
+
+    best = [0.0] * (budget + 1)
+    keep = []
+    for g in paid:
+        w, v = g.points, value(g)
+        taken = bytearray(budget + 1)
+        if v > 0:
+            for c in range(budget, w - 1, -1):
+                cand = best[c - w] + v
+                if cand > best[c]:
+                    best[c] = cand
+                    taken[c] = 1
+        keep.append(taken)
+
+    # reconstruir a solução a partir da tabela de decisões
+    chosen = []
+    c = budget
+    for i in range(len(paid) - 1, -1, -1):
+        if keep[i][c]:
+            chosen.append(paid[i])
+            c -= paid[i].points
+    chosen.reverse()
+    return free + chosen
+
+
+def select_giveaways(
+    candidates: list[Giveaway],
+    budget: int,
+    objective: str = "probability",
+    strategy: str = "knapsack",
+) -> list[Giveaway]:
+    """
+    Selects which giveaways to join with the given points budget.
+
+    Args:
+        candidates (list[Giveaway]): Joinable candidates (already filtered).
+        budget (int): Points available.
+        objective (str): One of OBJECTIVES.
+        strategy (str): "knapsack" for the optimal plan, "greedy" to keep the
+            candidate order and take whatever still fits.
+
+    Returns:
+        list[Giveaway]: Selected giveaways, ending soonest first.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective: {objective}")
+
+    start = time.perf_counter()
+    match strategy:
+        case "knapsack":
+            selected = knapsack(candidates, budget, OBJECTIVES[objective])
+            selected.sort(key=lambda g: g.end_timestamp)
+        case "greedy":
+            selected, left = [], budget
+            for g in candidates:
+                if g.points <= left:
+                    selected.append(g)
+                    left -= g.points
+        case _:
+            raise ValueError(f"Unknown strategy: {strategy}")
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    spent = sum(g.points for g in selected)
+    total = sum(OBJECTIVES[objective](g) for g in selected)
+    log.info(
+        f"🧮 Planner ({strategy}, {objective}): {len(selected)}/{len(candidates)} giveaways, "
+        f"{spent}/{budget}p, objective={total:.4f} in {elapsed_ms:.1f}ms"
+    )
+    return selected
+
+
+@dataclass
+class ScheduledJoin:
+    at: float
+    giveaway: Giveaway
+    reason: str  # "deadline" (antes do fim) ou "cap" (pontos que se perderiam no máximo)
+    points_after: float
+
+
+@dataclass
+class JoinPlan:
+    created_at: float
+    horizon: float
+    joins: list[ScheduledJoin] = field(default_factory=list)
+    skipped: list[Giveaway] = field(default_factory=list)  # sem pontos a tempo
+    wasted: float = 0.0  # pontos regenerados acima do cap dentro do horizonte
+
+    def due(self, until: float, budget: float | None = None) -> list[ScheduledJoin]:
+        """
+        Joins that must run before `until` (e.g. the next run of the loop/cron).
+
+        Args:
+            until (float): End of the window.
+            budget (float, optional): Points available now. The plan counts on
+                points regenerating inside the window, so only the due joins
+                (in plan order) that the current balance pays for are returned;
+                the rest wait for the next run.
+        """
+        due = [j for j in self.joins if j.at < until]
+        if budget is None:
+            return due
+        affordable = []
+        for j in due:
+            if j.giveaway.points <= budget:
+                affordable.append(j)
+                budget -= j.giveaway.points
+        return affordable
+
+    def to_dict(self) -> dict:
+        return {
+            "created_at": self.created_at,
+            "horizon": self.horizon,
+            "wasted": round(self.wasted, 1),
+            "joins": [
+                {
+                    "at": round(j.at),
+                    "id": j.giveaway.id,
+                    "code": j.giveaway.code,
+                    "name": j.giveaway.name,
+                    "points": j.giveaway.points,
+                    "end_timestamp": j.giveaway.end_timestamp,
+                    "reason": j.reason,
+                    "points_after": round(j.points_after, 1),
+                }
+                for j in self.joins
+            ],
+        }
+
+    def save(self, path: str):
+        with atomic_open(path, prefix=".join_plan-") as f:
+            json.dump(self.to_dict(), f, indent=4, ensure_ascii=False)
+
+
+def schedule_joins(
+    candidates: list[Giveaway],
+    points: int,
+    now: float | None = None,
+    horizon: float = SCHEDULE_HORIZON,
+    per_hour: float = POINTS_PER_HOUR,
+    cap: int = POINTS_CAP,
+    margin: float = JOIN_MARGIN,
+    objective: str = "probability",
+) -> JoinPlan:
+    """
+    Builds a time-ordered join plan that models point regeneration.
+
+    Simulates the points balance from `now` to `now + horizon`. Candidates
+    ending inside the horizon are joined `margin` seconds before they end
+    (when their entry count is closest to final), in that order, if the
+    balance covers them. Whenever the balance would reach the cap before the
+    next such join, the points that would regenerate past the cap are spent
+    right then, one join at a time against the balance, on the remaining
+    candidates with the best value per point, so they become entries instead
+    of being lost. The balance never goes below 0 or above `cap`.
+
+    Args:
+        candidates (list[Giveaway]): Joinable candidates (already filtered).
+        points (int): Current points.
+        now (float, optional): Start of the plan. Defaults to time.time().
+        horizon (float): Seconds simulated.
+        per_hour (float): Points regenerated per hour.
+        cap (int): Maximum points balance.
+        margin (float): Seconds before `end_timestamp` a deadline join is placed.
+        objective (str): One of OBJECTIVES, used to pick what to spend capped points on.
+
+    Returns:
+        JoinPlan: Joins sorted by time.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective: {objective}")
+    value = OBJECTIVES[objective]
+    now = time.time() if now is None else now
+    end = now + horizon
+    rate = per_hour / 3600
+
+    pool = [g for g in candidates if 0 < g.points <= cap and g.end_timestamp > now]
+    target = {g.code: max(now, g.end_timestamp - margin) for g in pool}
+    deadline = sorted((g for g in pool if target[g.code] <= end), key=lambda g: target[g.code])
+    # o que se pode antecipar quando os pontos batem no cap: melhor valor por ponto primeiro
+    spare = sorted(pool, key=lambda g: value(g) / g.points, reverse=True)
+
+    plan = JoinPlan(created_at=now, horizon=horizon)
+    done: set[str] = set()
+    t, balance = now, float(min(points, cap))
+    queue = iter(deadline)
+    while True:
+        g = next((g for g in queue if g.code not in done), None)
+        t_next = target[g.code] if g else end
+
+        while True:
+            t_full = t + (cap - balance) / rate if rate else float("inf")
+            if t_full >= t_next:
+                balance += rate * (t_next - t)
+                break
+            # pontos regenerados entre t_full e t_next perdem-se no cap: gastá-los já, um
+            # join de cada vez contra o saldo (que volta a encher antes de t_next)
+            free = rate * (t_next - t_full)
+            # só candidatos ainda abertos em t_full (com a margem) e não dados como perdidos
+            c = next((
+                c for c in spare
+                if c is not g and c.code not in done and c.points <= free and c.end_timestamp - margin > t_full
+            ), None)
+            if c is None:
+                plan.wasted += free
+                balance = float(cap)
+                break
+            done.add(c.code)
+            t, balance = t_full, float(cap - c.points)
+            plan.joins.append(ScheduledJoin(t, c, "cap", balance))
+        t = t_next
+
+        if g is None:
+            break
+        if g.points <= balance:
+            balance -= g.points
+            done.add(g.code)
+            plan.joins.append(ScheduledJoin(t, g, "deadline", balance))
+        else:
+            plan.skipped.append(g)
+            done.add(g.code)  # acabou: já não pode ser antecipado num join "cap"
+
+    plan.joins.sort(key=lambda j: j.at)
+    log.info(
+        f"📅 Schedule: {len(plan.joins)} joins over {horizon / 3600:.1f}h "
+        f"({sum(j.reason == 'cap' for j in plan.joins)} to avoid the {cap}p cap), "
+        f"{len(plan.skipped)} short of points, ~{plan.wasted:.0f}p lost at the cap"
+    )
+    return plan
@@ -0,0 +1,275 @@
+# rate_limiter.py
+"""
+Process-wide rate limiter for outbound HTTP traffic.
+
+Every endpoint class (see `http_client.endpoint_class`: listing_json,
+detail, ajax, flaresolverr...) has its own token bucket and its own
+concurrency limit, shared by all threads. Limits adapt AIMD-style: each
+successful response grows the concurrency limit and the rate back towards
+their configured maximum, a 429/503 halves both and blocks the endpoint
+class until `Retry-After` has passed. Time spent waiting for the limiter is
+reported in the run metrics.
+"""
+import asyncio
+import email.utils
+import threading
+import time
+
+from src.config import RATE_LIMITS, RATE_LIMIT_ENABLED
+from utils import metrics
+from utils.logger import log
+
+THROTTLE_STATUS = (429, 503)
+DEFAULT_RETRY_AFTER = 5.0  # segundos de pausa num 429 sem Retry-After
+MAX_RETRY_AFTER = 300.0
+MIN_RATE = 0.2  # pedidos/s mínimos depois de vários 429
+RELEASE_POLL = 0.05  # segundos entre tentativas de acquire_async à espera de um release
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class EndpointLimiter:
+    """
+    Token bucket plus an adaptive concurrency limit for one endpoint class.
+
+    Args:
+        name (str): Endpoint class.
+        rate (float): Maximum requests per second (0 = no rate limit).
+        concurrency (int): Maximum requests in flight.
+    """
+
+    def __init__(self, name: str, rate: float, concurrency: int):
+        self.name = name
+        self.max_rate = rate
+        self.rate = rate
+        self.max_concurrency = max(1, concurrency)
+        self.limit = float(self.max_concurrency)
+        self.tokens = max(1.0, rate)  # burst de 1 segundo
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.throttled = 0
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float):
+        if self.rate:
+            self.tokens = min(max(1.0, self.rate), self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _delay(self, now: float) -> float | None:
+        """Seconds until a request may start (0 if it can start now, None to wait for a release)."""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.in_flight >= int(self.limit):
+            return None  # espera por um release
+        if self.rate and self.tokens < 1:
+            return (1 - self.tokens) / self.rate
+        return 0.0
+
+    def _take(self, now: float) -> float | None:
+        """Takes a slot if one is free at `now`; otherwise returns the delay (see `_delay`)."""
+        self._refill(now)
+        delay = self._delay(now)
+        if delay == 0:
+            if self.rate:
+                self.tokens -= 1
+            self.in_flight += 1
+        return delay
+
+    def acquire(self) -> float:
+        """
+        Blocks until a request may be sent.
+
+        Returns:
+            float: Seconds waited.
+        """
+        start = time.monotonic()
+        with self._cond:
+            while (delay := self._take(time.monotonic())) != 0:
+                self._cond.wait(timeout=delay)
+        return time.monotonic() - start
+
+    async def acquire_async(self) -> float:
+        """
+        `acquire` for an event loop: sleeps with asyncio instead of blocking
+        the thread (the Workers runtime has a single one).
+
+        Returns:
+            float: Seconds waited.
+        """
+        start = time.monotonic()
+        while True:
+            with self._cond:
+                delay = self._take(time.monotonic())
+            if delay == 0:
+                return time.monotonic() - start
+            await asyncio.sleep(RELEASE_POLL if delay is None else delay)
+
+    def release(self, status: int | None, retry_after: float | None = None, throttled: bool | None = None):
+        """
+        Frees the slot and adapts the limits to the response.
+
+        Args:
+            status (int|None): Response status, None if the request failed.
+            retry_after (float|None): Seconds from the Retry-After header.
+            throttled (bool|None): Whether the server throttled us. Defaults to
+                `status in THROTTLE_STATUS`.
+        """
+        if throttled is None:
+            throttled = status in THROTTLE_STATUS
+        with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self.throttled += 1
+                # multiplicative decrease
+                self.limit = max(1.0, self.limit / 2)
+                if self.rate:
+                    self.rate = max(MIN_RATE, self.rate / 2)
+                    self.tokens = min(self.tokens, 0.0)
+                pause = min(MAX_RETRY_AFTER, retry_after if retry_after is not None else DEFAULT_RETRY_AFTER)
+                self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+                log.warning(
+                    f"⚠️ {status} on {self.name}: pausing {pause:.1f}s, "
+                    f"concurrency {self.limit:.0f}, rate {self.rate:.2f}/s"
+                )
+            elif status is not None and status < 500:
+                # additive increase: +1 de concorrência por janela cheia de sucessos
+                self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+                if self.rate and self.rate < self.max_rate:
+                    self.rate = min(self.max_rate, self.rate + MIN_RATE / max(1.0, self.limit))
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "rate": round(self.rate, 3),
+                "max_rate": self.max_rate,
+                "concurrency": int(self.limit),
+                "max_concurrency": self.max_concurrency,
+                "throttled": self.throttled,
+            }
+
+
+class RateLimiter:
+    """
+    Registry of `EndpointLimiter`s, one per endpoint class.
+
+    Args:
+        limits (dict): {endpoint class: (requests per second, concurrency)}.
+            "default" applies to classes not listed.
+        enabled (bool): If False, `acquire` returns immediately.
+    """
+
+    def __init__(self, limits: dict[str, tuple[float, int]] = RATE_LIMITS, enabled: bool = RATE_LIMIT_ENABLED):
+        self.limits = limits
+        self.enabled = enabled
+        self._endpoints: dict[str, EndpointLimiter] = {}
+        self._lock = threading.Lock()
+
+    def endpoint(self, name: str) -> EndpointLimiter:
+        with self._lock:
+            limiter = self._endpoints.get(name)
+            if limiter is None:
+                rate, concurrency = self.limits.get(name, self.limits["default"])
+                limiter = self._endpoints[name] = EndpointLimiter(name, rate, concurrency)
+            return limiter
+
+    def acquire(self, name: str) -> EndpointLimiter | None:
+        """Waits for a slot of the endpoint class; returns the limiter to release."""
+        if not self.enabled:
+            return None
+        limiter = self.endpoint(name)
+        waited = limiter.acquire()
+        metrics.observe_limiter_wait(name, waited)
+        return limiter
+
+    async def acquire_async(self, name: str) -> EndpointLimiter | None:
+        """`acquire` without blocking the event loop."""
+        if not self.enabled:
+            return None
+        limiter = self.endpoint(name)
+        waited = await limiter.acquire_async()
+        metrics.observe_limiter_wait(name, waited)
+        return limiter
+
+    def stats(self) -> dict[str, dict]:
+        with self._lock:
+            endpoints = dict(self._endpoints)
+        return {name: limiter.stats() for name, limiter in sorted(endpoints.items())}
+
+
+class _AccountSlot:
+    """A slot of the shared limiter plus the account's concurrency slot, released together."""
+
+    def __init__(self, slot: EndpointLimiter, semaphore: threading.Semaphore):
+        self.slot = slot
+        self.semaphore = semaphore
+
+    def release(self, status: int | None, retry_after: float | None = None, throttled: bool | None = None):
+        try:
+            self.slot.release(status, retry_after, throttled=throttled)
+        finally:
+            self.semaphore.release()
+
+
+class AccountLimiter:
+    """
+    Per-account concurrency cap on top of a shared `RateLimiter`.
+
+    Rates, backoff and `Retry-After` stay process-wide (all accounts hit the
+    same site from the same IP); an account only gets at most `concurrency`
+    requests in flight per endpoint class, so one account cannot take every
+    slot of the shared limiter.
+
+    Args:
+        shared (RateLimiter): Process-wide limiter.
+        concurrency (int): Maximum requests in flight per endpoint class for this account.
+    """
+
+    def __init__(self, shared: RateLimiter, concurrency: int):
+        self.shared = shared
+        self.concurrency = max(1, concurrency)
+        self._semaphores: dict[str, threading.Semaphore] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.shared.enabled
+
+    def _semaphore(self, name: str) -> threading.Semaphore:
+        with self._lock:
+            semaphore = self._semaphores.get(name)
+            if semaphore is None:
+                semaphore = self._semaphores[name] = threading.Semaphore(self.concurrency)
+            return semaphore
+
+    def acquire(self, name: str) -> _AccountSlot | None:
+        """Waits for a slot of the account, then of the shared limiter; returns what to release."""
+        if not self.shared.enabled:
+            return None
+        semaphore = self._semaphore(name)
+        semaphore.acquire()
+        try:
+            slot = self.shared.acquire(name)
+        except BaseException:
+            semaphore.release()
+            raise
+        return _AccountSlot(slot, semaphore)
+
+    def stats(self) -> dict[str, dict]:
+        return self.shared.stats()
+
+
+limiter = RateLimiter()
@@ -0,0 +1,82 @@
+# scoring.py
+"""
+Win-probability and expected-value scoring of giveaways.
+
+The entry count of a running giveaway is extrapolated to its end at the
+rate seen so far (`entry_count` over the time elapsed since
+`start_timestamp`). From the projected final entries (ours included) comes
+the chance of winning one of the `copies`, and `Giveaway.score` is that
+chance per point spent: the expected value per point used for ranking and
+selection.
+
+`score_giveaways` scores a whole catalog in one pass over NumPy columns
+(see `ranking.RankingTable`) and falls back to pure Python like the ranking
+engine does.
+"""
+import time
+from typing import Iterable
+
+from src import ranking
+from src.models import Giveaway
+
+MIN_ELAPSED = 3600  # segundos: giveaways acabados de abrir não extrapolam uma rajada inicial
+
+
+def projected_entries(g: Giveaway, now: float | None = None) -> float:
+    """Entries expected when the giveaway ends, at the entry rate seen so far."""
+    now = time.time() if now is None else now
+    if g.start_timestamp <= 0:
+        return float(g.entry_count)
+    elapsed = max(now - g.start_timestamp, MIN_ELAPSED)
+    remaining = max(g.end_timestamp - now, 0)
+    return g.entry_count + g.entry_count * remaining / elapsed
+
+
+def win_probability(g: Giveaway, now: float | None = None) -> float:
+    """Chance of winning a copy at the end, with our entry counted."""
+    final = projected_entries(g, now) + (0 if g.joined else 1)
+    return min(1.0, g.copies / max(1.0, final))
+
+
+def expected_value_per_point(g: Giveaway, now: float | None = None) -> float:
+    """Win probability per point spent (free giveaways count as 1 point)."""
+    return win_probability(g, now) / max(1, g.points)
+
+
+def _score_python(giveaways: list[Giveaway], now: float) -> list[float]:
+    return [expected_value_per_point(g, now) for g in giveaways]
+
+
+def _score_numpy(giveaways: list[Giveaway], now: float) -> list[float]:
+    np = ranking.np
+    table = ranking.RankingTable(giveaways, now=now)
+    entries = table.column("entry_count").astype(np.float64)
+    start = table.column("start_timestamp")
+    elapsed = np.maximum(now - start, MIN_ELAPSED)
+    remaining = np.maximum(table.column("end_timestamp") - now, 0)
+    final = np.where(start > 0, entries + entries * remaining / elapsed, entries)
+    final += 1 - table.column("joined")
+    probability = np.minimum(1.0, table.column("copies") / np.maximum(1.0, final))
+    return (probability / np.maximum(1, table.column("points"))).tolist()
+
+
+def score_giveaways(giveaways: Iterable[Giveaway], now: float | None = None) -> list[Giveaway]:
+    """
+    Computes `score` (expected value per point) for every giveaway, in place.
+
+    Args:
+        giveaways (Iterable[Giveaway]): Giveaways to score.
+        now (float|None): Reference timestamp, sampled once. Defaults to time.time().
+
+    Returns:
+        list[Giveaway]: The scored giveaways.
+    """
+    now = time.time() if now is None else now
+    giveaways = list(giveaways)
+    if len(giveaways) >= ranking.NUMPY_MIN_ROWS and ranking._load_numpy() is not None:
+        scores = _score_numpy(giveaways, now)
+    else:
+        scores = _score_python(giveaways, now)
+    for g, s in zip(giveaways, scores):
+        g.score = s
+    return giveaways
@@ -1,24 +1,293 @@
 # session_manager.py
-import requests, json, os
-from src.config import COOKIES_PATH, BASE_URL
+import atexit, hashlib, requests, json, os, threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from src import html_extract, http_client
+from src.config import COOKIES_PATH, BASE_URL, HTTP_CONNECT_TIMEOUT, POINTS_MAX_AGE, SESSION_CACHE_FILE
+from utils import metrics
+from utils.atomic import atomic_open
 from utils.logger import log
-import time, requests
+import time
 FLARESOLVERR_URL = os.environ.get("FLARESOLVERR_URL", "http://flaresolverr:8191/v1")
+# Vários endpoints separados por vírgula: "http://fsr1:8191/v1,http://fsr2:8191/v1"
+FLARESOLVERR_URLS = [u.strip() for u in FLARESOLVERR_URL.split(",") if u.strip()]
+FSR_MAX_TIMEOUT = 60000  # ms, tempo máximo que o FlareSolverr espera pela solução
+FSR_FAILURE_THRESHOLD = 3  # falhas seguidas até abrir o circuito
+FSR_COOLDOWN = 60  # segundos com o circuito aberto
 
-session = requests.Session()
+session = http_client.session
 cookies = None
 xsrf_token = None
 
-# Função para chamar FlareSolverr
+
+class FlareSolverrUnavailable(requests.ConnectionError):
+    """Every FlareSolverr endpoint failed or has its circuit open."""
+
+
+def fsr_payload(url: str, cookies: dict | None = None, session_id: str | None = None) -> dict:
+    """`request.get` command for FlareSolverr (also sent by `async_core`)."""
+    payload = {"cmd": "request.get", "url": url, "maxTimeout": FSR_MAX_TIMEOUT}
+    if session_id:
+        payload["session"] = session_id
+    if cookies:
+        payload["cookies"] = [{"name": k, "value": v} for k, v in cookies.items()]
+    return payload
+
+
+def fsr_reply(resp) -> dict:
+    """Decoded FlareSolverr reply; raises `requests.HTTPError` if the command failed."""
+    resp.raise_for_status()
+    data = resp.json()
+    if data.get("status") != "ok":
+        raise requests.HTTPError(f"FlareSolverr error: {data.get('message')}", response=resp)
+    return data
+
+
+@dataclass
+class FsrEndpoint:
+    url: str
+    failures: int = 0
+    open_until: float = 0.0
+    session_id: str | None = None
+
+    def available(self) -> bool:
+        return time.time() >= self.open_until
+
+    def record_success(self):
+        self.failures = 0
+        self.open_until = 0.0
+
+    def record_failure(self):
+        self.failures += 1
+        self.session_id = None  # a sessão do browser pode ter morrido com o endpoint
+        if self.failures >= FSR_FAILURE_THRESHOLD:
+            self.open_until = time.time() + FSR_COOLDOWN
+            log.warning(f"FlareSolverr {self.url} failed {self.failures}x, circuit open for {FSR_COOLDOWN}s")
+
+
+class FlareSolverrClient:
+    """
+    FlareSolverr client that reuses one browser session per endpoint.
+
+    `sessions.create` is called once per endpoint and the session id is sent
+    with every `request.get`, so the browser (and its Cloudflare clearance)
+    is reused instead of launching a fresh one per call. Endpoints that keep
+    failing are skipped for `FSR_COOLDOWN` seconds (circuit breaker).
+    """
+
+    def __init__(self, urls: list[str] = FLARESOLVERR_URLS):
+        self.endpoints = [FsrEndpoint(url) for url in urls]
+        self._lock = threading.Lock()
+
+    def _post(self, endpoint: FsrEndpoint, payload: dict) -> dict:
+        resp = http_client.post(endpoint.url, json=payload, timeout=(HTTP_CONNECT_TIMEOUT, FSR_MAX_TIMEOUT / 1000 + 10))
+        return fsr_reply(resp)
+
+    def _ensure_session(self, endpoint: FsrEndpoint) -> str:
+        if endpoint.session_id is None:
+            data = self._post(endpoint, {"cmd": "sessions.create"})
+            endpoint.session_id = data["session"]
+            log.debug(f"FlareSolverr session {endpoint.session_id} created on {endpoint.url}")
+        return endpoint.session_id
+
+    def request(self, url: str, cookies: dict | None = None) -> dict:
+        """
+        Solves `url` on the first healthy endpoint.
+
+        Returns:
+            dict: FlareSolverr `solution` (response, cookies, userAgent, ...).
+        """
+        last_error = None
+        for endpoint in self.endpoints:
+            if not endpoint.available():
+                continue
+            try:
+                with self._lock:
+                    session_id = self._ensure_session(endpoint)
+                with metrics.span("flaresolverr_solve"):
+                    solution = self._post(endpoint, fsr_payload(url, cookies, session_id))["solution"]
+                endpoint.record_success()
+                return solution
+            except (requests.RequestException, KeyError, ValueError) as e:
+                last_error = e
+                endpoint.record_failure()
+                log.warning(f"FlareSolverr {endpoint.url} failed: {e}")
+
+        raise FlareSolverrUnavailable(f"No FlareSolverr endpoint available (last error: {last_error})")
+
+    def destroy(self):
+        """Closes the browser sessions."""
+        for endpoint in self.endpoints:
+            if endpoint.session_id is None:
+                continue
+            try:
+                self._post(endpoint, {"cmd": "sessions.destroy", "session": endpoint.session_id})
+            except requests.RequestException as e:
+                log.debug(f"Could not destroy FlareSolverr session on {endpoint.url}: {e}")
+            endpoint.session_id = None
+
+
+fsr = FlareSolverrClient()
+atexit.register(fsr.destroy)
+
+
+# campos da nav bar lidos de cada página que passa pela sessão
+OBSERVED_FIELDS = ("points", "level", "xsrf_token")
+
+
+@dataclass
+class SessionState:
+    """
+    Session of one account: cookies, HTTP session, XSRF token and its own
+    FlareSolverr browser sessions (cookies of different accounts must not mix).
+
+    Points, level and XSRF token are kept up to date from every response of
+    the session (nav bar of HTML pages, `points` of ajax.php replies), so
+    `get_points` only downloads the homepage when the value is stale or was
+    invalidated by a refused join.
+    """
+    name: str
+    cookies: dict = field(default_factory=dict)
+    session: requests.Session = field(default_factory=http_client.new_session)
+    xsrf_token: str | None = None
+    fsr: FlareSolverrClient = field(default_factory=FlareSolverrClient)
+    points: int | None = None
+    level: int | None = None
+    points_at: float = 0.0  # time.time() da última observação dos pontos
+    cache_path: str | None = None  # sessão guardada entre execuções (ver init_state)
+    validated_at: float = 0.0  # time.time() do último login confirmado
+
+    def __post_init__(self):
+        self.session.hooks["response"].append(self.observe_response)
+
+    def observe_response(self, resp: requests.Response, *args, **kwargs):
+        """Response hook: updates the state from a page or ajax reply (also fed by `async_core`)."""
+        # HIT vem do disco: os pontos dessa página são de outra altura
+        if resp.status_code != 200 or kwargs.get("stream") or resp.headers.get("X-Cache") == "HIT":
+            return
+        content_type = resp.headers.get("Content-Type", "")
+        if "text/html" in content_type:
+            self.observe_page(html_extract.parse_page(resp.text, fields=OBSERVED_FIELDS))
+        elif "json" in content_type and http_client.endpoint_class(resp.url) == "ajax":
+            try:
+                data = resp.json()
+            except ValueError:
+                return
+            if isinstance(data, dict):
+                self.observe_ajax(data)
+
+    def observe_page(self, page: html_extract.PageInfo):
+        """Takes points, level and XSRF token from a parsed page."""
+        if page.points is not None:
+            self.points, self.points_at = page.points, time.time()
+        if page.level is not None:
+            self.level = page.level
+        if page.xsrf_token:
+            self.xsrf_token = page.xsrf_token
+
+    def observe_ajax(self, data: dict):
+        """Takes the points reported by an ajax.php reply (e.g. entry_insert)."""
+        points = str(data.get("points", "")).replace(",", "")
+        if points.isdigit():
+            self.points, self.points_at = int(points), time.time()
+
+    def invalidate_points(self):
+        """Forgets the cached points: the next `get_points` asks the server."""
+        self.points, self.points_at = None, 0.0
+
+    def get_points(self, max_age: float = POINTS_MAX_AGE) -> int:
+        """
+        Current points of the account.
+
+        Args:
+            max_age (float): Seconds a cached value stays valid.
+
+        Returns:
+            int: Points (0 if they could not be fetched).
+        """
+        cached = self.cached_points(max_age)
+        if cached is not None:
+            return cached
+        log.debug(f"Fetching current points of '{self.name}'...")
+        with use(self):
+            resp = http_client.get(BASE_URL)
+        return self.points_from_homepage(resp)
+
+    def cached_points(self, max_age: float = POINTS_MAX_AGE) -> int | None:
+        """Points observed less than `max_age` seconds ago, None if the homepage must be asked."""
+        if self.points is not None and time.time() - self.points_at <= max_age:
+            return self.points
+        return None
+
+    def points_from_homepage(self, resp) -> int:
+        """
+        Points after a homepage request (the response hook already observed it,
+        unless it was served from the HTTP cache).
+
+        Returns:
+            int: Points (last known or 0 if the request failed).
+        """
+        if resp.status_code != 200:
+            log.error(f"Failed to fetch current points: {resp.status_code} - {resp.text[:200]}")
+            return self.points or 0
+        if resp.headers.get("X-Cache") == "HIT":
+            self.observe_page(html_extract.parse_page(resp.text, fields=OBSERVED_FIELDS))
+        if self.points is None:
+            log.warning("Could not find points in the response.")
+            return 0
+        return self.points
+
+
+# conta "default" do modo de uma só conta (usa os globals acima)
+default_state = SessionState("default", session=session, fsr=fsr, cache_path=SESSION_CACHE_FILE or None)
+_current: ContextVar[SessionState | None] = ContextVar("sg_session_state", default=None)
+
+
+def current() -> SessionState:
+    """Session state of the account in the current context (default account otherwise)."""
+    return _current.get() or default_state
+
+
+@contextmanager
+def use(state: SessionState):
+    """Runs the block as `state`'s account: http_client, cookies and XSRF token follow it."""
+    token = _current.set(state)
+    try:
+        with http_client.use_session(state.session):
+            yield state
+    finally:
+        _current.reset(token)
+
+
+def harvest_clearance(solution: dict, s: requests.Session | None = None):
+    """
+    Copies the cookies (cf_clearance, PHPSESSID...) and user agent of a
+    FlareSolverr solution into the session (current account's by default),
+    so the following requests pass Cloudflare without the browser.
+    """
+    set_session_cookies(s or current().session, solution.get("cookies", []), solution.get("userAgent"))
+
+
+def set_session_cookies(s: requests.Session, cookies: list[dict], user_agent: str | None = None):
+    """
+    Sets cookies given as {"name", "value", "domain"?, "path"?} (FlareSolverr
+    and session cache format) and the user agent on a session.
+    """
+    for c in cookies:
+        s.cookies.set(c["name"], c["value"], domain=c.get("domain", ""), path=c.get("path", "/"))
+    if user_agent:
+        # cf_clearance só é válido com o mesmo user agent
+        s.headers["User-Agent"] = user_agent
 
 
 def fsr_request(url, retries=5, delay=2):
+    state = current()
     for i in range(retries):
         try:
-            payload = {"cmd": "request.get", "url": url, "maxTimeout": 60000}
-            resp = requests.post(FLARESOLVERR_URL, json=payload)
-            resp.raise_for_status()
-            return resp.json()["solution"]["response"]
+            solution = state.fsr.request(url, cookies=state.cookies)
+            harvest_clearance(solution, state.session)
+            return solution["response"]
         except requests.ConnectionError:
             if i < retries - 1:
                 log.warning(f"FlareSolverr not ready, retrying in {delay}s...")
@@ -26,20 +295,137 @@ def fsr_request(url, retries=5, delay=2):
             else:
                 raise
 
+def is_challenge(resp: requests.Response) -> bool:
+    """True if Cloudflare answered with a challenge instead of the page."""
+    return resp.status_code in (403, 503) and ("cf-mitigated" in resp.headers or "Just a moment" in resp.text)
+
 def init_session(local=False):
-    log.info("Initializing session via FlareSolverr...")
     global cookies, xsrf_token
 
     cookies = get_cookies(local=local)
-    # Adicionar cookies iniciais à sessão (opcional)
-    session.cookies.update(cookies)
+    default_state.cookies = cookies
+    init_state(default_state)
+    xsrf_token = default_state.xsrf_token
+
+def _cookies_fingerprint(cookies: dict) -> str:
+    return hashlib.sha256(json.dumps(cookies, sort_keys=True).encode()).hexdigest()[:16]
+
+def load_session_cache(state: SessionState) -> dict | None:
+    """
+    Session saved by a previous run of the account (cookie jar, user agent,
+    XSRF token, last validation), if it was built from the same cookies
+    (new COOKIES = new login, the saved one is ignored).
+    """
+    if not state.cache_path or not os.path.exists(state.cache_path):
+        return None
+    try:
+        with open(state.cache_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        log.warning(f"Ignoring unreadable session cache {state.cache_path}: {e}")
+        return None
+    if data.get("source") != _cookies_fingerprint(state.cookies):
+        log.info(f"Session cache of '{state.name}' was built from other cookies, ignoring it.")
+        return None
+    return data
+
+def save_session_cache(state: SessionState):
+    """Atomically saves the account's session (only readable by the owner: it holds the cookies)."""
+    if not state.cache_path or not state.xsrf_token:
+        return
+    data = {
+        "source": _cookies_fingerprint(state.cookies),
+        "cookies": [{"name": c.name, "value": c.value, "domain": c.domain, "path": c.path} for c in state.session.cookies],
+        "user_agent": state.session.headers.get("User-Agent"),
+        "xsrf_token": state.xsrf_token,
+        "validated_at": state.validated_at,
+    }
+    with atomic_open(state.cache_path, prefix=".session-", mode=0o600) as f:
+        json.dump(data, f)
+
+_cached_states: list[SessionState] = []
+
+def _save_session_caches():
+    # cookies renovados durante a execução (Set-Cookie do PHPSESSID...) ficam para a próxima
+    for state in _cached_states:
+        try:
+            save_session_cache(state)
+        except OSError as e:
+            log.warning(f"Could not save the session of '{state.name}': {e}")
+
+atexit.register(_save_session_caches)
+
+def init_state(state: SessionState):
+    """
+    Logs an account's session in and gets the XSRF token.
+
+    A session saved by a previous run (`state.cache_path`) is restored and
+    validated by the homepage request; FlareSolverr is only used if that
+    direct request fails, and the result is saved for the next run.
+    """
+    cached = load_session_cache(state)
+    set_session_cookies(state.session, *login_cookies(state, cached))
+
+    with use(state):
+        # Tentar primeiro sem browser (cookies + cf_clearance já na sessão)
+        page = check_login(state, http_client.get(BASE_URL), cached)
+        if page is None:
+            if cached:
+                # a sessão guardada já não vale: recomeçar dos cookies de origem
+                state.session.cookies.clear()
+                set_session_cookies(state.session, *login_cookies(state))
+            page = fsr_login(state, fsr_request(BASE_URL))
+    finish_login(state, page)
+
+# Passos do login partilhados com async_core.init_session (só o transporte muda)
+
+def login_cookies(state: SessionState, cached: dict | None = None) -> tuple[list[dict], str | None]:
+    """Cookies ({"name", "value", ...}) and user agent to start from: the saved session's, else the account's."""
+    if cached:
+        return cached.get("cookies", []), cached.get("user_agent")
+    return [{"name": k, "value": v} for k, v in state.cookies.items()], None
+
+def check_login(state: SessionState, resp, cached: dict | None = None) -> html_extract.PageInfo | None:
+    """
+    Checks the direct homepage request of a login.
+
+    Returns:
+        PageInfo | None: The page if the session is logged in, None if FlareSolverr is needed.
+
+    Raises:
+        requests.HTTPError: On a 429 (FlareSolverr would be throttled too).
+    """
+    page = html_extract.parse_page(resp.text, fields=("xsrf_token",)) if resp.status_code == 200 else None
+    if page and page.xsrf_token:
+        if cached:
+            age = time.time() - cached.get("validated_at", 0)
+            log.info(f"Session '{state.name}' restored from {state.cache_path} (validated {age / 60:.0f} min ago), FlareSolverr skipped.")
+        else:
+            log.info(f"Session '{state.name}' initialized without FlareSolverr.")
+        return page
+    if resp.status_code == 429:
+        resp.raise_for_status()
+    reason = "Cloudflare challenge" if is_challenge(resp) else f"status {resp.status_code}"
+    log.info(f"Direct request failed ({reason}). Initializing session '{state.name}' via FlareSolverr...")
+    return None
 
-    # Pegar XSRF token usando FlareSolverr
-    html = fsr_request(BASE_URL)
-    xsrf_token_value = html.split('name="xsrf_token" value="')[1].split('"')[0]
-    xsrf_token = xsrf_token_value
+def fsr_login(state: SessionState, html: str) -> html_extract.PageInfo:
+    """Reads the homepage solved by FlareSolverr (it does not go through the session hooks)."""
+    page = html_extract.parse_page(html, fields=OBSERVED_FIELDS)
+    state.observe_page(page)
+    log.info(f"Session '{state.name}' initialized via FlareSolverr.")
+    return page
 
-    log.info("Session initialized via FlareSolverr.")
+def finish_login(state: SessionState, page: html_extract.PageInfo):
+    """Keeps the XSRF token of a login and saves the session for the next run."""
+    if not page.xsrf_token:
+        raise RuntimeError(f"XSRF token not found for session '{state.name}' (not logged in?)")
+    state.xsrf_token = page.xsrf_token
+    state.validated_at = time.time()
+    if state.cache_path:
+        save_session_cache(state)
+        if not any(s is state for s in _cached_states):
+            _cached_states.append(state)
 
 def get_cookies(local=False, path_json=COOKIES_PATH):
     if local:
@@ -57,4 +443,4 @@ def get_xsrf_token():
     resp.raise_for_status()
 
     log.info("Fetched XSRF token.")
-    return resp.text.split('name="xsrf_token" value="')[1].split('"')[0]
\ No newline at end of file
+    return html_extract.parse_page(resp.text, fields=("xsrf_token",)).xsrf_token
\ No newline at end of file
@@ -1,7 +1,6 @@
-import requests
 import pickle
 import os
-from bs4 import BeautifulSoup
+from src import html_extract, http_client
 
 COOKIES_PATH = os.path.join("cookies", "steamgifts.pkl")
 BASE_URL = "https://www.steamgifts.com"
@@ -13,13 +12,13 @@ def load_cookies():
 def check_login():
     cookies = load_cookies()
     headers = {"User-Agent": "Mozilla/5.0"}
-    resp = requests.get(BASE_URL, cookies=cookies, headers=headers)
+    resp = http_client.get(BASE_URL, cookies=cookies, headers=headers)
 
-    soup = BeautifulSoup(resp.text, "html.parser")
-    user_link = soup.find("a", class_="nav__avatar")
-    if user_link:
-        print("✅ Login válido como:", user_link["href"])
+    page = html_extract.parse_page(resp.text, fields=("username",))
+    if page.username:
+        print("✅ Login válido como:", f"/user/{page.username}")
     else:
         print("❌ Não estás logado. Precisas gravar os cookies novamente.")
 
-check_login()
+if __name__ == "__main__":
+    check_login()
@@ -0,0 +1,176 @@
+# streaming.py
+"""
+Streaming fetch → filter → join pipeline (`--stream`).
+
+A producer thread pulls listing pages from `get_giveaways.iter_giveaway_pages`
+as they arrive, turns them into `Giveaway` objects, drops the ones we can't
+or don't want to enter and puts the rest on a bounded queue (a full queue
+blocks the producer: backpressure). The consumer keeps a bounded heap of
+candidates (same order as the batch mode: highest `score` first) and,
+once it is full, joins the best one for every new candidate that arrives, so
+joining starts after the first page while the next ones are still
+downloading. Candidates ending within `STREAM_URGENT` seconds skip the buffer
+and are joined right away. The points budget is enforced as it goes.
+
+The catalog is written once, after the last page.
+"""
+import contextvars
+import heapq
+import queue
+import threading
+import time
+from dataclasses import dataclass
+
+import src.session_manager as sm
+from src import get_giveaways, join_giveaways, owned_apps, scoring
+from src.config import STREAM_BUFFER, STREAM_URGENT
+from src.models import Giveaway, Giveaways
+from utils import metrics
+from utils.backend import filter_giveaways
+from utils.logger import log
+from utils.storage import jm
+
+_DONE = object()  # fim da produção
+
+
+@dataclass
+class StreamResult:
+    catalog: Giveaways | None = None
+    candidates: int = 0
+    joined: int = 0
+    points: int = 0
+    points_left: int = 0
+    first_join_s: float | None = None
+
+
+def _produce(max_pages: int, concurrency: int, out: queue.Queue, catalog: dict, budget: int, stop: threading.Event, errors: list):
+    seen = set()
+    owned = owned_apps.current()
+    try:
+        for page, raw in get_giveaways.iter_giveaway_pages(max_pages, max(1, concurrency)):
+            if stop.is_set():
+                break
+            fresh = []
+            for data in raw:
+                if data.get("id") in seen:
+                    log.debug(f"Duplicate giveaway {data.get('id')} skipped (pagination shifted).")
+                    continue
+                seen.add(data.get("id"))
+                g = Giveaway.from_dict(data)
+                catalog[str(g.id)] = g
+                fresh.append(g)
+
+            get_giveaways.carry_flags(fresh)  # sem reentrar nos já joined/owned
+            now = time.time()
+            scoring.score_giveaways(fresh, now=now)  # prioridade do heap, como no modo batch
+            for g in owned.filter(filter_giveaways(fresh, max_points=budget, now=now)):
+                if g.end_timestamp <= now:
+                    continue
+                # put bloqueia com a fila cheia; acordar de vez em quando para ver o stop
+                while not stop.is_set():
+                    try:
+                        out.put(g, timeout=0.5)
+                        break
+                    except queue.Full:
+                        continue
+            log.debug(f"Page {page} streamed ({len(fresh)} giveaways)")
+    except Exception as e:
+        errors.append(e)
+    finally:
+        while True:
+            try:
+                out.put(_DONE, timeout=0.5)
+                break
+            except queue.Full:
+                if stop.is_set():  # o consumidor já desistiu
+                    break
+
+
+def stream_and_join(
+    max_pages=5,
+    concurrency=1,
+    points: int | None = None,
+    buffer_size=STREAM_BUFFER,
+) -> StreamResult:
+    """
+    Fetches the listing and joins giveaways while the pages are still downloading.
+
+    Args:
+        max_pages (int): Number of pages to fetch, -1 for all pages.
+        concurrency (int): Maximum number of pages fetched at the same time.
+        points (int|None): Points budget. Fetched from SteamGifts if None.
+        buffer_size (int): Maximum number of candidates held between fetch and join.
+
+    Returns:
+        StreamResult: Written catalog, number of candidates, joins and points left.
+    """
+    start = time.perf_counter()
+    if points is None:
+        points = join_giveaways.get_current_points()
+    log.info(f"🌊 Streaming up to {max_pages if max_pages != -1 else 'all'} pages with {points}p (buffer={buffer_size})")
+
+    # metade do buffer na fila (backpressure no produtor), metade no heap de prioridade
+    pending: queue.Queue = queue.Queue(maxsize=max(1, buffer_size // 2))
+    heap: list[tuple[float, int, Giveaway]] = []
+    heap_cap = max(1, buffer_size - pending.maxsize)
+    catalog: dict[str, Giveaway] = {}
+    stop = threading.Event()
+    errors: list[Exception] = []
+    producer = threading.Thread(
+        target=contextvars.copy_context().run,
+        args=(_produce, max_pages, concurrency, pending, catalog, points, stop, errors),
+        name="sg-stream",
+        daemon=True,
+    )
+    producer.start()
+
+    result = StreamResult(points=points, points_left=points)
+
+    def try_join(g: Giveaway):
+        if result.points_left <= 0:
+            return  # sem pontos: só escoar a fila até o fetch acabar
+        if g.points > result.points_left or g.end_timestamp <= time.time():
+            return
+        state = sm.current()
+        if join_giveaways.join_giveaway(g, cookies=state.cookies):
+            result.points_left -= g.points
+            result.joined += 1
+            if result.first_join_s is None:
+                result.first_join_s = time.perf_counter() - start
+                metrics.observe("time_to_first_join", result.first_join_s)
+                log.info(f"⚡ First join after {result.first_join_s:.2f}s")
+            if result.points_left <= 0:
+                log.warning("⚠️ No points left. Fetch continues, joining stops.")
+        elif state.points is None:
+            result.points_left = state.get_points()  # join recusado por falta de pontos
+
+    seq = 0
+    producing = True
+    try:
+        while producing or heap:
+            # encher o buffer; quando está cheio sai o melhor candidato por cada um que entra
+            while producing and len(heap) < heap_cap:
+                item = pending.get()
+                if item is _DONE:
+                    producing = False
+                    break
+                result.candidates += 1
+                if item.end_timestamp - time.time() <= STREAM_URGENT:
+                    try_join(item)  # acaba em breve: não espera no buffer
+                    continue
+                seq += 1
+                heapq.heappush(heap, (-item.score, seq, item))  # heapq é min-heap: maior score primeiro
+            if heap:
+                try_join(heapq.heappop(heap)[2])
+    finally:
+        stop.set()
+        producer.join()
+
+    if errors:
+        raise errors[0]
+
+    result.catalog = Giveaways(time_fetched=int(time.time()), results_count=len(catalog), giveaways=catalog)
+    jm.write(result.catalog)
+    log.info(f"✅ Total giveaways fetched: {len(catalog)}")
+    log.info(f"🎯 Total giveaways joined: {result.joined}/{result.candidates} streamed candidates, {result.points_left}p left")
+    return result
@@ -0,0 +1,47 @@
+# conftest.py
+"""
+Points the bot at the stand-in server (benchmarks/standin_server.py) and a
+temporary data directory. `src.config` reads the environment at import time,
+so this runs in `pytest_configure`, before any test module imports `src`.
+"""
+import json
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from benchmarks.standin_server import StandinServer
+
+POINTS = 400
+_server: StandinServer | None = None
+_data_dir: str | None = None
+
+
+def pytest_configure(config):
+    global _server, _data_dir
+    _server = StandinServer(pages=2, latency=0.0, points=POINTS).__enter__()
+    _data_dir = tempfile.mkdtemp(prefix="sg-tests-")
+    os.environ.update({
+        "SG_BASE_URL": _server.base_url,
+        "FLARESOLVERR_URL": f"{_server.base_url}/v1",
+        "SG_DATA_DIR": _data_dir,
+        "COOKIES": json.dumps({"PHPSESSID": "standin"}),
+        "HTTP_CACHE": "0",
+        "HTTP_RETRIES": "0",
+        "RATE_LIMIT": "0",
+    })
+
+
+def pytest_unconfigure(config):
+    if _server is not None:
+        _server.__exit__(None, None, None)
+    if _data_dir is not None:
+        shutil.rmtree(_data_dir, ignore_errors=True)
+
+
+@pytest.fixture
+def standin() -> StandinServer:
+    # joins de um teste não podem deixar o seguinte sem pontos
+    _server.state.points = POINTS
+    return _server
@@ -0,0 +1,55 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import requests
+
+from src import accounts, rate_limiter
+import src.session_manager as sm
+
+
+def test_share_clearance_copies_only_cf_clearance_and_user_agent():
+    own = requests.Session()
+    own.cookies.set("cf_clearance", "clear", domain="www.steamgifts.com")
+    own.cookies.set("PHPSESSID", "secret", domain="www.steamgifts.com")
+    own.headers["User-Agent"] = "Browser/1.0"
+    shared = sm.default_state.session
+    saved_cookies, saved_ua = shared.cookies.copy(), shared.headers.get("User-Agent")
+    try:
+        shared.cookies.clear()
+        accounts.share_clearance(SimpleNamespace(state=SimpleNamespace(session=own)))
+
+        assert shared.cookies.get("cf_clearance") == "clear"
+        assert "PHPSESSID" not in shared.cookies
+        assert shared.headers["User-Agent"] == "Browser/1.0"
+    finally:
+        shared.cookies = saved_cookies
+        shared.headers["User-Agent"] = saved_ua
+
+
+def test_account_limiter_caps_concurrency_over_the_shared_limiter():
+    shared = rate_limiter.RateLimiter({"default": (0, 8)}, enabled=True)
+    account = rate_limiter.AccountLimiter(shared, concurrency=2)
+    peak, in_flight, lock = 0, 0, threading.Lock()
+
+    def request():
+        nonlocal peak, in_flight
+        slot = account.acquire("detail")
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.02)
+        with lock:
+            in_flight -= 1
+        slot.release(200)
+
+    threads = [threading.Thread(target=request) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert peak == 2
+    # o estado (AIMD, bloqueios) é o do limiter partilhado
+    assert shared.endpoint("detail").in_flight == 0
+    assert account.stats() == shared.stats()
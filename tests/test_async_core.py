@@ -0,0 +1,120 @@
+import asyncio
+import os
+import urllib.error
+import urllib.request
+
+import requests
+
+import src.session_manager as sm
+from src import async_core, rate_limiter
+
+
+class UrllibTransport(async_core.FetchTransport):
+    """The Workers transport with urllib in place of the runtime's fetch()."""
+
+    async def fetch(self, method, url, headers, body, timeout):
+        req = urllib.request.Request(url, data=body.encode() if body is not None else None, method=method, headers=headers)
+
+        def send():
+            try:
+                resp = urllib.request.urlopen(req, timeout=timeout)
+            except urllib.error.HTTPError as e:
+                resp = e
+            return resp.status, resp.read().decode(), resp.url, dict(resp.headers), resp.headers.get_all("Set-Cookie") or []
+
+        return await asyncio.to_thread(send)
+
+
+def make_client(tmp_path) -> async_core.AsyncClient:
+    state = sm.SessionState("async", cookies={"PHPSESSID": "standin"}, session=requests.Session(),
+                            cache_path=str(tmp_path / "session.json"))
+    return async_core.AsyncClient(UrllibTransport(), state)
+
+
+def test_init_session_uses_flaresolverr_once_then_the_saved_session(standin, tmp_path):
+    standin.state.challenge = True
+    try:
+        before = standin.state.requests["flaresolverr"]
+        client = make_client(tmp_path)
+        asyncio.run(async_core.init_session(client))
+        assert client.state.xsrf_token
+        assert standin.state.requests["flaresolverr"] > before
+        assert (tmp_path / "session.json").exists()
+
+        before = standin.state.requests["flaresolverr"]
+        client = make_client(tmp_path)
+        asyncio.run(async_core.init_session(client))
+        assert client.state.xsrf_token
+        assert standin.state.requests["flaresolverr"] == before
+    finally:
+        standin.state.challenge = False
+
+
+def test_async_cycle_joins(standin, tmp_path):
+    import main
+
+    client = make_client(tmp_path)
+
+    async def cycle():
+        await async_core.init_session(client)
+        return await main.run_cycle_async(main.parse_args(["--max-pages", "2", "--report", "", "--metrics-textfile", ""]), client)
+
+    summary = asyncio.run(cycle())
+    assert summary["joined"] > 0
+    assert client.state.points == standin.state.points
+
+
+class ScriptedTransport(async_core.FetchTransport):
+    """The Workers transport answering from a list of replies."""
+
+    def __init__(self, replies, limiter):
+        super().__init__(limiter)
+        self.replies = list(replies)
+        self.in_flight = self.peak = 0
+
+    async def fetch(self, method, url, headers, body, timeout):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return self.replies.pop(0)
+
+
+def test_fetch_transport_goes_through_the_rate_limiter():
+    limiter = rate_limiter.RateLimiter({"default": (0, 1)}, enabled=True)
+    ok = (200, "", "http://sg.test/x", {}, [])
+    transport = ScriptedTransport([(429, "", "http://sg.test/x", {"Retry-After": "0"}, []), ok, ok], limiter)
+    session = requests.Session()
+
+    async def both():
+        return await asyncio.gather(*(transport.request(session, "GET", "http://sg.test/x") for _ in range(2)))
+
+    replies = asyncio.run(both())
+    assert [r.status_code for r in replies] == [200, 200]  # o 429 foi repetido
+    assert transport.peak == 1
+    assert limiter.endpoint("other").throttled == 1
+
+
+def test_worker_cycle_writes_no_files(standin, tmp_path, monkeypatch):
+    import main
+    from utils.json_manager import MemoryManager
+    from utils.storage import use_store
+
+    def files():
+        return {os.path.join(d, f): os.path.getmtime(os.path.join(d, f)) for d, _, fs in os.walk(os.environ["SG_DATA_DIR"]) for f in fs}
+
+    monkeypatch.chdir(tmp_path)
+    before = files()
+    client = make_client(tmp_path)
+    client.state.cache_path = None
+
+    async def cycle():
+        await async_core.init_session(client)
+        return await main.run_cycle_async(main.parse_args(["--max-pages", "2", "--report", "", "--metrics-textfile", ""]), client)
+
+    with use_store(MemoryManager()) as store:
+        summary = asyncio.run(cycle())
+    assert summary["joined"] > 0
+    assert any(g.joined for g in store.get_giveaways().values())
+    assert files() == before
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,25 @@
+import json
+import os
+import stat
+
+from utils.atomic import atomic_open
+
+
+def mode_of(path) -> int:
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_atomic_open_is_world_readable_by_default(tmp_path):
+    path = tmp_path / "metrics.prom"
+    with atomic_open(str(path)) as f:
+        f.write("sg_up 1\n")
+    assert path.read_text() == "sg_up 1\n"
+    assert mode_of(path) == 0o644
+
+
+def test_atomic_open_keeps_secrets_private(tmp_path):
+    path = tmp_path / "session.json"
+    with atomic_open(str(path), mode=0o600) as f:
+        json.dump({"cookies": []}, f)
+    assert mode_of(path) == 0o600
+    assert os.listdir(tmp_path) == ["session.json"]
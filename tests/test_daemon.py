@@ -0,0 +1,18 @@
+from src.daemon import Daemon
+
+
+def test_run_once_runs_a_full_cycle(standin):
+    import main
+    from src.session_manager import init_session
+
+    args = main.parse_args(["--all"])
+    init_session(local=False)
+    daemon = Daemon(run_cycle=lambda: main.run_cycle(args), interval=60, port=0)
+
+    daemon._run_once()
+
+    state = daemon.status()
+    assert state["last_error"] is None
+    assert state["runs"] == 1 and state["failures"] == 0
+    assert state["running"] is False
+    assert state["last_run"]["joined"] > 0
@@ -0,0 +1,43 @@
+from benchmarks.standin_server import make_code
+
+
+def test_sync_stores_new_giveaway_on_a_late_page(standin):
+    """The listing is ordered by end time: a new long giveaway lands after known ones."""
+    from src import get_giveaways
+    from utils.storage import jm
+
+    get_giveaways.sync_giveaways(max_pages=-1, concurrency=1)
+    listing = standin.state.giveaways
+    newest = max(listing, key=lambda g: g["created_timestamp"])
+    late = {
+        **listing[-1],
+        "id": max(g["id"] for g in listing) + 1,
+        "link": f"{standin.base_url}/giveaway/{make_code(len(listing) + 1)}/late",
+        "created_timestamp": newest["created_timestamp"] + 60,
+        "end_timestamp": listing[-1]["end_timestamp"] + 30 * 86400,
+    }
+    listing.append(late)
+    try:
+        synced = get_giveaways.sync_giveaways(max_pages=-1, concurrency=1)
+    finally:
+        listing.remove(late)
+
+    assert str(late["id"]) in synced.giveaways
+    assert jm.get_giveaway(late["id"]) is not None
+
+
+def test_full_fetch_keeps_flags_without_loading_the_catalog(standin, monkeypatch):
+    from src import get_giveaways
+    from utils.storage import jm
+
+    get_giveaways.fetch_giveaways(max_pages=-1, concurrency=1)
+    g = jm.get_giveaway(standin.state.giveaways[0]["id"])
+    g.joined = True
+    jm.update_giveaway(g)
+
+    def full_load():
+        raise AssertionError("full catalog load")
+
+    monkeypatch.setattr(jm.get(), "get_giveaways", full_load)
+    get_giveaways.fetch_giveaways(max_pages=-1, concurrency=1)
+    assert jm.get_giveaway(g.id).joined
@@ -0,0 +1,22 @@
+from src.listing_state import EntryState, ListingScan, apply_listing_states
+from src.models import Giveaway
+
+
+def make_scan(points: int) -> tuple[list[Giveaway], ListingScan]:
+    giveaways = [Giveaway(id=i, name=f"Game {i}", points=p, copies=1, code=f"G{i:04d}") for i, p in enumerate((10, 50, 300))]
+    scan = ListingScan(states={g.code: EntryState(g.code, joined=False) for g in giveaways}, points=points)
+    return giveaways, scan
+
+
+def test_listing_points_filter_candidates():
+    giveaways, scan = make_scan(points=60)
+    joinable, confirmed = apply_listing_states(giveaways, scan)
+    assert [g.points for g in joinable] == [10, 50]
+    assert len(confirmed) == 2
+
+
+def test_schedule_keeps_candidates_above_current_points():
+    giveaways, scan = make_scan(points=60)
+    joinable, confirmed = apply_listing_states(giveaways, scan, check_points=False)
+    assert [g.points for g in joinable] == [10, 50, 300]
+    assert len(confirmed) == 3
@@ -0,0 +1,14 @@
+import gc
+
+from src import models
+from src.models import Creator
+
+
+def test_creators_are_shared_and_released():
+    a = Creator.get(1, "7656", "alice")
+    assert Creator.get(1, "7656", "alice") is a
+    assert (1, "7656", "alice") in models._CREATORS
+
+    del a
+    gc.collect()
+    assert (1, "7656", "alice") not in models._CREATORS
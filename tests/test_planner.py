@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from src.config import POINTS_CAP
+from src.models import Giveaway
+from src.planner import schedule_joins
+
+NOW = 1_700_000_000
+
+
+def make_giveaways(n: int, points, ends_within: float, seed: int = 0, ends_after: float = 600) -> list[Giveaway]:
+    rng = random.Random(seed)
+    return [
+        Giveaway(
+            id=i,
+            name=f"Game {i}",
+            points=points if isinstance(points, int) else rng.choice(points),
+            copies=1,
+            code=f"G{i:04d}",
+            created_timestamp=NOW - 3600,
+            end_timestamp=NOW + int(rng.uniform(ends_after, ends_within)),
+            entry_count=rng.randint(10, 5000),
+        )
+        for i in range(n)
+    ]
+
+
+@pytest.mark.parametrize("candidates, points", [
+    (make_giveaways(30, 50, 48 * 3600, ends_after=25 * 3600), 400),  # nada acaba no horizonte: só joins "cap"
+    (make_giveaways(30, 50, 48 * 3600), 400),
+    (make_giveaways(30, 50, 48 * 3600), 0),
+    (make_giveaways(200, [1, 5, 10, 25, 50, 100], 72 * 3600, seed=1), 400),
+    (make_giveaways(200, [1, 5, 10, 25, 50, 100], 6 * 3600, seed=2), 250),
+])
+def test_schedule_balance_stays_within_cap(candidates, points):
+    plan = schedule_joins(candidates, points, now=NOW, horizon=24 * 3600)
+
+    assert plan.joins
+    for j in plan.joins:
+        assert 0 <= j.points_after <= POINTS_CAP, j
+    assert len({j.giveaway.code for j in plan.joins}) == len(plan.joins)
+
+
+def test_cap_joins_are_charged_against_the_balance():
+    plan = schedule_joins(make_giveaways(30, 50, 48 * 3600, ends_after=25 * 3600), 400, now=NOW, horizon=24 * 3600)
+
+    at_start = [j for j in plan.joins if j.at == NOW]
+    assert sum(j.giveaway.points for j in at_start) <= 400
+
+
+@pytest.mark.parametrize("candidates, points", [
+    (make_giveaways(200, [1, 5, 10, 25, 50, 100], 6 * 3600, seed=2), 250),
+    (make_giveaways(200, [1, 5, 10, 25, 50, 100], 72 * 3600, seed=1), 400),
+    (make_giveaways(30, 50, 48 * 3600, ends_after=25 * 3600), 400),
+])
+def test_joins_are_placed_before_the_giveaway_ends(candidates, points):
+    plan = schedule_joins(candidates, points, now=NOW, horizon=24 * 3600)
+
+    skipped = {g.code for g in plan.skipped}
+    for j in plan.joins:
+        assert j.at < j.giveaway.end_timestamp, j
+        assert j.giveaway.code not in skipped, j
+
+
+def test_due_joins_fit_the_current_balance():
+    plan = schedule_joins(make_giveaways(200, [1, 5, 10, 25, 50, 100], 6 * 3600, seed=2), 250, now=NOW, horizon=24 * 3600)
+
+    due = plan.due(NOW + 6 * 3600, budget=250)
+    assert len(due) < len(plan.due(NOW + 6 * 3600))
+    assert sum(j.giveaway.points for j in due) <= 250
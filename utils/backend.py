@@ -0,0 +1,117 @@
+# backend.py
+"""Interface shared by the giveaway catalog storage backends."""
+import time
+from abc import ABC, abstractmethod
+from typing import Iterable
+
+from src.models import Giveaway, Giveaways
+
+
+def filter_giveaways(
+    giveaways: Iterable[Giveaway],
+    min_points=0,
+    max_points=None,
+    timeframe=None,
+    now=None,
+    exclude_joined=True,
+) -> list[Giveaway]:
+    """
+    Filters giveaways in memory by points range, timeframe and joined/owned state.
+
+    Args:
+        giveaways (Iterable[Giveaway]): Giveaways to filter.
+        min_points (int): Minimum points.
+        max_points (int|None): Maximum points.
+        timeframe (int|None): Keep only giveaways ending within this many seconds.
+        now (float|None): Reference timestamp. Defaults to time.time().
+        exclude_joined (bool): Drop giveaways already joined or owned.
+
+    Returns:
+        list[Giveaway]: Giveaways matching every filter.
+    """
+    now = time.time() if now is None else now
+    filtered = []
+    for g in giveaways:
+        if g.points < min_points:
+            continue
+        if max_points is not None and g.points > max_points:
+            continue
+        if timeframe is not None and (g.end_timestamp - now) > timeframe:
+            continue
+        if exclude_joined and (g.joined or g.owned):
+            continue
+        filtered.append(g)
+    return filtered
+
+
+class StorageBackend(ABC):
+    """Interface of a giveaway catalog store."""
+
+    @abstractmethod
+    def get_giveaways(self) -> dict[str, Giveaway]:
+        ...
+
+    @abstractmethod
+    def get_giveaway(self, giveaway_id: int) -> Giveaway | None:
+        ...
+
+    @abstractmethod
+    def write(self, data: Giveaways | dict) -> None:
+        ...
+
+    @abstractmethod
+    def update_giveaway(self, giveaway: Giveaway):
+        ...
+
+    @abstractmethod
+    def merge_giveaways(self, new_giveaways: list[Giveaway]) -> int:
+        """
+        Upserts giveaways, keeping the stored joined/owned flags.
+
+        Only records that actually changed are persisted.
+
+        Returns:
+            int: Number of records inserted or changed.
+        """
+
+    @abstractmethod
+    def cleanup_expired(self, now: float):
+        ...
+
+    @abstractmethod
+    def get_meta(self, key: str) -> str | None:
+        """Returns a value stored next to the catalog (sync state...)."""
+
+    @abstractmethod
+    def set_meta(self, key: str, value: str) -> None:
+        ...
+
+    def get_flags(self, ids: Iterable[int]) -> dict[str, tuple[bool, bool]]:
+        """
+        Returns the stored (joined, owned) flags of the given giveaway ids.
+
+        Ids not in the store are left out.
+        """
+        flags = {}
+        for gid in ids:
+            g = self.get_giveaway(gid)
+            if g is not None:
+                flags[str(gid)] = (g.joined, g.owned)
+        return flags
+
+    def compact(self) -> None:
+        """Flushes pending writes. No-op for backends that write in place."""
+
+    def query_giveaways(self, min_points=0, max_points=None, timeframe=None, now=None, exclude_joined=True) -> list[Giveaway]:
+        """Returns the giveaways matching the filters (see `filter_giveaways`)."""
+        from src.ranking import rank_giveaways  # vetorizado com NumPy quando disponível
+
+        return rank_giveaways(
+            self.get_giveaways().values(),
+            by=(),
+            min_points=min_points,
+            max_points=max_points,
+            timeframe=timeframe,
+            now=now,
+            exclude_joined=exclude_joined,
+        )
@@ -1,32 +1,50 @@
-from ast import List
-from dataclasses import dataclass 
+from dataclasses import dataclass, field
 from pathlib import Path
 import json
+import os
+from src.config import JOURNAL_COMPACT_EVERY
 from src.models import Giveaway, Giveaways
+from utils import metrics
+from utils.atomic import atomic_open
 from utils.logger import log
+from utils.backend import StorageBackend
 
 
 @dataclass
-class JsonManager():
-    """docstring for JsonManager."""
+class JsonManager(StorageBackend):
+    """
+    JSON snapshot of the catalog plus an append-only journal.
+
+    Single-record updates are appended to `<file>.journal` instead of
+    rewriting the whole snapshot. The journal is replayed on load and folded
+    back into the snapshot by `compact()` (every `compact_every` entries, or
+    explicitly at the end of a run).
+    """
     
     file: str
+    compact_every: int = JOURNAL_COMPACT_EVERY
+    journal_file: str = field(init=False)
     
     def __post_init__(self):
+        self.journal_file = f"{self.file}.journal"
+        self._journal_entries = 0
+        self.meta: dict[str, str] = {}
         path = Path(self.file)
         if path.exists():
             self.giveaways_obj = self._read()
         else:
+            # o ficheiro só é criado na primeira escrita
             self.giveaways_obj = Giveaways(
                 giveaways={},
                 time_fetched=0,
                 results_count=0
             )
-            self.write(self.giveaways_obj)
+        self._replay_journal()
     
     def _read(self) -> Giveaways:
         with open(self.file, "r", encoding="utf-8") as f:
             data = json.load(f)
+            self.meta = data.get("meta", {})
             return Giveaways.from_dict(data)
         
     def get_giveaways(self) -> dict[str, Giveaway]:
@@ -41,24 +59,112 @@ class JsonManager():
         return None
         
     def write(self, data: Giveaways | dict) -> None:
-        with open(self.file, "w", encoding="utf-8") as f:
-            if isinstance(data, Giveaways):
-                json.dump(data.to_dict(), f, indent=4, ensure_ascii=False)
-            else:
-                json.dump(data, f, indent=4, ensure_ascii=False)
+        """
+        Atomically replaces the snapshot and truncates the journal.
+
+        The data is written to a temporary file in the same directory, fsynced
+        and moved over the snapshot with `os.replace`, so a crash never leaves
+        a half-written catalog behind.
+        """
+        with metrics.span("json_write"):
+            self._write(data)
+
+    def _write(self, data: Giveaways | dict) -> None:
+        if isinstance(data, Giveaways):
+            self.giveaways_obj = data
+            data = data.to_dict()
+        if self.meta:
+            data = {**data, "meta": self.meta}
+
+        with atomic_open(self.file, prefix=".giveaways-", fsync=True) as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+
+        # o snapshot já contém tudo o que estava no journal
+        if os.path.exists(self.journal_file):
+            os.remove(self.journal_file)
+        self._journal_entries = 0
     
+    def _append_journal(self, *records: dict) -> None:
+        """Appends records to the journal with a single fsync."""
+        if not records:
+            return
+        with metrics.span("json_journal_append"), open(self.journal_file, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n" for r in records))
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_entries += len(records)
+
+        if self.compact_every and self._journal_entries >= self.compact_every:
+            self.compact()
+
+    def _replay_journal(self) -> None:
+        """Applies journal records written after the last snapshot."""
+        if not os.path.exists(self.journal_file):
+            return
+
+        applied = 0
+        with open(self.journal_file, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # última linha truncada por um crash a meio da escrita
+                    log.warning(f"Ignoring corrupt journal record in {self.journal_file}")
+                    continue
+                if record.get("op") == "put":
+                    self.giveaways_obj.giveaways[str(record["id"])] = Giveaway.from_dict(record["data"])
+                elif record.get("op") == "meta":
+                    self.meta[record["key"]] = record["value"]
+                applied += 1
+
+        self._truncate_partial_record()
+        self._journal_entries = applied
+        if applied:
+            log.debug(f"Replayed {applied} journal records from {self.journal_file}")
+
+    def _truncate_partial_record(self) -> None:
+        """Drops a trailing record without newline so new appends start on a clean line."""
+        with open(self.journal_file, "rb+") as f:
+            content = f.read()
+            if content and not content.endswith(b"\n"):
+                f.truncate(content.rfind(b"\n") + 1)
+
+    def compact(self) -> None:
+        """Folds the journal into the snapshot."""
+        if self._journal_entries or os.path.exists(self.journal_file):
+            log.debug(f"Compacting {self._journal_entries} journal records into {self.file}")
+            self.write(self.giveaways_obj)
+
     def update_giveaway(self, giveaway: Giveaway):
         self.giveaways_obj.giveaways[str(giveaway.id)] = giveaway
-        self.write(self.giveaways_obj)
+        self._append_journal({"op": "put", "id": str(giveaway.id), "data": giveaway.to_dict()})
         
-    def merge_giveaways(self, new_giveaways: list[Giveaway]):
+    def merge_giveaways(self, new_giveaways: list[Giveaway]) -> int:
+        # só os registos novos ou alterados vão para o journal
+        dirty = []
         for g in new_giveaways:
             old = self.giveaways_obj.giveaways.get(str(g.id))
             if old:
                 g.joined = g.joined or old.joined
                 g.owned = g.owned or old.owned
+                if g == old:
+                    continue
             self.giveaways_obj.giveaways[str(g.id)] = g
-        self.write(self.giveaways_obj)
+            dirty.append(g)
+        self._append_journal(*({"op": "put", "id": str(g.id), "data": g.to_dict()} for g in dirty))
+        return len(dirty)
+
+    def get_meta(self, key: str) -> str | None:
+        return self.meta.get(key)
+
+    def set_meta(self, key: str, value: str) -> None:
+        if self.meta.get(key) == value:
+            return
+        self.meta[key] = value
+        self._append_journal({"op": "meta", "key": key, "value": value})
 
     def cleanup_expired(self, now: float):
         before = len(self.giveaways_obj.giveaways)
@@ -70,5 +176,27 @@ class JsonManager():
         self.write(self.giveaways_obj)
         log.info(f"🧹 Cleanup: removidos {before - after} giveaways expirados.")
 
-from src.config import DATA_FILE
-jm = JsonManager(DATA_FILE)
\ No newline at end of file
+
+@dataclass
+class MemoryManager(JsonManager):
+    """
+    Catalog kept in memory only, for runtimes without a persistent disk (the
+    Cloudflare Worker): nothing is read from or written to files.
+    """
+
+    file: str = ""
+
+    def __post_init__(self):
+        self.journal_file = ""
+        self._journal_entries = 0
+        self.meta: dict[str, str] = {}
+        self.giveaways_obj = Giveaways(giveaways={}, time_fetched=0, results_count=0)
+
+    def _write(self, data: Giveaways | dict) -> None:
+        self.giveaways_obj = data if isinstance(data, Giveaways) else Giveaways.from_dict(data)
+
+    def _append_journal(self, *records: dict) -> None:
+        pass
+
+    def compact(self) -> None:
+        pass
@@ -0,0 +1,192 @@
+# utils/metrics.py
+"""
+Run instrumentation: phase spans, per-endpoint HTTP latency histograms,
+status-code counters and bytes transferred.
+
+Everything is recorded twice: in `process` (cumulative, what the Prometheus
+exporter shows in --daemon mode) and in `run` (reset by `new_run()` at the
+start of every cycle, used for the JSON run report).
+"""
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from utils.atomic import atomic_open
+
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # último = +Inf
+        self.total = 0.0
+        self.n = 0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += value
+        self.n += 1
+        self.max = max(self.max, value)
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.n,
+            "sum": round(self.total, 6),
+            "avg": round(self.total / self.n, 6) if self.n else 0.0,
+            "max": round(self.max, 6),
+        }
+
+
+class Registry:
+    def __init__(self):
+        self.started_at = time.time()
+        self.spans: dict[str, Histogram] = defaultdict(Histogram)
+        self.latency: dict[str, Histogram] = defaultdict(Histogram)
+        self.status: dict[tuple[str, str], int] = defaultdict(int)
+        self.bytes: dict[str, int] = defaultdict(int)
+        self.counters: dict[str, float] = defaultdict(float)
+        self.limiter_wait: dict[str, Histogram] = defaultdict(Histogram)
+
+    def to_dict(self) -> dict:
+        return {
+            "started_at": self.started_at,
+            "duration": round(time.time() - self.started_at, 3),
+            "spans": {name: h.to_dict() for name, h in self.spans.items()},
+            "http": {
+                endpoint: {
+                    **h.to_dict(),
+                    "bytes": self.bytes.get(endpoint, 0),
+                    "status": {s: n for (e, s), n in self.status.items() if e == endpoint},
+                }
+                for endpoint, h in self.latency.items()
+            },
+            "ratelimit_wait": {endpoint: h.to_dict() for endpoint, h in self.limiter_wait.items()},
+            "counters": dict(self.counters),
+        }
+
+
+_lock = threading.Lock()
+process = Registry()
+run = Registry()
+
+
+def new_run() -> Registry:
+    """Starts a fresh per-run registry (the process one keeps accumulating)."""
+    global run
+    with _lock:
+        run = Registry()
+    return run
+
+
+def _registries():
+    return (process, run)
+
+
+@contextmanager
+def span(name: str):
+    """Times a phase: `with metrics.span("fetch"): ...`"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with _lock:
+            for reg in _registries():
+                reg.spans[name].observe(elapsed)
+
+
+def observe(name: str, seconds: float):
+    """Records a duration measured outside a `span` (e.g. time to first join)."""
+    with _lock:
+        for reg in _registries():
+            reg.spans[name].observe(seconds)
+
+
+def observe_request(endpoint: str, status: int | str, seconds: float, nbytes: int):
+    with _lock:
+        for reg in _registries():
+            reg.latency[endpoint].observe(seconds)
+            reg.status[(endpoint, str(status))] += 1
+            reg.bytes[endpoint] += nbytes
+
+
+def observe_limiter_wait(endpoint: str, seconds: float):
+    with _lock:
+        for reg in _registries():
+            reg.limiter_wait[endpoint].observe(seconds)
+
+
+def inc(name: str, value: float = 1):
+    with _lock:
+        for reg in _registries():
+            reg.counters[name] += value
+
+
+def run_report() -> dict:
+    with _lock:
+        return run.to_dict()
+
+
+def to_prometheus(reg: Registry | None = None) -> str:
+    """Prometheus text exposition format of a registry (default: process)."""
+    reg = reg or process
+    lines = []
+
+    def histogram(metric: str, help_text: str, label: str, data: dict[str, Histogram]):
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} histogram")
+        for key, h in sorted(data.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS, h.counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{{label}="{key}",le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{{label}="{key}",le="+Inf"}} {h.n}')
+            lines.append(f'{metric}_sum{{{label}="{key}"}} {h.total:.6f}')
+            lines.append(f'{metric}_count{{{label}="{key}"}} {h.n}')
+
+    with _lock:
+        histogram("sg_phase_duration_seconds", "Duration of each run phase.", "phase", reg.spans)
+        histogram("sg_http_request_duration_seconds", "HTTP request latency per endpoint.", "endpoint", reg.latency)
+        histogram("sg_ratelimit_wait_seconds", "Time waited for the rate limiter per endpoint.", "endpoint", reg.limiter_wait)
+
+        lines.append("# HELP sg_http_responses_total HTTP responses per endpoint and status code.")
+        lines.append("# TYPE sg_http_responses_total counter")
+        for (endpoint, status), n in sorted(reg.status.items()):
+            lines.append(f'sg_http_responses_total{{endpoint="{endpoint}",status="{status}"}} {n}')
+
+        lines.append("# HELP sg_http_response_bytes_total Response bytes received per endpoint.")
+        lines.append("# TYPE sg_http_response_bytes_total counter")
+        for endpoint, n in sorted(reg.bytes.items()):
+            lines.append(f'sg_http_response_bytes_total{{endpoint="{endpoint}"}} {n}')
+
+        for name, value in sorted(reg.counters.items()):
+            lines.append(f"# TYPE sg_{name} counter")
+            lines.append(f"sg_{name} {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+def _atomic_write(path: str, content: str):
+    with atomic_open(path) as f:
+        f.write(content)
+
+
+def write_textfile(path: str):
+    """Writes the Prometheus textfile (node_exporter textfile collector)."""
+    _atomic_write(path, to_prometheus())
+
+
+def write_report(path: str, extra: dict | None = None):
+    """Writes the JSON report of the current run."""
+    report = run_report()
+    if extra:
+        report.update(extra)
+    _atomic_write(path, json.dumps(report, indent=4, default=str))
@@ -0,0 +1,212 @@
+from dataclasses import dataclass, field
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from src.models import Creator, Giveaway, Giveaways
+from utils.logger import log
+from utils.backend import StorageBackend
+
+
+COLUMNS = (
+    "id", "name", "points", "copies", "app_id", "package_id", "link",
+    "created_timestamp", "start_timestamp", "end_timestamp", "comment_count",
+    "entry_count", "creator_id", "creator_steam_id", "creator_username", "code",
+    "region_restricted", "invite_only", "whitelist", "group", "contributor_level",
+    "joined", "owned", "score",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS giveaways (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    points INTEGER NOT NULL DEFAULT 0,
+    copies INTEGER NOT NULL DEFAULT 1,
+    app_id INTEGER,
+    package_id INTEGER,
+    link TEXT NOT NULL DEFAULT '',
+    created_timestamp INTEGER NOT NULL DEFAULT 0,
+    start_timestamp INTEGER NOT NULL DEFAULT 0,
+    end_timestamp INTEGER NOT NULL DEFAULT 0,
+    comment_count INTEGER NOT NULL DEFAULT 0,
+    entry_count INTEGER NOT NULL DEFAULT 0,
+    creator_id INTEGER,
+    creator_steam_id TEXT,
+    creator_username TEXT,
+    code TEXT NOT NULL DEFAULT '',
+    region_restricted INTEGER NOT NULL DEFAULT 0,
+    invite_only INTEGER NOT NULL DEFAULT 0,
+    whitelist INTEGER NOT NULL DEFAULT 0,
+    "group" INTEGER NOT NULL DEFAULT 0,
+    contributor_level INTEGER NOT NULL DEFAULT 0,
+    joined INTEGER NOT NULL DEFAULT 0,
+    owned INTEGER NOT NULL DEFAULT 0,
+    score REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_giveaways_end_timestamp ON giveaways(end_timestamp);
+CREATE INDEX IF NOT EXISTS idx_giveaways_state ON giveaways(joined, owned);
+CREATE INDEX IF NOT EXISTS idx_giveaways_points ON giveaways(points);
+CREATE INDEX IF NOT EXISTS idx_giveaways_app_id ON giveaways(app_id);
+CREATE INDEX IF NOT EXISTS idx_giveaways_code ON giveaways(code);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_QUOTED = ", ".join(f'"{c}"' for c in COLUMNS)
+_PLACEHOLDERS = ", ".join("?" for _ in COLUMNS)
+INSERT_SQL = f"INSERT OR REPLACE INTO giveaways ({_QUOTED}) VALUES ({_PLACEHOLDERS})"
+MERGE_SQL = (
+    f"INSERT INTO giveaways ({_QUOTED}) VALUES ({_PLACEHOLDERS}) "
+    "ON CONFLICT(id) DO UPDATE SET "
+    + ", ".join(f'"{c}" = excluded."{c}"' for c in COLUMNS if c not in ("id", "joined", "owned"))
+    + ", joined = MAX(giveaways.joined, excluded.joined)"
+    + ", owned = MAX(giveaways.owned, excluded.owned)"
+    # dirty tracking: linhas iguais não são reescritas
+    # (score é derivado e muda com o tempo: sozinho não torna a linha suja)
+    + " WHERE (" + ", ".join(f'giveaways."{c}"' for c in COLUMNS if c not in ("id", "joined", "owned", "score")) + ")"
+    + " IS NOT (" + ", ".join(f'excluded."{c}"' for c in COLUMNS if c not in ("id", "joined", "owned", "score")) + ")"
+    + " OR excluded.joined > giveaways.joined OR excluded.owned > giveaways.owned"
+)
+
+
+def _to_row(g: Giveaway) -> tuple:
+    c = g.creator
+    return (
+        g.id, g.name, g.points, g.copies, g.app_id, g.package_id, g.link,
+        g.created_timestamp, g.start_timestamp, g.end_timestamp, g.comment_count,
+        g.entry_count,
+        c.id if c else None, c.steam_id if c else None, c.username if c else None,
+        g.code, int(g.region_restricted), int(g.invite_only), int(g.whitelist),
+        int(g.group), g.contributor_level, int(g.joined), int(g.owned), g.score,
+    )
+
+
+def _from_row(row: sqlite3.Row) -> Giveaway:
+    creator = None
+    if row["creator_id"] is not None:
+        creator = Creator.get(row["creator_id"], row["creator_steam_id"], row["creator_username"])
+    return Giveaway(
+        id=row["id"],
+        name=sys.intern(row["name"]),
+        points=row["points"],
+        copies=row["copies"],
+        app_id=row["app_id"],
+        package_id=row["package_id"],
+        link=row["link"],
+        created_timestamp=row["created_timestamp"],
+        start_timestamp=row["start_timestamp"],
+        end_timestamp=row["end_timestamp"],
+        comment_count=row["comment_count"],
+        entry_count=row["entry_count"],
+        creator=creator,
+        code=row["code"],
+        region_restricted=bool(row["region_restricted"]),
+        invite_only=bool(row["invite_only"]),
+        whitelist=bool(row["whitelist"]),
+        group=bool(row["group"]),
+        contributor_level=row["contributor_level"],
+        joined=bool(row["joined"]),
+        owned=bool(row["owned"]),
+        score=row["score"],
+    )
+
+
+@dataclass
+class SqliteManager(StorageBackend):
+    """
+    SQLite store for the giveaway catalog.
+
+    Filters used for selection (points range, timeframe, joined/owned) run
+    as indexed SQL queries, so the catalog never has to be fully loaded in
+    memory. On first use an existing JSON catalog (`import_from`) is imported.
+    """
+
+    file: str
+    import_from: str | None = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def __post_init__(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.file)), exist_ok=True)
+        self.conn = sqlite3.connect(self.file, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+        if self.import_from and self._get_meta("time_fetched") is None and os.path.exists(self.import_from):
+            log.info(f"Importing JSON catalog {self.import_from} into {self.file}")
+            with open(self.import_from, "r", encoding="utf-8") as f:
+                self.write(json.load(f))
+
+    def _get_meta(self, key: str) -> str | None:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_meta(self, key: str, value) -> None:
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def get_giveaways(self) -> dict[str, Giveaway]:
+        rows = self.conn.execute("SELECT * FROM giveaways").fetchall()
+        return {str(row["id"]): _from_row(row) for row in rows}
+
+    def get_giveaway(self, giveaway_id: int) -> Giveaway | None:
+        row = self.conn.execute("SELECT * FROM giveaways WHERE id = ?", (int(giveaway_id),)).fetchone()
+        return _from_row(row) if row else None
+
+    def write(self, data: Giveaways | dict) -> None:
+        """Replaces the whole catalog in a single transaction."""
+        if isinstance(data, dict):
+            data = Giveaways.from_dict(data)
+
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM giveaways")
+            self.conn.executemany(INSERT_SQL, (_to_row(g) for g in data.giveaways.values()))
+            self._set_meta("time_fetched", data.time_fetched)
+            self._set_meta("results_count", data.results_count)
+
+    def update_giveaway(self, giveaway: Giveaway):
+        with self._lock, self.conn:
+            self.conn.execute(INSERT_SQL, _to_row(giveaway))
+
+    def merge_giveaways(self, new_giveaways: list[Giveaway]) -> int:
+        with self._lock, self.conn:
+            cur = self.conn.executemany(MERGE_SQL, (_to_row(g) for g in new_giveaways))
+        return cur.rowcount
+
+    def get_flags(self, ids) -> dict[str, tuple[bool, bool]]:
+        # só as linhas marcadas interessam: sem flags no store é (False, False)
+        wanted = {str(gid) for gid in ids}
+        rows = self.conn.execute("SELECT id, joined, owned FROM giveaways WHERE joined OR owned").fetchall()
+        return {str(row["id"]): (bool(row["joined"]), bool(row["owned"])) for row in rows if str(row["id"]) in wanted}
+
+    def get_meta(self, key: str) -> str | None:
+        return self._get_meta(key)
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._lock, self.conn:
+            self._set_meta(key, value)
+
+    def cleanup_expired(self, now: float):
+        with self._lock, self.conn:
+            cur = self.conn.execute("DELETE FROM giveaways WHERE end_timestamp <= ?", (now,))
+        log.info(f"🧹 Cleanup: removidos {cur.rowcount} giveaways expirados.")
+
+    def query_giveaways(self, min_points=0, max_points=None, timeframe=None, now=None, exclude_joined=True) -> list[Giveaway]:
+        now = time.time() if now is None else now
+        clauses = ["points >= ?"]
+        params: list = [min_points]
+        if max_points is not None:
+            clauses.append("points <= ?")
+            params.append(max_points)
+        if timeframe is not None:
+            clauses.append("end_timestamp <= ?")
+            params.append(now + timeframe)
+        if exclude_joined:
+            clauses.append("joined = 0 AND owned = 0")
+
+        sql = f"SELECT * FROM giveaways WHERE {' AND '.join(clauses)}"
+        return [_from_row(row) for row in self.conn.execute(sql, params)]
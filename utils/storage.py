@@ -0,0 +1,88 @@
+# storage.py
+"""
+Pluggable storage backends for the giveaway catalog.
+
+`StorageBackend` (utils/backend.py) is the interface shared by `JsonManager` (JSON snapshot +
+journal) and `SqliteManager` (indexed SQLite database). The backend is
+chosen with the `STORAGE_BACKEND` environment variable and exposed as the
+global `jm`, which only opens (reads) the catalog on first use. Inside
+`use_store(store)` (one account of a multi-account run) `jm` is that store.
+"""
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from src.config import DATA_FILE, SQLITE_FILE, STORAGE_BACKEND
+from utils.backend import StorageBackend
+
+
+def open_storage(backend: str = STORAGE_BACKEND, directory: str | None = None) -> StorageBackend:
+    """
+    Opens the configured catalog store.
+
+    Args:
+        backend (str): "json", "sqlite" or "memory" (no files, see `MemoryManager`).
+        directory (str|None): Directory of the store files. Defaults to DATA_DIR.
+
+    Returns:
+        StorageBackend: The opened store.
+    """
+    data_file, sqlite_file = DATA_FILE, SQLITE_FILE
+    if directory is not None:
+        os.makedirs(directory, exist_ok=True)
+        data_file = os.path.join(directory, os.path.basename(DATA_FILE))
+        sqlite_file = os.path.join(directory, os.path.basename(SQLITE_FILE))
+    match backend:
+        case "json":
+            from utils.json_manager import JsonManager
+            return JsonManager(data_file)
+        case "sqlite":
+            from utils.sqlite_manager import SqliteManager
+            return SqliteManager(sqlite_file, import_from=data_file)
+        case "memory":
+            from utils.json_manager import MemoryManager
+            return MemoryManager()
+        case _:
+            raise ValueError(f"Unknown storage backend: {backend}")
+
+
+_override: ContextVar[StorageBackend | None] = ContextVar("sg_store", default=None)
+
+
+@contextmanager
+def use_store(store: StorageBackend):
+    """Makes `jm` resolve to `store` inside the block (per thread/context)."""
+    token = _override.set(store)
+    try:
+        yield store
+    finally:
+        _override.reset(token)
+
+
+class LazyStorage:
+    """Proxy that opens the store the first time one of its attributes is used."""
+
+    def __init__(self, factory=open_storage):
+        self._factory = factory
+        self._store: StorageBackend | None = None
+        self._lock = threading.Lock()
+
+    def get(self) -> StorageBackend:
+        override = _override.get()
+        if override is not None:
+            return override
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    self._store = self._factory()
+        return self._store
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+    def __repr__(self):
+        return f"LazyStorage({self._store!r})"
+
+
+jm = LazyStorage()
@@ -1,7 +1,44 @@
-from workers import WorkerEntrypoint, Response
-import main
+import os
+import shlex
+
+from workers import Response, WorkerEntrypoint
+
+# Secrets/variáveis do Worker passados ao bot como variáveis de ambiente
+ENV_KEYS = ("COOKIES", "SG_BASE_URL", "FLARESOLVERR_URL", "WORKER_ARGS")
+DEFAULT_ARGS = "--max-pages 5"
+# o Worker não tem disco persistente: catálogo em memória, sem cache de sessão,
+# relatório, textfile de métricas nem plano de joins em ficheiro
+EPHEMERAL_ENV = {
+    "STORAGE_BACKEND": "memory",
+    "SESSION_CACHE_FILE": "",
+    "RUN_REPORT_FILE": "",
+    "METRICS_TEXTFILE": "",
+    "JOIN_PLAN_FILE": "",
+    "HTTP_CACHE": "0",
+}
+
+
+async def run(env) -> dict:
+    """Runs one bot cycle on the asyncio core with the Workers fetch() transport."""
+    for key in ENV_KEYS:
+        value = getattr(env, key, None)
+        if value is not None:
+            os.environ[key] = str(value)
+    for key, value in EPHEMERAL_ENV.items():
+        os.environ.setdefault(key, value)
+
+    # só depois do env: src/config.py lê as variáveis ao importar
+    import main
+    from src import async_core
+
+    argv = shlex.split(os.environ.get("WORKER_ARGS", DEFAULT_ARGS))
+    return await main.main_async(argv, transport=async_core.FetchTransport())
+
 
 class Default(WorkerEntrypoint):
-    async def fetch(self,env, request):
-        main.main(env=env)
-        return Response("✅ Cron executed", status=200)
\ No newline at end of file
+    async def scheduled(self, controller, env, ctx):
+        await run(self.env)
+
+    async def fetch(self, request):
+        summary = await run(self.env)
+        return Response(f"✅ Cron executed: joined {summary.get('joined', 0)}/{summary.get('selected', 0)}", status=200)